@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+import asyncio
+from raspi_io.utility import scan_server
+from raspi_io.aio import AsyncGPIO, AsyncQuery, AsyncRaspberryManager
+
+
+async def blink(gpio, channel, times):
+    for _ in range(times):
+        await gpio.output(channel, 1)
+        await gpio.output(channel, 0)
+
+
+async def main(host):
+    manager = AsyncRaspberryManager(host)
+    query = await manager.create(AsyncQuery)
+    print(await query.get_version())
+    await query.close()
+
+    async with AsyncGPIO(host) as gpio:
+        await gpio.setmode(AsyncGPIO.BCM)
+        await gpio.setup([20, 21], AsyncGPIO.OUT)
+        await asyncio.gather(blink(gpio, 20, 10), blink(gpio, 21, 10))
+
+
+if __name__ == "__main__":
+    asyncio.run(main(scan_server()[0]))
@@ -1,5 +1,5 @@
 from .gpio_spi_flash import GPIOSPIFlash
-from .gpio import GPIO, SoftPWM, SoftSPI, GPIOTimingContentManager
+from .gpio import GPIO, SoftPWM, SoftPWMGroup, SoftSPI, GPIOTimingContentManager
 from .tvservice import TVService
 from .spi_flash import SPIFlash
 from .graph import MmalGraph
@@ -15,7 +15,7 @@ from .version import version
 __all__ = ['version',
            'RaspberryManager', 'AppManager',
            'RaspiException', 'RaspiSocketError', 'RaspiMsgDecodeError',
-           'GPIO', 'SoftPWM', 'GPIOTimingContentManager',
+           'GPIO', 'SoftPWM', 'SoftPWMGroup', 'GPIOTimingContentManager',
            'TVService', 'MmalGraph',
            'Serial', 'Query', 'I2C', 'Wireless',
            'SPI', 'SoftSPI', 'SPIFlash', 'GPIOSPIFlash']
@@ -0,0 +1,715 @@
+# -*- coding: utf-8 -*-
+"""Native asyncio client, requires Python3.7+ and websockets package"""
+import json
+import uuid
+import socket
+import asyncio
+import hashlib
+import websockets
+from .client import RaspiWsClient
+from .core import RaspiBaseMsg, RaspiAckMsg, RaspiException, RaspiMsgDecodeError, RaspiSocketError, \
+    RaspiBinaryDataHeader, RaspiBinarySink, RaspiBinaryStream, DEFAULT_PORT, DATA_TRANSFER_BLOCK_SIZE, \
+    get_websocket_url, get_binary_data_slices
+from .gpio import GPIO, GPIOMode, GPIOChannel, GPIOCtrl, GPIOSetup, GPIOCleanup, GPIOInputMany, GPIOOutputMany, \
+    GPIOOutputMask, GPIOSoftPWM, GPIOSoftPWMCtrl, GPIOSoftSPI, GPIOSoftSPIXfer, GPIOSoftSPIRead, GPIOSoftSPIWrite
+from .i2c import I2C, I2CDevice, I2CRead, I2CWrite
+from .spi import SPI, SPIDevice, SPIClose, SPIRead, SPIWrite, SPIXfer, SPIXfer2, SPITransfer
+from .serial import Serial, SerialInit, SerialClose, SerialRead, SerialWrite, SerialFlush, SerialBaudrate
+from .spi_flash import SPIFlash, SPIFlashInstruction, SPIFlashDevice, SPIFlashClose, SPIFlashProbe, \
+    SPIFlashErase, SPIFlashReadChip, SPIFlashReadStatus, SPIFlashWriteStatus
+from .query import Query, QueryDevice, QueryHardware, QueryVersion
+__all__ = ['AsyncRaspiWsClient', 'AsyncRaspberryManager',
+           'AsyncGPIO', 'AsyncSoftPWM', 'AsyncSoftSPI',
+           'AsyncI2C', 'AsyncSPI', 'AsyncSerial', 'AsyncSPIFlash', 'AsyncQuery']
+
+
+class AsyncRaspiWsClient(object):
+    PATH = ""
+    RECEIVE_BINARY_FILE_HANDLE = RaspiWsClient.RECEIVE_BINARY_FILE_HANDLE
+
+    check_result = staticmethod(RaspiWsClient.check_result)
+    encode_binary = staticmethod(RaspiWsClient.encode_binary)
+    decode_binary = staticmethod(RaspiWsClient.decode_binary)
+    print_binary = staticmethod(RaspiWsClient.print_binary)
+
+    def __init__(self, host, node, timeout=1, verbose=1):
+        """AsyncRaspiWsClient, same as RaspiWsClient but running on asyncio event loop
+
+        Instance is not usable until connect() is awaited, or using it as async context manager:
+
+            async with AsyncGPIO(host) as gpio:
+                await gpio.setmode(GPIO.BCM)
+
+        :param host: raspberry address such as "192.168.1.100"
+        :param node: node name such as "GPIO"/"I2C"
+        :param timeout: timeout in seconds
+        :param verbose: verbose message level
+        """
+        self._ws = None
+        self.__host = host
+        self.__node = node
+        self.__error = ""
+        self.__timeout = timeout
+        self.__verbose = verbose
+        # Each device own a connection, serialize request and ack on it
+        self.__lock = asyncio.Lock()
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    @classmethod
+    async def create(cls, *args, **kwargs):
+        """Create and connect an instance
+
+        :return: connected instance
+        """
+        client = cls(*args, **kwargs)
+        await client.connect()
+        return client
+
+    async def connect(self):
+        try:
+            # First using default port apply for a dynamic port
+            require_address = (self.__host, DEFAULT_PORT)
+            url = get_websocket_url(require_address, self.PATH, self.__node)
+            async with websockets.connect(url, open_timeout=self.__timeout) as ws:
+                ack = json.loads(await asyncio.wait_for(ws.recv(), self.__timeout))
+
+            # Second using first step acquired port connect server
+            dynamic_address = (self.__host, RaspiAckMsg(**ack).data)
+            url = get_websocket_url(dynamic_address, self.PATH, self.__node)
+            self._ws = await websockets.connect(url, open_timeout=self.__timeout, max_size=None)
+        except (socket.error, asyncio.TimeoutError, websockets.WebSocketException) as err:
+            raise RaspiSocketError(err)
+        except (ValueError, TypeError, RaspiMsgDecodeError):
+            raise RaspiSocketError("Require dynamic port error")
+
+        await self._setup()
+
+    async def _setup(self):
+        """Device initialize after connected, subclass override it"""
+        pass
+
+    async def _teardown(self):
+        """Device release before disconnect, subclass override it"""
+        pass
+
+    async def close(self):
+        if self._ws is None:
+            return
+
+        try:
+            await self._teardown()
+        finally:
+            await self._ws.close()
+            self._ws = None
+
+    def _error(self, msg):
+        self.__error = msg
+        if self.__verbose >= 1 and msg:
+            print(self.__error)
+
+    def _output(self, msg):
+        if self.__verbose >= 2:
+            print(msg)
+
+    def get_error(self):
+        error = self.__error
+        self.__error = ""
+        return error
+
+    async def _recv(self):
+        data = await asyncio.wait_for(self._ws.recv(), self.__timeout)
+        if not data:
+            raise RuntimeError("receive ack error, no data returned")
+
+        return data
+
+    async def _recv_ack(self):
+        data = await self._recv()
+        ack = RaspiAckMsg(**json.loads(data))
+        self._output("Recv:{}".format(data))
+        return ack
+
+    async def _transfer(self, msg):
+        """Basic transfer, send a msg and get an ack
+
+        :param msg: request message
+        :return: None or RaspiAckMsg
+        """
+        try:
+
+            self.__error = ""
+
+            if not isinstance(msg, RaspiBaseMsg):
+                raise TypeError("request {!r} not {!r}".format(RaspiBaseMsg.__name__, msg.__class__.__name__))
+
+            async with self.__lock:
+                # Send msg
+                await self._ws.send(msg.dumps())
+                self._output("Send:{}".format(msg))
+
+                # Wait ack
+                ack = await self._recv_ack()
+
+            # Check ack message
+            if not ack.ack:
+                self._error("{}".format(ack.data))
+            return ack
+        except (RuntimeError, TypeError, ValueError, asyncio.TimeoutError) as err:
+            self._error("{}".format(err))
+            return None
+        except RaspiMsgDecodeError as err:
+            self._error("{}".format(err))
+            return None
+        except websockets.WebSocketException as err:
+            self._error("{}".format(err))
+            return None
+
+    async def _recv_binary_data(self, request, sink=None):
+        """Receive binary data, same flow as RaspiWsClient._recv_binary_data
+
+        :param request: read request
+        :param sink: None or data sink: file object, mmap or callable
+        :return: binary data(sink is None) or received data size
+        """
+        try:
+
+            self._error("")
+
+            if not isinstance(request, RaspiBaseMsg):
+                raise TypeError("request {!r} not {!r}".format(RaspiBaseMsg.__name__, request.__class__.__name__))
+
+            async with self.__lock:
+                await self._ws.send(request.dumps())
+                self._output("Send:{}".format(request))
+
+                data = await self._recv()
+                header = RaspiBinaryDataHeader(**json.loads(data))
+                self._output("Recv:{}".format(data))
+
+                recv_data = RaspiBinarySink(header.size, sink)
+                for _ in range(header.slices):
+                    recv_data.write(await self._recv())
+
+                recv_data.verify(header.md5)
+
+                ack = await self._recv_ack()
+
+            if not ack.ack:
+                self._error("{}".format(ack.data))
+
+            return recv_data.result
+        except (ValueError, RuntimeError, TypeError, asyncio.TimeoutError) as err:
+            self._error("{}".format(err))
+            return None
+        except RaspiMsgDecodeError as err:
+            self._error("{}".format(err))
+            return None
+        except websockets.WebSocketException as err:
+            self._error("{}".format(err))
+            return None
+
+    async def _send_binary_data(self, header, data):
+        """Send binary data to server, same flow as RaspiWsClient._send_binary_data
+
+        :param header: binary data header
+        :param data: binary data
+        return RaspiAckMsg
+        """
+        try:
+
+            self._error("")
+
+            if not isinstance(header, RaspiBinaryDataHeader):
+                raise TypeError("req {!r} not {!r}".format(RaspiBinaryDataHeader.__name__, header.__class__.__name__))
+
+            async with self.__lock:
+                await self._ws.send(header.dumps())
+                self._output("Send:{}".format(header))
+
+                for i in range(header.slices):
+                    await self._ws.send(bytes(data[i * DATA_TRANSFER_BLOCK_SIZE: (i + 1) * DATA_TRANSFER_BLOCK_SIZE]))
+
+                return await self._recv_ack()
+        except (TypeError, RuntimeError, ValueError, asyncio.TimeoutError) as err:
+            self._error("{}".format(err))
+            return None
+        except RaspiMsgDecodeError as err:
+            self._error("{}".format(err))
+            return None
+        except websockets.WebSocketException as err:
+            self._error("{}".format(err))
+            return None
+
+    async def _send_binary_stream(self, stream, fmt="bin", handle=""):
+        """Send binary data to server block by block, memory usage is bounded to one block
+
+        Same flow as RaspiWsClient._send_binary_stream without trailer, md5 is calculated before send header
+
+        :param stream: RaspiBinaryStream
+        :param fmt: data format
+        :param handle: which function process this data
+        :return: RaspiAckMsg
+        """
+        try:
+
+            self._error("")
+
+            if not isinstance(stream, RaspiBinaryStream):
+                raise TypeError("req {!r} not {!r}".format(RaspiBinaryStream.__name__, stream.__class__.__name__))
+
+            for _ in stream.blocks():
+                pass
+
+            header = RaspiBinaryDataHeader(size=stream.size, md5=stream.md5, slices=get_binary_data_slices(stream.size),
+                                           format=fmt, handle=handle)
+            async with self.__lock:
+                await self._ws.send(header.dumps())
+                self._output("Send:{}".format(header))
+
+                # Empty data still need one block, block of file object is a reused buffer send a copy of it
+                if not stream.size:
+                    await self._ws.send(bytes())
+
+                for block in stream.blocks():
+                    await self._ws.send(bytes(block))
+
+                return await self._recv_ack()
+        except (TypeError, RuntimeError, ValueError, EOFError, IOError, asyncio.TimeoutError) as err:
+            self._error("{}".format(err))
+            return None
+        except RaspiMsgDecodeError as err:
+            self._error("{}".format(err))
+            return None
+        except websockets.WebSocketException as err:
+            self._error("{}".format(err))
+            return None
+
+    async def send_binary_data(self, header, data):
+        ack = await self._send_binary_data(header, data)
+        if not isinstance(ack, RaspiAckMsg):
+            return False
+
+        if not ack.ack:
+            self._error("{}".format(ack.data))
+
+        return ack.ack
+
+    async def send_binary_stream(self, source, fmt="bin", handle=""):
+        """Send binary data from file path, file object or buffer without loading it into memory
+
+        :param source: RaspiBinaryStream, file path, file object or buffer
+        :param fmt: data format
+        :param handle: which function process this data
+        :return: success return True
+        """
+        stream = source if isinstance(source, RaspiBinaryStream) else RaspiBinaryStream(source)
+        try:
+            ack = await self._send_binary_stream(stream, fmt, handle)
+        finally:
+            if stream is not source:
+                stream.close()
+
+        if not isinstance(ack, RaspiAckMsg):
+            return False
+
+        if not ack.ack:
+            self._error("{}".format(ack.data))
+
+        return ack.ack
+
+
+class AsyncRaspberryManager(object):
+    def __init__(self, host):
+        """Asyncio raspberry io manager
+
+        :param host: raspberry pi host
+        """
+        self.__host = host
+
+    async def create(self, cls, *args, **kwargs):
+        if not issubclass(cls, AsyncRaspiWsClient):
+            raise TypeError("cls need a {!r}, not {!r}".format(AsyncRaspiWsClient.__name__, cls.__name__))
+
+        return await cls.create(self.__host, *args, **kwargs)
+
+
+class AsyncGPIO(AsyncRaspiWsClient):
+    PATH = GPIO.PATH
+
+    BCM = GPIO.BCM
+    BOARD = GPIO.BOARD
+
+    IN = GPIO.IN
+    OUT = GPIO.OUT
+
+    LOW = GPIO.LOW
+    HIGH = GPIO.HIGH
+
+    PUD_UP = GPIO.PUD_UP
+    PUD_OFF = GPIO.PUD_OFF
+    PUD_DOWN = GPIO.PUD_DOWN
+
+    def __init__(self, host, timeout=1, verbose=1):
+        super(AsyncGPIO, self).__init__(host, self.PATH, timeout, verbose)
+        self.__registered = set()
+
+    async def _teardown(self):
+        if self.__registered:
+            await self.cleanup(list(self.__registered))
+
+    async def setmode(self, mode):
+        ret = await self._transfer(GPIOMode(mode=mode))
+        return True if isinstance(ret, RaspiAckMsg) and ret.ack else False
+
+    async def input(self, channel):
+        ack = await self._transfer(GPIOChannel(channel=channel))
+        if not isinstance(ack, RaspiAckMsg) or not ack.ack:
+            return None
+
+        return ack.data
+
+    async def cleanup(self, channel):
+        ret = await self._transfer(GPIOCleanup(channel=channel))
+        return True if isinstance(ret, RaspiAckMsg) and ret.ack else False
+
+    async def output(self, channel, value):
+        ret = await self._transfer(GPIOCtrl(channel=channel, value=value))
+        return True if isinstance(ret, RaspiAckMsg) and ret.ack else False
+
+    async def input_many(self, channels, packed=False):
+        ack = await self._transfer(GPIOInputMany(channel=list(channels)))
+        if not isinstance(ack, RaspiAckMsg) or not ack.ack:
+            return None
+
+        return sum((1 << i) for i, value in enumerate(ack.data) if value) if packed else ack.data
+
+    async def output_many(self, values):
+        values = GPIOOutputMany.pairs(values)
+        ret = await self._transfer(GPIOOutputMany(channel=[c for c, _ in values], value=[v for _, v in values]))
+        return True if isinstance(ret, RaspiAckMsg) and ret.ack else False
+
+    async def output_mask(self, mask, values):
+        ret = await self._transfer(GPIOOutputMask(mask=mask, value=values & mask))
+        return True if isinstance(ret, RaspiAckMsg) and ret.ack else False
+
+    async def setup(self, channel, direction, pull_up_down=PUD_OFF, initial=LOW):
+        ret = await self._transfer(
+            GPIOSetup(channel=channel, direction=direction, pull_up_down=pull_up_down, initial=initial)
+        )
+        if isinstance(ret, RaspiAckMsg) and ret.ack:
+            if isinstance(channel, (list, tuple)):
+                self.__registered.update(channel)
+            else:
+                self.__registered.add(channel)
+
+        return True if isinstance(ret, RaspiAckMsg) and ret.ack else False
+
+
+class AsyncSoftPWM(AsyncRaspiWsClient):
+    PATH = GPIO.PATH
+
+    def __init__(self, host, mode, channel, frequency, timeout=1, verbose=1):
+        super(AsyncSoftPWM, self).__init__(host, self.PATH, timeout, verbose)
+        self.__mode = mode
+        self.__state = False
+        self.__channel = channel
+        self.__frequency = frequency
+        self.uuid = str(uuid.uuid5(uuid.NAMESPACE_OID, '{0:d},{1:d},{2:d}'.format(mode, channel, frequency)))
+
+    async def _setup(self):
+        await self._transfer(GPIOSoftPWM(mode=self.__mode, channel=self.__channel, frequency=self.__frequency))
+
+    async def _teardown(self):
+        await self.stop()
+        await self._transfer(GPIOCleanup(channel=self.__channel))
+
+    async def start(self, duty):
+        ret = await self._transfer(GPIOSoftPWMCtrl(uuid=self.uuid, duty=duty))
+        self.__state = ret.ack if isinstance(ret, RaspiAckMsg) else False
+        return True if isinstance(ret, RaspiAckMsg) and ret.ack else False
+
+    async def stop(self):
+        ret = await self._transfer(GPIOSoftPWMCtrl(uuid=self.uuid))
+        self.__state = False if isinstance(ret, RaspiAckMsg) and ret.ack else self.__state
+        return True if isinstance(ret, RaspiAckMsg) and ret.ack else False
+
+    def is_running(self):
+        return self.__state
+
+
+class AsyncSoftSPI(AsyncRaspiWsClient):
+    PATH = GPIO.PATH
+
+    def __init__(self, host, mode, cs, clk, mosi, miso, bits_per_word=8, timeout=1, verbose=1):
+        super(AsyncSoftSPI, self).__init__(host, self.PATH, timeout, verbose)
+        self.__spi = GPIOSoftSPI(mode=mode, cs=cs, clk=clk, mosi=mosi, miso=miso, bits_per_word=bits_per_word)
+        self.channel = [cs, clk, mosi, miso]
+        self.uuid = self.__spi.generate_uuid()
+
+    async def _setup(self):
+        ret = await self._transfer(self.__spi)
+        if not isinstance(ret, RaspiAckMsg) or not ret.ack:
+            raise RaspiException(self.get_error() if ret is None else ret.data)
+
+    async def _teardown(self):
+        await self._transfer(GPIOCleanup(channel=self.channel))
+
+    async def xfer(self, data, size=0):
+        ret = await self._transfer(GPIOSoftSPIXfer(data=data, size=size, uuid=self.uuid))
+        return ret.data if isinstance(ret, RaspiAckMsg) and ret.ack else list()
+
+    async def read(self, size):
+        ret = await self._transfer(GPIOSoftSPIRead(size=size, uuid=self.uuid))
+        return ret.data if isinstance(ret, RaspiAckMsg) and ret.ack else list()
+
+    async def write(self, data):
+        ret = await self._transfer(GPIOSoftSPIWrite(data=data, uuid=self.uuid))
+        return ret.data if isinstance(ret, RaspiAckMsg) and ret.ack else 0
+
+
+class AsyncI2C(AsyncRaspiWsClient):
+    PATH = I2C.PATH
+
+    def __init__(self, host, bus, device_address, tenbit=0, flags=0, delay=5, iaddr_bytes=1, page_bytes=8,
+                 timeout=1, verbose=1):
+        super(AsyncI2C, self).__init__(host, bus, timeout, verbose)
+        self.__device = I2CDevice(bus=bus, addr=device_address, tenbit=tenbit, flags=flags, delay=delay,
+                                  iaddr_bytes=iaddr_bytes, page_bytes=page_bytes)
+
+    async def _setup(self):
+        ret = await self._transfer(self.__device)
+        if not isinstance(ret, RaspiAckMsg) or not ret.ack:
+            raise RaspiException(self.get_error() if ret is None else ret.data)
+
+    async def read(self, address, size):
+        ret = await self._transfer(I2CRead(addr=address, size=size))
+        return self.decode_binary(ret.data) if isinstance(ret, RaspiAckMsg) and ret.ack else ""
+
+    async def write(self, address, data):
+        ret = await self._transfer(I2CWrite(addr=address, data=self.encode_binary(data)))
+        return ret.data if isinstance(ret, RaspiAckMsg) and ret.ack else -1
+
+    async def ioctl_read(self, address, size):
+        ret = await self._transfer(I2CRead(addr=address, size=size, type=I2CRead.IOCTL))
+        return self.decode_binary(ret.data) if isinstance(ret, RaspiAckMsg) and ret.ack else ""
+
+    async def ioctl_write(self, address, data):
+        ret = await self._transfer(I2CWrite(addr=address, data=self.encode_binary(data), type=I2CWrite.IOCTL))
+        return ret.data if isinstance(ret, RaspiAckMsg) and ret.ack else -1
+
+
+class AsyncSPI(AsyncRaspiWsClient):
+    PATH = SPI.PATH
+
+    def __init__(self, host, device, max_speed=50,
+                 mode=0, cshigh=False, no_cs=False, loop=False, lsbfirst=False, threewire=False, timeout=1, verbose=1):
+        super(AsyncSPI, self).__init__(host, device, timeout, verbose)
+        self.__opened = False
+        self.__device = SPIDevice(device=device, max_speed=max_speed, mode=mode, cshigh=cshigh,
+                                  no_cs=no_cs, loop=loop, lsbfirst=lsbfirst, threewire=threewire)
+
+    async def _setup(self):
+        ret = await self._transfer(self.__device)
+        self.__opened = ret.ack if isinstance(ret, RaspiAckMsg) else False
+        if not self.__opened:
+            raise RaspiException(self.get_error() if ret is None else ret.data)
+
+    async def _teardown(self):
+        if self.__opened:
+            await self._transfer(SPIClose(device=self.__device.device))
+            self.__opened = False
+
+    async def read(self, size):
+        ret = await self._transfer(SPIRead(size=size))
+        return self.decode_binary(ret.data) if isinstance(ret, RaspiAckMsg) and ret.ack else ""
+
+    async def write(self, data):
+        ret = await self._transfer(SPIWrite(data=self.encode_binary(data)))
+        return ret.data if isinstance(ret, RaspiAckMsg) and ret.ack else -1
+
+    async def xfer(self, write_data, read_size, speed=0, delay=0):
+        ret = await self._transfer(SPIXfer(write_data=self.encode_binary(write_data),
+                                           read_size=read_size, speed=speed, delay=delay))
+        return self.decode_binary(ret.data) if isinstance(ret, RaspiAckMsg) and ret.ack else ""
+
+    async def xfer2(self, write_data, read_size, speed=0, delay=0):
+        ret = await self._transfer(SPIXfer2(write_data=self.encode_binary(write_data),
+                                            read_size=read_size, speed=speed, delay=delay))
+        return self.decode_binary(ret.data) if isinstance(ret, RaspiAckMsg) and ret.ack else ""
+
+    async def transfer(self, segments):
+        segments, write_data, fields = SPITransfer.pack_segments(segments)
+        ret = await self._transfer(SPITransfer(write_data=self.encode_binary(write_data), segments=fields))
+        if not isinstance(ret, RaspiAckMsg) or not ret.ack:
+            return None
+
+        try:
+            return SPITransfer.split_read_data(segments, self.decode_binary(ret.data))
+        except ValueError as err:
+            self._error("{}".format(err))
+            return None
+
+
+class AsyncSerial(AsyncRaspiWsClient):
+    PATH = Serial.PATH
+
+    def __init__(self, host, port, baudrate, bytesize=8, parity='N', stopbits=1, timeout=1, verbose=1):
+        super(AsyncSerial, self).__init__(host, port, timeout * 2 or 1, verbose)
+        self.__port = port
+        self.__opened = False
+        self.__baudrate = baudrate
+        self.__init = SerialInit(port=port, baudrate=baudrate, bytesize=bytesize,
+                                 parity=parity, stopbits=stopbits, timeout=timeout)
+
+    async def _setup(self):
+        ret = await self._transfer(self.__init)
+        self.__opened = ret.ack if isinstance(ret, RaspiAckMsg) else False
+        if not self.__opened:
+            raise RaspiException(self.get_error() if ret is None else ret.data)
+
+    async def _teardown(self):
+        if self.__opened:
+            ret = await self._transfer(SerialClose(port=self.__port))
+            self.__opened = False if isinstance(ret, RaspiAckMsg) and ret.ack else self.__opened
+
+    @property
+    def is_open(self):
+        return self.__opened
+
+    @property
+    def port(self):
+        return self.__port
+
+    @property
+    def baudrate(self):
+        return self.__baudrate
+
+    async def set_baudrate(self, baudrate):
+        ret = await self._transfer(SerialBaudrate(baudrate=baudrate))
+        if isinstance(ret, RaspiAckMsg) and ret.ack:
+            self.__baudrate = baudrate
+            return True
+
+        return False
+
+    async def read(self, size=1):
+        ret = await self._transfer(SerialRead(size=size))
+        return self.decode_binary(ret.data) if isinstance(ret, RaspiAckMsg) and ret.ack else bytes()
+
+    async def write(self, data):
+        data = data.encode() if isinstance(data, str) else bytes(data)
+        ret = await self._transfer(SerialWrite(data=self.encode_binary(data)))
+        return ret.data if isinstance(ret, RaspiAckMsg) and ret.ack else -1
+
+    async def flush(self):
+        await self._transfer(SerialFlush(where=SerialFlush.BOTH))
+
+    async def flushInput(self):
+        await self._transfer(SerialFlush(where=SerialFlush.IN))
+
+    async def flushOutput(self):
+        await self._transfer(SerialFlush(where=SerialFlush.OUT))
+
+
+class AsyncSPIFlash(AsyncRaspiWsClient):
+    PATH = SPIFlash.PATH
+
+    def __init__(self, host, device, speed, page_size, chip_size,
+                 cpol=False, cpha=False, instruction=None, timeout=30, verbose=1):
+        super(AsyncSPIFlash, self).__init__(host, device, timeout, verbose)
+        instruction = instruction if isinstance(instruction, SPIFlashInstruction) else SPIFlashInstruction()
+        self.__device = SPIFlashDevice(device=device, speed=speed, cpol=bool(cpol), cpha=bool(cpha),
+                                       page_size=page_size, chip_size=chip_size, instruction=instruction.dict)
+
+    async def _setup(self):
+        ret = await self._transfer(self.__device)
+        if not isinstance(ret, RaspiAckMsg) or not ret.ack:
+            raise RaspiException(self.get_error() if ret is None else ret.data)
+
+    async def _teardown(self):
+        await self._transfer(SPIFlashClose())
+
+    async def probe(self):
+        ret = await self._transfer(SPIFlashProbe())
+        return ret.data if isinstance(ret, RaspiAckMsg) and ret.ack else (0xff, 0xffff)
+
+    async def erase(self):
+        ret = await self._transfer(SPIFlashErase())
+        return ret.data if isinstance(ret, RaspiAckMsg) and ret.ack else False
+
+    async def read_status(self):
+        ret = await self._transfer(SPIFlashReadStatus())
+        return ret.data if isinstance(ret, RaspiAckMsg) and ret.ack else 0xffff
+
+    async def write_status(self, status):
+        ret = await self._transfer(SPIFlashWriteStatus(status=status))
+        return ret.data if isinstance(ret, RaspiAckMsg) and ret.ack else False
+
+    async def read_chip(self, sink=None):
+        return await self._recv_binary_data(SPIFlashReadChip(), sink)
+
+    async def write_chip(self, data, verify=False):
+        """Write data to chip, same as SPIFlash.write_chip
+
+        :param data: spi data, file path, file object or buffer
+        :param verify: verify data after write
+        :return: write result
+        """
+        if not await self.erase():
+            self._error("Erase chip error:{}".format(self.get_error()))
+            return False
+
+        # Stream it block by block do not load whole image
+        with RaspiBinaryStream(data) as stream:
+            if not await self.send_binary_stream(stream, handle="write_chip"):
+                self._error("Write chip error:{}".format(self.get_error()))
+                return False
+
+        # Hash read back data block by block
+        digest = hashlib.md5()
+        if verify and (await self.read_chip(digest.update) is None or digest.hexdigest() != stream.md5):
+            self._error("Verify error, md5 do not matched")
+            return False
+
+        return True
+
+
+class AsyncQuery(AsyncRaspiWsClient):
+    PATH = Query.PATH
+
+    def __init__(self, host, timeout=1, verbose=1):
+        super(AsyncQuery, self).__init__(host, self.PATH, timeout, verbose)
+
+    async def basic_query(self, query):
+        ret = await self._transfer(query)
+        return ret.data if isinstance(ret, RaspiAckMsg) and ret.ack else None
+
+    async def get_version(self):
+        return await self.basic_query(QueryVersion())
+
+    async def get_hardware_info(self):
+        return await self.basic_query(QueryHardware(query=QueryHardware.HARDWARE))
+
+    async def get_ethernet_addr(self, iface):
+        return await self.basic_query(QueryHardware(query=QueryHardware.ETHERNET, params=iface))
+
+    async def get_iface_list(self):
+        return await self.basic_query(QueryDevice(query=QueryDevice.ETH))
+
+    async def get_i2c_list(self):
+        return await self.basic_query(QueryDevice(query=QueryDevice.I2C))
+
+    async def get_spi_list(self):
+        return await self.basic_query(QueryDevice(query=QueryDevice.SPI))
+
+    async def get_serial_list(self, include_links=False):
+        return await self.basic_query(QueryDevice(query=QueryDevice.SERIAL, option=include_links))
+
+    async def get_device_list(self, query_filter):
+        return await self.basic_query(QueryDevice(query=QueryDevice.FILTER, filter=query_filter))
@@ -61,14 +61,15 @@ class AppManager(RaspiWsClient):
     PATH = __name__.split(".")[-1]
     IO_SERVER_NAME = 'raspi_io_server'
 
-    def __init__(self, host, timeout=1, verbose=1):
+    def __init__(self, host, timeout=1, verbose=1, pool=None):
         """Init an app manager
 
         :param host: raspi-io server address
         :param timeout: raspi-io timeout unit second
         :param verbose: verbose message output
+        :param pool: connection pool acquire connection from, None create a dedicated connection
         """
-        super(AppManager, self).__init__(host, self.PATH, timeout, verbose)
+        super(AppManager, self).__init__(host, self.PATH, timeout, verbose, pool)
 
     @staticmethod
     def check_auth(auth):
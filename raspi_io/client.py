@@ -3,42 +3,525 @@ from __future__ import print_function
 import os
 import sys
 import json
+import uuid
 import base64
+import time
 import socket
-import hashlib
+import struct
+import itertools
+import threading
+import contextlib
 import websocket
-from .core import RaspiBaseMsg, RaspiAckMsg, RaspiException, RaspiMsgDecodeError, RaspiSocketError, \
-    RaspiBinaryDataHeader, DEFAULT_PORT, DATA_TRANSFER_BLOCK_SIZE, get_websocket_url, get_binary_data_header
-__all__ = ['RaspiWsClient', 'RaspberryManager']
+import collections
+from .core import RaspiBaseMsg, RaspiAckMsg, RaspiBatchMsg, RaspiException, RaspiMsgDecodeError, RaspiSocketError, \
+    RaspiBinaryDataHeader, DEFAULT_PORT, DATA_TRANSFER_BLOCK_SIZE, FEATURE_PIPELINE, FEATURE_BATCH, \
+    FEATURE_MULTIPLEX, FEATURE_STREAM_UPLOAD, MUX_FRAME_HEADER, RaspiMuxOpen, RaspiMuxClose, \
+    FEATURE_RESUMABLE_TRANSFER, FEATURE_STRIPED_TRANSFER, RaspiBinaryStream, RaspiBinarySink, RaspiBinaryDataTrailer, \
+    RaspiBinaryTransferResume, RaspiBinaryTransferJoin, RaspiBinaryBlockAck, RaspiTransferTuner, \
+    FEATURE_WINDOWED_TRANSFER, pack_binary_block, unpack_binary_block, get_websocket_url, get_binary_data_slices
+from .codec import RaspiJsonCodec, get_codec
+
+try:
+    import concurrent.futures
+except ImportError:
+    pass
+__all__ = ['RaspiWsClient', 'RaspiBatch', 'RaspiConnectionPool',
+           'RaspiMuxChannel', 'RaspiMuxConnection', 'RaspberryManager']
+
+def create_connection(host, path, node, timeout, port=None):
+    """Create a connection to raspi-io server node
+
+    :param host: raspberry address such as "192.168.1.100"
+    :param path: node path, RaspiWsClient.PATH
+    :param node: node name such as "GPIO"/"I2C"
+    :param timeout: timeout in seconds
+    :param port: dynamic port, if not specified apply for one from DEFAULT_PORT first
+    :return: (websocket connection, dynamic port)
+    """
+    try:
+        if port is None:
+            # First using default port apply for a dynamic port
+            require_address = (host, DEFAULT_PORT)
+            ws = websocket.create_connection(get_websocket_url(require_address, path, node), timeout)
+            try:
+                port = RaspiAckMsg(**json.loads(ws.recv())).data
+            finally:
+                ws.close()
+
+        # Second using first step acquired port connect server
+        dynamic_address = (host, port)
+        return websocket.create_connection(get_websocket_url(dynamic_address, path, node), timeout), port
+    except socket.error as err:
+        raise RaspiSocketError(err)
+    except (ValueError, TypeError, RaspiMsgDecodeError, websocket.WebSocketException):
+        raise RaspiSocketError("Require dynamic port error")
+
+
+def parallel_map(func, items):
+    """Call func with each item in its own thread
+
+    :param func: callable
+    :param items: arguments
+    :return: results, same order as items
+    """
+    items = list(items)
+    try:
+        # Python3 using thread pool
+        with concurrent.futures.ThreadPoolExecutor(max_workers=len(items) or 1) as pool:
+            return list(pool.map(func, items))
+    except NameError:
+        # Python 2 using thread
+        result = [None] * len(items)
+
+        def run(i):
+            result[i] = func(items[i])
+
+        threads = [threading.Thread(target=run, args=(i,)) for i in range(len(items))]
+        [th.start() for th in threads]
+        [th.join() for th in threads]
+        return result
+
+
+class RaspiConnectionPool(object):
+    # Max idle connections kept for each node, connections released more than it will be closed
+    MAX_IDLE = 8
+
+    def __init__(self, host):
+        """Per host connection pool, cache dynamic port of each node and keep released idle connections
+
+        :param host: raspberry address such as "192.168.1.100"
+        """
+        self.__host = host
+        self.__idle = dict()
+        self.__ports = dict()
+        self.__lock = threading.Lock()
+
+    def __len__(self):
+        with self.__lock:
+            return sum(len(x) for x in self.__idle.values())
+
+    def acquire(self, path, node, timeout):
+        """Get an idle connection, or create a new one using cached dynamic port
+
+        :param path: node path, RaspiWsClient.PATH
+        :param node: node name
+        :param timeout: timeout in seconds
+        :return: websocket connection
+        """
+        key = (path, node)
+        with self.__lock:
+            port = self.__ports.get(key)
+            idle = self.__idle.get(key)
+            ws = idle.pop() if idle else None
+
+        if ws is not None:
+            ws.settimeout(timeout)
+            return ws
+
+        if port is not None:
+            try:
+                ws, _ = create_connection(self.__host, path, node, timeout, port)
+                return ws
+            except RaspiSocketError:
+                # Server restarted, dynamic port may changed
+                with self.__lock:
+                    self.__ports.pop(key, None)
+
+        ws, port = create_connection(self.__host, path, node, timeout)
+        with self.__lock:
+            self.__ports[key] = port
+
+        return ws
+
+    def release(self, path, node, ws):
+        """Put a connection back to pool
+
+        :param path: node path, RaspiWsClient.PATH
+        :param node: node name
+        :param ws: websocket connection
+        :return:
+        """
+        if ws is None or not ws.connected:
+            return
+
+        with self.__lock:
+            idle = self.__idle.setdefault((path, node), list())
+            if len(idle) < self.MAX_IDLE:
+                idle.append(ws)
+                return
+
+        ws.close()
+
+    def warm_up(self, targets, timeout=1):
+        """Create connections in parallel and put them into pool
+
+        :param targets: (path, node) list, a connection will be created for each one
+        :param timeout: timeout in seconds
+        :return: created connection count
+        """
+        def connect(target):
+            try:
+                self.release(target[0], target[1], self.acquire(target[0], target[1], timeout))
+                return True
+            except RaspiSocketError:
+                return False
+
+        return sum(parallel_map(connect, targets))
+
+    def close(self):
+        with self.__lock:
+            idle, self.__idle = self.__idle, dict()
+
+        for connections in idle.values():
+            for ws in connections:
+                ws.close()
+
+
+class RaspiMuxChannel(object):
+    def __init__(self, mux, channel, timeout):
+        """A lightweight channel on RaspiMuxConnection, same interface as websocket connection RaspiWsClient using
+
+        :param mux: RaspiMuxConnection
+        :param channel: channel id
+        :param timeout: timeout in seconds
+        """
+        self.__mux = mux
+        self.__channel = channel
+        self.__timeout = timeout
+        self.connected = True
+
+    @property
+    def channel(self):
+        return self.__channel
+
+    def settimeout(self, timeout):
+        self.__timeout = timeout
+
+    def send(self, data):
+        self.__mux.send(self.__channel, websocket.ABNF.OPCODE_TEXT, data)
+
+    def send_binary(self, data):
+        self.__mux.send(self.__channel, websocket.ABNF.OPCODE_BINARY, data)
+
+    def recv_data(self):
+        return self.__mux.recv(self.__channel, self.__timeout)
+
+    def recv(self):
+        opcode, data = self.recv_data()
+        if opcode == websocket.ABNF.OPCODE_TEXT and sys.version_info.major >= 3:
+            return data.decode("utf-8")
+
+        return bytes(data)
+
+    def close(self):
+        if self.connected:
+            self.connected = False
+            self.__mux.close_channel(self.__channel)
+
+
+class RaspiMuxConnection(object):
+    PATH = 'mux'
+    CONTROL_CHANNEL = 0
+    MAX_CHANNEL = 0xffff
+
+    def __init__(self, host, timeout=1):
+        """One connection per host carries tagged traffic of many nodes
+
+        Each frame on the connection is a binary frame: MUX_FRAME_HEADER(channel, opcode) + channel frame data,
+        channel is opened and closed by RaspiMuxOpen/RaspiMuxClose on CONTROL_CHANNEL.
+        Same interface as RaspiConnectionPool, RaspberryManager using it acquire connection for RaspiWsClient
+
+        :param host: raspberry address such as "192.168.1.100"
+        :param timeout: timeout in seconds
+        """
+        self._ws, _ = create_connection(host, self.PATH, self.PATH, timeout)
+        self.__queues = dict()
+        self.__free_ids = list()
+        self.__channel_id = itertools.count(self.CONTROL_CHANNEL + 1)
+        self.__send_lock = threading.Lock()
+        self.__control_lock = threading.Lock()
+        # Only one thread receive from connection at a time, others wait frame dispatched to their queue
+        self.__reading = False
+        self.__recv_cond = threading.Condition()
+        self.__queues[self.CONTROL_CHANNEL] = collections.deque()
+        self.__control = RaspiMuxChannel(self, self.CONTROL_CHANNEL, timeout)
+
+    def __len__(self):
+        return len(self.__queues) - 1
+
+    def __control_transfer(self, msg):
+        with self.__control_lock:
+            self.__control.send(msg.dumps())
+            return RaspiAckMsg(**json.loads(self.__control.recv()))
+
+    def send(self, channel, opcode, data):
+        if not isinstance(data, (bytes, bytearray)):
+            data = data.encode("utf-8")
+
+        frame = bytearray(MUX_FRAME_HEADER.pack(channel, opcode))
+        frame += data
+        with self.__send_lock:
+            self._ws.send_binary(frame)
+
+    def recv(self, channel, timeout):
+        """Receive a frame of specified channel, frames of other channels will be dispatched to their queue
+
+        The thread which finds connection idle receives one frame and dispatches it, then wakes all waiters,
+        waiters do not hold any lock while a frame is receiving, each of them waits its own timeout
+
+        :param channel: channel id
+        :param timeout: timeout in seconds, None means blocking
+        :return: (opcode, data)
+        """
+        queue = self.__queues[channel]
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            with self.__recv_cond:
+                while not queue and self.__reading:
+                    remaining = None if deadline is None else deadline - time.time()
+                    if remaining is not None and remaining <= 0:
+                        break
+                    self.__recv_cond.wait(remaining)
+
+                if queue:
+                    return queue.popleft()
+
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    raise websocket.WebSocketTimeoutException("channel {} receive timeout".format(channel))
+
+                self.__reading = True
+
+            try:
+                self.__recv_frame(remaining)
+            finally:
+                with self.__recv_cond:
+                    self.__reading = False
+                    self.__recv_cond.notify_all()
+
+    def __recv_frame(self, timeout):
+        self._ws.settimeout(timeout)
+        _, frame = self._ws.recv_data()
+        try:
+            target, opcode = MUX_FRAME_HEADER.unpack_from(frame)
+        except struct.error:
+            raise RaspiMsgDecodeError("Decode multiplexed frame error")
+
+        # Frames of closed channel will be dropped
+        with self.__recv_cond:
+            queue = self.__queues.get(target)
+            if queue is not None:
+                queue.append((opcode, frame[MUX_FRAME_HEADER.size:]))
+
+    def acquire(self, path, node, timeout):
+        """Open a channel to specified node
+
+        :param path: node path, RaspiWsClient.PATH
+        :param node: node name
+        :param timeout: timeout in seconds
+        :return: RaspiMuxChannel
+        """
+        with self.__recv_cond:
+            channel = self.__free_ids.pop() if self.__free_ids else next(self.__channel_id)
+            if channel > self.MAX_CHANNEL:
+                raise RaspiSocketError("Open channel error: no free channel id")
+
+            self.__queues[channel] = collections.deque()
+
+        try:
+            ack = self.__control_transfer(RaspiMuxOpen(channel=channel, path=path, node=node))
+        except (ValueError, TypeError, RaspiMsgDecodeError, websocket.WebSocketException) as err:
+            # Server may open it later, do not reuse this id
+            with self.__recv_cond:
+                self.__queues.pop(channel, None)
+            raise RaspiSocketError("Open channel error: {}".format(err))
+
+        if not ack.ack:
+            self.__release_channel(channel)
+            raise RaspiSocketError("Open channel error: {}".format(ack.data))
+
+        return RaspiMuxChannel(self, channel, timeout)
+
+    def release(self, path, node, ws):
+        ws.close()
+
+    def __release_channel(self, channel):
+        with self.__recv_cond:
+            self.__queues.pop(channel, None)
+            self.__free_ids.append(channel)
+
+    def close_channel(self, channel):
+        with self.__recv_cond:
+            if self.__queues.pop(channel, None) is None:
+                return
+
+        try:
+            ack = self.__control_transfer(RaspiMuxClose(channel=channel))
+        except (ValueError, TypeError, RaspiMsgDecodeError, websocket.WebSocketException):
+            return
+
+        # Frames sent before close ack are already dropped, channel id is safe to reuse
+        if ack.ack:
+            self.__release_channel(channel)
+
+    def close(self):
+        self._ws.close()
+
+
+class RaspiBatch(object):
+    def __init__(self, client):
+        """Queue client requests and flush them together when exit context
+
+        Inside the context device methods return value is meaningless,
+        get each operation result from acks/results after exit
+
+        :param client: RaspiWsClient instance
+        """
+        self.acks = list()
+        self.__msgs = list()
+        self.__binary = list()
+        self.__client = client
+
+    def __len__(self):
+        return len(self.__msgs)
+
+    def __enter__(self):
+        self.__client._begin_batch(self)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.__client._end_batch(self)
+        if exc_type is None:
+            self.acks = self.__client._flush_batch(self.__msgs)
+            self.__binary = [msg._binary_ack for msg in self.__msgs]
+        self.__msgs = list()
+
+    @property
+    def results(self):
+        """Each operation ack data, binary payload decoded same as outside batch, failed operation is None"""
+        return [(self.__client._decode_payload(ack.data) if binary else ack.data)
+                if isinstance(ack, RaspiAckMsg) and ack.ack else None for ack, binary in zip(self.acks, self.__binary)]
+
+    def add(self, msg):
+        if not isinstance(msg, RaspiBaseMsg):
+            raise TypeError("request {!r} not {!r}".format(RaspiBaseMsg.__name__, msg.__class__.__name__))
+
+        self.__msgs.append(msg)
 
 
 class RaspiWsClient(object):
     PATH = ""
     RECEIVE_BINARY_FILE_HANDLE = 'receive_binary_file'
+    # Resumable transfer reconnect/resend times
+    TRANSFER_RETRIES = 3
+    # Striped transfer out of order blocks cached per stripe, faster stripes wait when cache is full
+    STRIPE_PENDING_BLOCKS = 4
 
-    def __init__(self, host, node, timeout=1, verbose=1):
+    def __init__(self, host, node, timeout=1, verbose=1, pool=None):
         """RaspiWsClient
 
         :param host: raspberry address such as "192.168.1.100"
         :param node: node name such as "GPIO"/"I2C"
         :param timeout: timeout in seconds
         :param verbose: verbose message level
+        :param pool: RaspiConnectionPool or RaspiMuxConnection acquire connection from, None create a dedicated one
+        """
+        self.__error = ""
+        self.__host = host
+        self.__node = node
+        self.__released = False
+        self.__timeout = timeout
+        self.__open_request = None
+        self.__verbose = verbose
+        self.__batch = None
+        self.__features = set()
+        self.__codec = RaspiJsonCodec()
+        self.__stripes = 1
+        self.__progress = None
+        self.__tuner = RaspiTransferTuner()
+        self.__pipeline_depth = 1
+        self.__request_id = itertools.count(1)
+        self.__reader = None
+        self.__futures = dict()
+        self.__async_lock = threading.Lock()
+        self.__pool = pool
+        if self.__pool is not None:
+            self._ws = self.__pool.acquire(self.PATH, node, timeout)
+        else:
+            self._ws, _ = create_connection(host, self.PATH, node, timeout)
+
+    def close(self):
+        """Release device on server side (cleanup gpio, close spi/serial etc), device classes override it
+
+        :return:
+        """
+        pass
+
+    def release(self):
+        """Release device on server side only once, RaspberryManager.release and device __del__ call it
+
+        :return:
+        """
+        if not self.__released:
+            self.__released = True
+            self.close()
+
+    def _detach(self):
+        """Detach connection from client and put it back to pool, client is not usable after detached
+
+        :return: success return True
         """
+        if self.__pool is None or self._ws is None:
+            return False
+
+        self._wait_async()
+        ws, self._ws = self._ws, None
+        self.__pool.release(self.PATH, self.__node, ws)
+        return True
+
+    @contextlib.contextmanager
+    def _extend_timeout(self, seconds):
+        """Temporarily extend connection timeout, for requests server take a long time to ack
+
+        :param seconds: extra seconds
+        :return:
+        """
+        self._ws.settimeout(self.__timeout + seconds)
         try:
-            self.__error = ""
-            self.__verbose = verbose
-            # First using default port apply for a dynamic port
-            require_address = (host, DEFAULT_PORT)
-            ws = websocket.create_connection(get_websocket_url(require_address, self.PATH, node), timeout)
-            ack = json.loads(ws.recv())
+            yield
+        finally:
+            if self._ws is not None:
+                self._ws.settimeout(self.__timeout)
+
+    def _open_device(self, request):
+        """Open device on server side, request is sent again after reconnect to restore device state
+
+        :param request: device open request, such as SPIDevice
+        :return: None or RaspiAckMsg
+        """
+        self.__open_request = request
+        return self._transfer(request)
 
-            # Second using first step acquired port connect server
-            dynamic_address = (host, RaspiAckMsg(**ack).data)
-            self._ws = websocket.create_connection(get_websocket_url(dynamic_address, self.PATH, node), timeout)
-        except socket.error as err:
-            raise RaspiSocketError(err)
-        except (ValueError, TypeError):
-            raise RaspiSocketError("Require dynamic port error")
+    def _reconnect(self):
+        """Drop current connection and connect to server node again, device is opened again on new connection
+
+        :return:
+        """
+        ws, self._ws = self._ws, None
+        try:
+            ws.close()
+        except (AttributeError, socket.error, websocket.WebSocketException):
+            pass
+
+        if self.__pool is not None:
+            self._ws = self.__pool.acquire(self.PATH, self.__node, self.__timeout)
+        else:
+            self._ws, _ = create_connection(self.__host, self.PATH, self.__node, self.__timeout)
+
+        if self.__open_request is not None:
+            ack = self._transfer(self.__open_request)
+            if not isinstance(ack, RaspiAckMsg) or not ack.ack:
+                raise RaspiSocketError("Reopen device error: {}".format(ack.data if ack else self.get_error()))
 
     def _error(self, msg):
         self.__error = msg
@@ -104,12 +587,303 @@ class RaspiWsClient(object):
         self.__error = ""
         return error
 
+    @property
+    def features(self):
+        return self.__features.copy()
+
+    def set_features(self, features):
+        """Set protocol features negotiated with server, see Query.get_features()
+
+        :param features: features both client and server supported
+        :return:
+        """
+        self.__features = set(features)
+        self.__codec = get_codec(self.__features)
+
+    @property
+    def codec(self):
+        return self.__codec
+
+    @property
+    def pipeline_depth(self):
+        return self.__pipeline_depth
+
+    def enable_pipeline(self, depth):
+        """Enable pipelined transfer, keep up to depth requests in flight and match acks by request id
+
+        Server must support FEATURE_PIPELINE, using Query.get_features() check it first.
+        Only transfer_many (and batch fallback) keep requests in flight, device methods still wait their own ack,
+        but they are tagged with request id too, late ack of a timed out request will be dropped.
+        Using *_async methods to pipeline device operations
+
+        :param depth: max requests in flight, 1 means lock-step transfer
+        :return:
+        """
+        if not isinstance(depth, int) or depth < 1:
+            raise ValueError("pipeline depth must be a positive integer")
+
+        self.__pipeline_depth = depth
+
+    @property
+    def tuner(self):
+        return self.__tuner
+
+    def set_progress_callback(self, callback):
+        """Set bulk transfer progress callback
+
+        :param callback: callback(transferred, total), None disable it
+        :return:
+        """
+        if callback is not None and not callable(callback):
+            raise TypeError("callback must be callable")
+
+        self.__progress = callback
+
+    def _report_progress(self, transferred, total):
+        if self.__progress is not None:
+            self.__progress(min(transferred, total), total)
+
+    @property
+    def stripes(self):
+        return self.__stripes
+
+    def enable_striping(self, stripes):
+        """Enable striped bulk transfer, split blocks across stripes parallel connections
+
+        Server must support FEATURE_STRIPED_TRANSFER and FEATURE_RESUMABLE_TRANSFER, using Query.get_features() check it
+
+        :param stripes: parallel connections per transfer, 1 means transfer over client connection only
+        :return:
+        """
+        if not isinstance(stripes, int) or stripes < 1:
+            raise ValueError("stripes must be a positive integer")
+
+        self.__stripes = stripes
+
+    def _open_connection(self, timeout=None):
+        """Open an extra dedicated connection to client node
+
+        :param timeout: timeout in seconds, default same as client
+        :return: websocket connection
+        """
+        ws, _ = create_connection(self.__host, self.PATH, self.__node, self.__timeout if timeout is None else timeout)
+        return ws
+
+    def _acquire_stripe(self):
+        if isinstance(self.__pool, RaspiConnectionPool):
+            return self.__pool.acquire(self.PATH, self.__node, self.__timeout)
+
+        # Multiplexed channels share one socket, stripes need their own connections
+        return self._open_connection()
+
+    def _release_stripe(self, ws, reuse):
+        if reuse and isinstance(self.__pool, RaspiConnectionPool):
+            self.__pool.release(self.PATH, self.__node, ws)
+        else:
+            ws.close()
+
+    def _recv_pipeline_ack(self, pending):
+        """Receive an ack belongs to pending requests
+
+        Ack of an abandoned request (such as timeout) will be dropped
+
+        :param pending: pending request id set
+        :return: RaspiAckMsg
+        """
+        while True:
+            ack = self._recv_ack()
+            if ack.request_id is None:
+                raise RuntimeError("receive ack error, no request id returned")
+
+            if ack.request_id in pending:
+                return ack
+
+    def _raw_payload(self):
+        """Request binary payload can be sent as raw bytes or not
+
+        :return: binary codec negotiated and not in batch return True
+        """
+        return self.__codec.BINARY and self.__batch is None
+
+    def _encode_payload(self, data):
+        """Encode request binary payload, binary codec keep raw bytes, otherwise encode as base64
+
+        :param data: payload data
+        :return: payload for request message
+        """
+        if self._raw_payload():
+            return bytearray(data)
+
+        return self.encode_binary(data)
+
+    def _decode_payload(self, data):
+        """Decode ack binary payload
+
+        :param data: ack data
+        :return: python2 str, python3 bytes
+        """
+        return bytes(data) if isinstance(data, bytearray) else self.decode_binary(data)
+
+    def _send_request(self, msg, **extra):
+        """Send a request, encoded by negotiated codec
+
+        :param msg: request message
+        :param extra: extra fields, such as request id
+        :return:
+        """
+        if not self.__codec.BINARY:
+            self._ws.send(msg.dumps(**extra))
+            self._output("Send:{}".format(msg))
+            return
+
+        dict_ = dict(msg.dict, **extra)
+        self._ws.send_binary(self.__codec.encode(dict_))
+        self._output("Send:{}".format(dict_))
+
+    def _recv_ack(self):
+        """Receive an ack, binary frame decoded by negotiated codec, text frame is always json
+
+        :return: RaspiAckMsg
+        """
+        if not self.__codec.BINARY:
+            data = self._ws.recv()
+            if not data:
+                raise RuntimeError("receive ack error, no data returned")
+
+            ack = RaspiAckMsg(**json.loads(data))
+            self._output("Recv:{}".format(data))
+            return ack
+
+        opcode, data = self._ws.recv_data()
+        if not data:
+            raise RuntimeError("receive ack error, no data returned")
+
+        if opcode == websocket.ABNF.OPCODE_BINARY:
+            dict_ = self.__codec.decode(data)
+        else:
+            dict_ = json.loads(data.decode('utf-8'))
+
+        ack = RaspiAckMsg(**dict_)
+        self._output("Recv:{}".format(dict_))
+        return ack
+
+    def transfer_many(self, msgs):
+        """Transfer multiple messages, when pipeline enabled keep pipeline_depth requests in flight
+
+        :param msgs: request messages
+        :return: RaspiAckMsg or None list, same order as msgs
+        """
+        msgs = list(msgs)
+        if self.__reader is not None:
+            # Async reader thread owns connection receiving
+            return [future.result() for future in [self._transfer_async(msg) for msg in msgs]]
+
+        if self.__pipeline_depth <= 1:
+            return [self._transfer(msg) for msg in msgs]
+
+        acks = dict()
+        pending = dict()
+        try:
+
+            self.__error = ""
+
+            for msg in msgs:
+                if not isinstance(msg, RaspiBaseMsg):
+                    raise TypeError("request {!r} not {!r}".format(RaspiBaseMsg.__name__, msg.__class__.__name__))
+
+            sent = 0
+            while len(acks) < len(msgs):
+                # Fill the pipeline
+                while sent < len(msgs) and len(pending) < self.__pipeline_depth:
+                    rid = next(self.__request_id)
+                    self._send_request(msgs[sent], rid=rid)
+                    pending[rid] = sent
+                    sent += 1
+
+                # Wait any ack
+                ack = self._recv_pipeline_ack(pending)
+                acks[pending.pop(ack.request_id)] = ack
+                if not ack.ack:
+                    self._error("{}".format(ack.data))
+        except (RuntimeError, TypeError, ValueError) as err:
+            self._error("{}".format(err))
+        except RaspiMsgDecodeError as err:
+            self._error("{}".format(err))
+        except websocket.WebSocketException as err:
+            self._error("{}".format(err))
+
+        return [acks.get(i) for i in range(len(msgs))]
+
+    def batch(self):
+        """Queue requests inside with statement, flush them together in one frame when exit
+
+            with gpio.batch() as batch:
+                gpio.output(20, 1)
+                gpio.output(21, 0)
+
+            print(batch.results)
+
+        :return: RaspiBatch context manager
+        """
+        return RaspiBatch(self)
+
+    def _begin_batch(self, batch):
+        if self.__batch is not None:
+            raise RaspiException("nested batch is not supported")
+
+        self.__batch = batch
+
+    def _end_batch(self, batch):
+        if self.__batch is batch:
+            self.__batch = None
+
+    def _flush_batch(self, msgs):
+        """Send queued requests, server do not support batch will fallback to transfer_many
+
+        :param msgs: queued requests
+        :return: RaspiAckMsg or None list, same order as msgs
+        """
+        if not msgs:
+            return list()
+
+        if FEATURE_BATCH not in self.__features:
+            return self.transfer_many(msgs)
+
+        batch = RaspiBatchMsg(msgs=msgs)
+        ack = self._transfer(batch)
+        if not isinstance(ack, RaspiAckMsg) or not ack.ack:
+            return [None] * len(msgs)
+
+        try:
+            acks = batch.get_acks(ack)
+        except (TypeError, RaspiMsgDecodeError) as err:
+            self._error("{}".format(err))
+            return [None] * len(msgs)
+
+        for ack in acks:
+            if not ack.ack:
+                self._error("{}".format(ack.data))
+
+        return acks
+
     def _transfer(self, msg):
         """Basic transfer, send a msg and get an ack
 
         :param msg: request message
         :return: None or RaspiAckMsg
         """
+        if self.__batch is not None:
+            self.__batch.add(msg)
+            return None
+
+        if self.__reader is not None:
+            # Async reader thread owns connection receiving
+            return self._transfer_async(msg).result()
+
+        if self.__pipeline_depth > 1:
+            # Tagged with request id, late ack of previous timed out request will be dropped
+            return self.transfer_many([msg])[0]
+
         try:
 
             self.__error = ""
@@ -118,17 +892,10 @@ class RaspiWsClient(object):
                 raise TypeError("request {!r} not {!r}".format(RaspiBaseMsg.__name__, msg.__class__.__name__))
 
             # Send msg
-            self._ws.send(msg.dumps())
-            self._output("Send:{}".format(msg))
+            self._send_request(msg)
 
             # Wait ack
-            data = self._ws.recv()
-            if not data:
-                raise RuntimeError("receive ack error, no data returned")
-
-            dict_ = json.loads(data)
-            ack = RaspiAckMsg(**dict_)
-            self._output("Recv:{}".format(data))
+            ack = self._recv_ack()
 
             # Check ack message
             if not ack.ack:
@@ -144,28 +911,138 @@ class RaspiWsClient(object):
             self._error("{}".format(err))
             return None
 
-    def _recv_binary_data(self, request):
+    def _transfer_async(self, msg, result=None):
+        """Send a request without waiting its ack, a reader thread receive acks and resolve returned future
+
+        Acks are matched by request id, reader thread exit when no request is pending, sync requests are resolved
+        by it while it is running. Server do not support FEATURE_PIPELINE acks can only be matched in request order,
+        a late ack of a timed out request would resolve the next one, so request is transferred synchronously
+        and returned future is already done
+
+        :param msg: request message
+        :param result: result(ack) convert ack (None if failed) to future result, default result is ack
+        :return: concurrent.futures.Future
+        """
+        if self.__batch is not None:
+            raise RaspiException("async transfer inside batch is not supported")
+
+        if not isinstance(msg, RaspiBaseMsg):
+            raise TypeError("request {!r} not {!r}".format(RaspiBaseMsg.__name__, msg.__class__.__name__))
+
+        try:
+            future = concurrent.futures.Future()
+        except NameError:
+            raise RaspiException("async transfer requires concurrent.futures, Python 2 need install futures")
+
+        if FEATURE_PIPELINE not in self.__features:
+            self.__resolve_future(future, result, self._transfer(msg))
+            return future
+
+        with self.__async_lock:
+            rid = next(self.__request_id)
+            try:
+                self._send_request(msg, rid=rid)
+            except (TypeError, ValueError, socket.error, websocket.WebSocketException) as err:
+                self._error("{}".format(err))
+                self.__resolve_future(future, result, None)
+                return future
+
+            self.__futures[rid] = (future, result)
+            if self.__reader is None:
+                self.__reader = threading.Thread(target=self.__receive_acks, name="RaspiWsClientReader")
+                self.__reader.daemon = True
+                self.__reader.start()
+
+        return future
+
+    def _wait_async(self):
+        """Wait until all async requests are resolved and reader thread exit"""
+        reader = self.__reader
+        if reader is not None and reader is not threading.current_thread():
+            reader.join()
+
+    @staticmethod
+    def __resolve_future(future, result, ack):
+        if not future.set_running_or_notify_cancel():
+            return
+
+        try:
+            future.set_result(result(ack) if result is not None else ack)
+        except Exception as err:
+            future.set_exception(err)
+
+    def __receive_acks(self):
+        while True:
+            with self.__async_lock:
+                if not self.__futures:
+                    self.__reader = None
+                    return
+
+            try:
+                ack = self._recv_ack()
+                if ack.request_id is None:
+                    raise RuntimeError("receive ack error, no request id returned")
+            except (RuntimeError, ValueError, RaspiMsgDecodeError, socket.error, websocket.WebSocketException) as err:
+                # Timeout or connection broken, all pending requests failed, their late acks will be dropped
+                self._error("{}".format(err))
+                with self.__async_lock:
+                    pending = list(self.__futures.values())
+                    self.__futures.clear()
+
+                for future, result in pending:
+                    self.__resolve_future(future, result, None)
+                continue
+
+            with self.__async_lock:
+                # Ack of an abandoned request will be dropped
+                pending = self.__futures.pop(ack.request_id, None)
+
+            if pending is None:
+                continue
+
+            if not ack.ack:
+                self._error("{}".format(ack.data))
+
+            self.__resolve_future(pending[0], pending[1], ack)
+
+    def _recv_binary_data(self, request, sink=None):
         """Receive binary data
 
         1. send read request to server
         2. recv binary data header
-        3. recv binary data piece by piece
-        4. check size and md5
-        5. wait ack
+        3. recv binary data piece by piece, write to preallocated buffer or sink and update md5
+        4. wait ack
+        5. check size and md5
+
+        When server support resumable transfer, each block carry its index and crc32,
+        corrupt or missing blocks are resent, broken connection will reconnect and resume
 
         :param request: read request
-        :return: binary data
+        :param sink: None or data sink: file object, mmap or callable, each received block will write to it
+        :return: binary data(sink is None) or received data size
         """
+        self._wait_async()
         try:
 
             self._error("")
-            recv_data = bytearray()
 
             if not isinstance(request, RaspiBaseMsg):
                 raise TypeError("request {!r} not {!r}".format(RaspiBaseMsg.__name__, request.__class__.__name__))
 
             # First send read request
-            self._ws.send(request.dumps())
+            extra = dict()
+            if FEATURE_RESUMABLE_TRANSFER in self.__features:
+                extra['transfer'] = uuid.uuid4().hex
+                if self.__stripes > 1 and FEATURE_STRIPED_TRANSFER in self.__features:
+                    extra['stripes'] = self.__stripes
+
+                # Server may use a smaller block size, header tell which block size it used
+                if FEATURE_WINDOWED_TRANSFER in self.__features:
+                    extra['block_size'] = self.__tuner.block
+                    if not extra.get('stripes'):
+                        extra['window'] = self.__tuner.window(extra['block_size'])
+
+            self._ws.send(request.dumps(**extra))
             self._output("Send:{}".format(request))
 
             # Second receive binary data header
@@ -177,35 +1054,28 @@ class RaspiWsClient(object):
             header = RaspiBinaryDataHeader(**dict_)
             self._output("Recv:{}".format(data))
 
-            # Third recv binary data
-            for i in range(header.slices):
-                temp = self._ws.recv()
-                recv_data += temp
-
-            # Check data length and md5sum
-            if len(recv_data) != header.size:
-                raise ValueError("data size do not matched")
+            # Third recv binary data and wait ack
+            recv_data = RaspiBinarySink(header.size, sink)
+            if extra.get('stripes'):
+                ack = self._recv_binary_stripes(extra['transfer'], header, recv_data, extra['stripes'])
+            elif extra:
+                ack = self._recv_binary_blocks(extra['transfer'], header, recv_data, window='window' in extra)
+            else:
+                for i in range(header.slices):
+                    recv_data.write(self._ws.recv())
 
-            # Check data md5 checksum
-            if hashlib.md5(recv_data).hexdigest() != header.md5:
-                raise ValueError("data md5 checksum do not matched")
+                ack = self._recv_binary_ack()
 
-            # Finally wait ack
-            data = self._ws.recv()
-            if not data:
-                raise RuntimeError("receive ack error, no data returned")
-
-            dict_ = json.loads(data)
-            ack = RaspiAckMsg(**dict_)
-            self._output("Recv:{}".format(data))
+            # Check data length and md5sum
+            recv_data.verify(header.md5)
 
             # Check ack message
             if not ack.ack:
                 self._error("{}".format(ack.data))
 
             # Return received data
-            return recv_data
-        except (ValueError, RuntimeError, TypeError) as err:
+            return recv_data.result
+        except (ValueError, RuntimeError, TypeError, RaspiSocketError) as err:
             self._error("{}".format(err))
             return None
         except RaspiMsgDecodeError as err:
@@ -215,6 +1085,131 @@ class RaspiWsClient(object):
             self._error("{}".format(err))
             return None
 
+    def _recv_binary_ack(self):
+        data = self._ws.recv()
+        if not data:
+            # Websocket return empty data when connection closed
+            raise websocket.WebSocketConnectionClosedException("receive ack error, no data returned")
+
+        ack = RaspiAckMsg(**json.loads(data))
+        self._output("Recv:{}".format(data))
+        return ack
+
+    def _recv_binary_blocks(self, transfer, header, recv_data, resume=False, window=False):
+        """Receive resumable transfer blocks, resend from first corrupt block, resume after reconnect
+
+        :param transfer: transfer id
+        :param header: binary data header
+        :param recv_data: RaspiBinarySink
+        :param resume: resume transfer from recv_data.blocks first
+        :param window: windowed transfer, ack each block then server send next one
+        :return: RaspiAckMsg
+        """
+        self.__tuner.start()
+        for retry in range(self.TRANSFER_RETRIES + 1):
+            try:
+                if resume:
+                    self._ws.send(RaspiBinaryTransferResume(transfer=transfer, block=recv_data.blocks).dumps())
+                    self._output("Resume:{} from block {}".format(transfer, recv_data.blocks))
+
+                # Blocks after a corrupt one are dropped, sink only accept data in order
+                corrupt = False
+                for _ in range(recv_data.blocks, header.slices):
+                    frame = self._ws.recv()
+                    if not frame:
+                        raise websocket.WebSocketConnectionClosedException("connection closed while receiving blocks")
+
+                    index, data, matched = unpack_binary_block(frame)
+                    if not corrupt and matched and index == recv_data.blocks:
+                        recv_data.write(data)
+                        # Frames arrive back to back, only throughput is measured, rtt comes from block acks
+                        self.__tuner.sample(len(frame))
+                        self._report_progress(recv_data.received, header.size)
+                    else:
+                        corrupt = True
+
+                    if window:
+                        self._ws.send(RaspiBinaryBlockAck(block=index, ack=not corrupt).dumps())
+
+                ack = self._recv_binary_ack()
+                if recv_data.blocks == header.slices or not ack.ack:
+                    return ack
+            except (socket.error, websocket.WebSocketException) as err:
+                if retry == self.TRANSFER_RETRIES:
+                    raise
+                self._output("Transfer {} interrupted: {}, reconnecting".format(transfer, err))
+                self._reconnect()
+
+            resume = True
+
+        raise RuntimeError("transfer {} failed, block {} still corrupt after retry".format(transfer, recv_data.blocks))
+
+    def _recv_binary_stripes(self, transfer, header, recv_data, stripes):
+        """Receive striped transfer, block i go through connection i % stripes, connection 0 is client connection
+
+        Out of order blocks are cached by recv_data until blocks before them arrived, no more than
+        STRIPE_PENDING_BLOCKS per stripe, faster stripes wait slower ones. After a stripe failed or a block is corrupt
+        blocks beyond the cache are dropped, they and blocks lost by failed stripe are resumed through client connection
+
+        :param transfer: transfer id
+        :param header: binary data header
+        :param recv_data: RaspiBinarySink
+        :param stripes: stripe count
+        :return: RaspiAckMsg
+        """
+        gap = list()
+        window = self.STRIPE_PENDING_BLOCKS * stripes
+        condition = threading.Condition()
+
+        def resume_required():
+            # Missing blocks can only be resumed, stop waiting them
+            with condition:
+                gap.append(True)
+                condition.notify_all()
+
+        def receive(stripe):
+            ws, ack = self._ws if stripe == 0 else None, None
+            try:
+                if ws is None:
+                    ws = self._acquire_stripe()
+                    ws.send(RaspiBinaryTransferJoin(transfer=transfer, stripe=stripe).dumps())
+
+                for _ in range(stripe, header.slices, stripes):
+                    frame = ws.recv()
+                    if not frame:
+                        raise websocket.WebSocketConnectionClosedException("connection closed while receiving blocks")
+
+                    index, data, matched = unpack_binary_block(frame)
+                    if not matched:
+                        resume_required()
+                        continue
+
+                    with condition:
+                        while index >= recv_data.blocks + window and not gap:
+                            condition.wait(self.__timeout)
+
+                        if index < recv_data.blocks + window:
+                            recv_data.put(index, data)
+                            condition.notify_all()
+
+                ack = RaspiAckMsg(**json.loads(ws.recv()))
+                return ack
+            except (ValueError, RaspiException, socket.error, websocket.WebSocketException) as err:
+                self._output("Transfer {} stripe {} error: {}".format(transfer, stripe, err))
+                resume_required()
+                return None
+            finally:
+                # Connection of a failed stripe may have unread frames, never put it back to pool
+                if stripe and ws is not None:
+                    self._release_stripe(ws, ack is not None and ws.connected)
+
+        ack = parallel_map(receive, range(stripes))[0]
+        if ack is not None and (recv_data.blocks == header.slices or not ack.ack):
+            return ack
+
+        recv_data.discard()
+        return self._recv_binary_blocks(transfer, header, recv_data, resume=True)
+
     def _send_binary_data(self, header, data):
         """Send binary data to server and get name
 
@@ -226,6 +1221,7 @@ class RaspiWsClient(object):
         :param data: binary data
         return RaspiAckMsg
         """
+        self._wait_async()
         try:
 
             self._error("")
@@ -237,7 +1233,12 @@ class RaspiWsClient(object):
             self._ws.send(header.dumps())
             self._output("Send:{}".format(header))
 
-            # Second send binary data using binary mode
+            # Second send binary data using binary mode, slice a memoryview do not copy data
+            try:
+                data = memoryview(data)
+            except TypeError:
+                data = memoryview(bytearray(data))
+
             for i in range(header.slices):
                 self._ws.send_binary(data[i * DATA_TRANSFER_BLOCK_SIZE: (i + 1) * DATA_TRANSFER_BLOCK_SIZE])
 
@@ -262,8 +1263,233 @@ class RaspiWsClient(object):
             self._error("{}".format(err))
             return None
 
+    def _send_binary_stream(self, stream, fmt="bin", handle=""):
+        """Send binary data to server block by block, memory usage is bounded to one block
+
+        1. send binary data header to server
+        2. send binary data block by block and calculate md5 incrementally
+        3. send md5 in trailer (server support stream upload, otherwise calculate md5 before send header)
+        4. wait ack
+
+        When server support resumable transfer, each block carry its index and crc32,
+        server ack which block to continue from when blocks are corrupt, broken connection will reconnect and resume
+
+        :param stream: RaspiBinaryStream
+        :param fmt: data format
+        :param handle: which function process this data
+        :return: RaspiAckMsg
+        """
+        self._wait_async()
+        try:
+
+            self._error("")
+
+            if not isinstance(stream, RaspiBinaryStream):
+                raise TypeError("req {!r} not {!r}".format(RaspiBinaryStream.__name__, stream.__class__.__name__))
+
+            trailer = FEATURE_STREAM_UPLOAD in self.__features
+            if not trailer:
+                for _ in stream.blocks():
+                    pass
+
+            # First send binary data header, windowed transfer block size is picked from measured rtt and throughput
+            extra = dict()
+            windowed = {FEATURE_RESUMABLE_TRANSFER, FEATURE_WINDOWED_TRANSFER} <= self.__features
+            if windowed:
+                extra['block_size'] = self.__tuner.block
+
+            slices = get_binary_data_slices(stream.size, extra.get('block_size', DATA_TRANSFER_BLOCK_SIZE))
+            header = RaspiBinaryDataHeader(size=stream.size, md5="" if trailer else stream.md5, slices=slices,
+                                           format=fmt, handle=handle, trailer=trailer, **extra)
+            if FEATURE_RESUMABLE_TRANSFER in self.__features:
+                if self.__stripes > 1 and FEATURE_STRIPED_TRANSFER in self.__features and \
+                        stream.random_access and header.slices > 1:
+                    return self._send_binary_stripes(uuid.uuid4().hex, header, stream)
+
+                return self._send_binary_blocks(uuid.uuid4().hex, header, stream, window=windowed)
+
+            self._ws.send(header.dumps())
+            self._output("Send:{}".format(header))
+
+            # Second send binary data using binary mode
+            if not stream.size:
+                self._ws.send_binary(bytes())
+
+            for block in stream.blocks():
+                self._ws.send_binary(block)
+
+            # Third send md5 trailer
+            if trailer:
+                self._ws.send(RaspiBinaryDataTrailer(md5=stream.md5).dumps())
+
+            # Wait ack
+            return self._recv_binary_ack()
+        except (TypeError, ValueError, RuntimeError, EOFError, IOError, RaspiSocketError) as err:
+            self._error("{}".format(err))
+            return None
+        except RaspiMsgDecodeError as err:
+            self._error("{}".format(err))
+            return None
+        except websocket.WebSocketException as err:
+            self._error("{}".format(err))
+            return None
+
+    def _send_binary_blocks(self, transfer, header, stream, started=False, window=False):
+        """Send resumable transfer blocks, resend from the block server required, resume after reconnect
+
+        :param transfer: transfer id
+        :param header: binary data header
+        :param stream: RaspiBinaryStream
+        :param started: header already sent, resume transfer first
+        :param window: windowed transfer, server ack each block, keep blocks in flight no more than tuner window
+        :return: RaspiAckMsg
+        """
+        start, resume = 0, started
+        block_size = header.dict.get('block_size', DATA_TRANSFER_BLOCK_SIZE)
+        for retry in range(self.TRANSFER_RETRIES + 1):
+            try:
+                if resume:
+                    self._ws.send(RaspiBinaryTransferResume(transfer=transfer).dumps())
+                    ack = self._recv_binary_ack()
+                    if not ack.ack:
+                        return ack
+                    start = ack.data
+                elif not started:
+                    if window:
+                        self._ws.send(header.dumps(transfer=transfer, window=self.__tuner.window(block_size)))
+                    else:
+                        self._ws.send(header.dumps(transfer=transfer))
+                    self._output("Send:{}".format(header))
+                    started = True
+
+                # Empty data still need one block
+                inflight = collections.deque()
+                self.__tuner.start()
+                blocks = stream.blocks(block_size, start) if stream.size or start else iter([bytes()])
+                for index, data in enumerate(blocks, start):
+                    if window:
+                        while len(inflight) >= self.__tuner.window(block_size):
+                            self._recv_block_ack(inflight, block_size, header.size)
+                        inflight.append((index, len(data), time.time()))
+                    else:
+                        self._report_progress(index * block_size + len(data), header.size)
+
+                    self._ws.send_binary(pack_binary_block(index, data))
+
+                while inflight:
+                    self._recv_block_ack(inflight, block_size, header.size)
+
+                if header.trailer:
+                    self._ws.send(RaspiBinaryDataTrailer(md5=stream.md5).dumps())
+
+                # Server ack False with the block to continue from when it received corrupt blocks, resend from it
+                ack = self._recv_binary_ack()
+                if ack.ack or not isinstance(ack.data, dict) or 'block' not in ack.data:
+                    return ack
+
+                start, resume = ack.data['block'], False
+            except (socket.error, websocket.WebSocketException) as err:
+                if retry == self.TRANSFER_RETRIES:
+                    raise
+                self._output("Transfer {} interrupted: {}, reconnecting".format(transfer, err))
+                self._reconnect()
+                resume = started
+
+        raise RuntimeError("transfer {} failed, blocks still corrupt after retry".format(transfer))
+
+    def _recv_block_ack(self, inflight, block_size, total):
+        """Receive a windowed transfer block ack, remove acked block from inflight and update tuner
+
+        Nacked (corrupt) block is not sampled or reported as progress, server ack which block to continue from
+        after all blocks sent, then it is resent by resume
+
+        :param inflight: (block index, block size, sent time) deque
+        :param block_size: transfer block size
+        :param total: transfer data size
+        :return: RaspiBinaryBlockAck
+        """
+        data = self._ws.recv()
+        if not data:
+            raise websocket.WebSocketConnectionClosedException("receive block ack error, no data returned")
+
+        ack = RaspiBinaryBlockAck(**json.loads(data))
+        while inflight:
+            index, size, sent = inflight.popleft()
+            if index == ack.block:
+                if ack.ack:
+                    self.__tuner.sample(size, time.time() - sent)
+                    self._report_progress(index * block_size + size, total)
+                return ack
+
+        raise RuntimeError("unexpected block ack: {}".format(ack.block))
+
+    def _send_binary_stripes(self, transfer, header, stream):
+        """Send striped transfer, block i go through connection i % stripes, connection 0 is client connection
+
+        After all stripes finished, resume transfer through client connection,
+        server ack which block is missing (stripe failed or block corrupt), then send rest blocks and trailer
+
+        :param transfer: transfer id
+        :param header: binary data header
+        :param stream: RaspiBinaryStream, must be random accessible
+        :return: RaspiAckMsg
+        """
+        stripes = self.__stripes
+        block_size = header.dict.get('block_size', DATA_TRANSFER_BLOCK_SIZE)
+        self._ws.send(header.dumps(transfer=transfer, stripes=stripes))
+        self._output("Send:{}".format(header))
+
+        def send(stripe):
+            ws, ack = self._ws if stripe == 0 else None, None
+            try:
+                if ws is None:
+                    ws = self._acquire_stripe()
+                    ws.send(RaspiBinaryTransferJoin(transfer=transfer, stripe=stripe).dumps())
+
+                for index in range(stripe, header.slices, stripes):
+                    ws.send_binary(pack_binary_block(index, stream.get_block(index, block_size)))
+
+                ack = RaspiAckMsg(**json.loads(ws.recv()))
+                return ack
+            except (ValueError, RaspiException, socket.error, websocket.WebSocketException) as err:
+                self._output("Transfer {} stripe {} error: {}".format(transfer, stripe, err))
+                return None
+            finally:
+                # Connection of a failed stripe may have unread frames, never put it back to pool
+                if stripe and ws is not None:
+                    self._release_stripe(ws, ack is not None and ws.connected)
+
+        parallel_map(send, range(stripes))
+        return self._send_binary_blocks(transfer, header, stream, started=True)
+
     def send_binary_data(self, header, data):
         ack = self._send_binary_data(header, data)
+        if not isinstance(ack, RaspiAckMsg):
+            return False
+
+        if not ack.ack:
+            self._error("{}".format(ack.data))
+
+        return ack.ack
+
+    def send_binary_stream(self, source, fmt="bin", handle=""):
+        """Send binary data from file path, file object or buffer without loading it into memory
+
+        :param source: RaspiBinaryStream, file path, file object or buffer
+        :param fmt: data format
+        :param handle: which function process this data
+        :return: success return True
+        """
+        stream = source if isinstance(source, RaspiBinaryStream) else RaspiBinaryStream(source)
+        try:
+            ack = self._send_binary_stream(stream, fmt, handle)
+        finally:
+            if stream is not source:
+                stream.close()
+
+        if not isinstance(ack, RaspiAckMsg):
+            return False
+
         if not ack.ack:
             self._error("{}".format(ack.data))
 
@@ -271,14 +1497,18 @@ class RaspiWsClient(object):
 
     def send_binary_file(self, filepath):
         try:
-            with open(filepath, 'rb') as fp:
-                data = fp.read()
+            stream = RaspiBinaryStream(u"{}".format(filepath))
         except IOError as e:
             raise RaspiException("Read file error: {}".format(e))
 
         # First get file header
         fmt = os.path.splitext(filepath)[-1][1:]
-        result = self._send_binary_data(get_binary_data_header(data, fmt, handle=self.RECEIVE_BINARY_FILE_HANDLE), data)
+        with stream:
+            result = self._send_binary_stream(stream, fmt, handle=self.RECEIVE_BINARY_FILE_HANDLE)
+
+        if not isinstance(result, RaspiAckMsg):
+            raise RaspiException("Send file error: {}".format(self.get_error()))
+
         if not result.ack:
             raise RaspiException("Send file error: {}".format(result.data))
 
@@ -287,15 +1517,94 @@ class RaspiWsClient(object):
 
 
 class RaspberryManager(object):
-    def __init__(self, host):
+    def __init__(self, host, pipeline_depth=1, multiplex=False, stripes=1):
         """Raspberry io manager
 
         :param host: raspberry pi host
+        :param pipeline_depth: if server support pipeline, created instance will keep such many requests in flight
+        :param multiplex: if server support multiplex, created instances share one connection
+        :param stripes: if server support striped transfer, created instance split bulk transfer across such many
+                        connections
         """
         self.__host = host
+        self.__mux = None
+        self.__features = None
+        self.__stripes = stripes
+        self.__multiplex = multiplex
+        self.__pipeline_depth = pipeline_depth
+        self.__pool = RaspiConnectionPool(host)
+
+    @property
+    def pool(self):
+        return self.__pool
+
+    def warm_up(self, *targets, **kwargs):
+        """Create connections in parallel before create instances
+
+            manager.warm_up(GPIO, Query, (I2C, "/dev/i2c-1"), (SPI, "/dev/spidev0.0"))
+
+        :param targets: RaspiWsClient subclass (node same as PATH, such as GPIO) or (cls, node) tuple
+        :param kwargs: timeout
+        :return: created connection count
+        """
+        nodes = list()
+        for target in targets:
+            cls, node = target if isinstance(target, (list, tuple)) else (target, target.PATH)
+            if not issubclass(cls, RaspiWsClient):
+                raise TypeError("cls need a {!r}, not {!r}".format(RaspiWsClient.__name__, cls.__name__))
+            nodes.append((cls.PATH, node))
+
+        return self.__pool.warm_up(nodes, kwargs.get('timeout', 1))
+
+    def release(self, client):
+        """Release device and put its connection back to pool, client is not usable after released
+
+        :param client: RaspiWsClient instance created by this manager
+        :return: success return True
+        """
+        if not isinstance(client, RaspiWsClient):
+            raise TypeError("client need a {!r}, not {!r}".format(RaspiWsClient.__name__, client.__class__.__name__))
+
+        # Release device on server side (cleanup gpio, close spi/serial etc)
+        client.release()
+        return client._detach()
+
+    def close(self):
+        self.__pool.close()
+        if self.__mux is not None:
+            self.__mux.close()
+            self.__mux = None
+
+    def get_features(self):
+        """Get features negotiated with server, only negotiate once
+
+        :return: features both client and server supported
+        """
+        if self.__features is None:
+            from .query import Query
+            query = Query(self.__host, verbose=0, pool=self.__pool)
+            self.__features = query.get_features()
+            query._detach()
+
+        return self.__features
+
+    def __create(self, cls, *args, **kwargs):
+        if self.__multiplex and self.__mux is None and FEATURE_MULTIPLEX in self.get_features():
+            self.__mux = RaspiMuxConnection(self.__host, kwargs.get('timeout', 1))
+
+        kwargs['pool'] = self.__mux if self.__mux is not None else self.__pool
+        return cls(self.__host, *args, **kwargs)
 
     def create(self, cls, *args, **kwargs):
         if not issubclass(cls, RaspiWsClient):
             raise TypeError("cls need a {!r}, not {!r}".format(RaspiWsClient.__class__, cls.__class__))
 
-        return cls(self.__host, *args, **kwargs)
+        client = self.__create(cls, *args, **kwargs)
+        client.set_features(self.get_features())
+        if self.__pipeline_depth > 1 and FEATURE_PIPELINE in self.get_features():
+            client.enable_pipeline(self.__pipeline_depth)
+
+        if self.__stripes > 1 and {FEATURE_STRIPED_TRANSFER, FEATURE_RESUMABLE_TRANSFER} <= self.get_features():
+            client.enable_striping(self.__stripes)
+
+        return client
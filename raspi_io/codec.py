@@ -0,0 +1,276 @@
+# -*- coding: utf-8 -*-
+import json
+import struct
+from .core import RaspiMsgDecodeError, FEATURE_BINARY_FRAME, FEATURE_COMPACT_CODEC, \
+    pack_binary_frame, unpack_binary_frame
+__all__ = ['RaspiCodec', 'RaspiJsonCodec', 'RaspiBinaryFrameCodec', 'RaspiCompactCodec', 'get_codec']
+
+try:
+    text_type = unicode
+    string_types = (str, unicode)
+    integer_types = (int, long)
+    binary_types = (bytearray,)
+except NameError:
+    text_type = str
+    string_types = (str,)
+    integer_types = (int,)
+    binary_types = (bytes, bytearray, memoryview)
+
+
+class RaspiCodec(object):
+    # Negotiated feature name
+    NAME = ''
+    # Encoded data send as websocket binary frame or not
+    BINARY = False
+
+    def encode(self, dict_):
+        """Encode a message dict
+
+        :param dict_: message dict, such as RaspiBaseMsg.dict
+        :return: encoded frame data
+        """
+        raise NotImplementedError
+
+    def decode(self, data):
+        """Decode a received frame
+
+        :param data: frame data
+        :return: message dict
+        """
+        raise NotImplementedError
+
+
+class RaspiJsonCodec(RaspiCodec):
+    def encode(self, dict_):
+        return json.dumps(dict_)
+
+    def decode(self, data):
+        try:
+            return json.loads(data)
+        except (ValueError, TypeError) as e:
+            raise RaspiMsgDecodeError("Decode json error:{}".format(e))
+
+
+class RaspiBinaryFrameCodec(RaspiCodec):
+    NAME = FEATURE_BINARY_FRAME
+    BINARY = True
+
+    def encode(self, dict_):
+        dict_ = dict_.copy()
+        binary = [key for key, value in dict_.items() if isinstance(value, bytearray)]
+        if len(binary) > 1:
+            raise TypeError("message has more than one binary payload: {}".format(binary))
+
+        payload = dict_.pop(binary[0]) if binary else bytearray()
+        dict_['binary'] = binary[0] if binary else ""
+        return pack_binary_frame(json.dumps(dict_), payload)
+
+    def decode(self, data):
+        dict_, payload = unpack_binary_frame(data)
+        if dict_.get('binary'):
+            dict_[dict_['binary']] = payload
+
+        return dict_
+
+
+class RaspiCompactCodec(RaspiCodec):
+    """Compact binary codec, field-id tags, varints and raw bytes payloads
+
+    frame: MAGIC + map
+    map: varint count + (key + value) * count
+    key: varint, known field (FIELDS index << 1), unknown field ((name length << 1) | 1) followed by utf-8 name
+    value: type tag(1 byte) + value data
+    """
+    NAME = FEATURE_COMPACT_CODEC
+    BINARY = True
+    MAGIC = 0xc0
+
+    # Type tags
+    NONE, FALSE, TRUE, INT, FLOAT, TEXT, BYTES, LIST, MAP, SYMBOL = range(10)
+
+    # Known field names and symbols(handle) shared with server, append only, DO NOT change the order
+    FIELDS = (
+        'handle', 'ack', 'data', 'rid', 'binary', 'channel', 'value', 'addr', 'size', 'type',
+        'uuid', 'duty', 'write_data', 'read_size', 'speed', 'delay', 'msgs', 'direction', 'pull_up_down', 'initial',
+        'mode', 'edge', 'callback', 'where', 'baudrate', 'md5', 'slices', 'format', 'status', 'device',
+        'path', 'node', 'query', 'params', 'filter', 'option', 'server', 'client', 'features', 'version',
+        'bus', 'flags', 'tenbit', 'iaddr_bytes', 'page_bytes', 'max_speed', 'cshigh', 'no_cs', 'loop', 'lsbfirst',
+        'threewire', 'port', 'bytesize', 'parity', 'stopbits', 'timeout', 'cs', 'clk', 'mosi', 'miso',
+        'bits_per_word', 'frequency', 'page_size', 'chip_size', 'instruction', 'cpol', 'cpha', 'read_id', 'read_sr',
+        'write_sr', 'read_sr1', 'read_sr2', 'chip_erase', 'page_read', 'page_write', 'write_enable', 'write_disable',
+        'display_num', 'property', 'power', 'preferred', 'group', 'app_name', 'app_desc', 'exe_name', 'autostart',
+        'boot_args', 'log_file', 'conf_file', 'package', 'auth', 'host', 'username', 'password', 'repo_name', 'newest',
+        'release', 'release_date', 'state', 'ssid', 'psk', 'key_mgmt', 'priority', 'scan_ssid', 'id_str',
+        'trailer', 'transfer', 'block', 'stripes', 'stripe', 'block_size', 'window', 'timestamp', 'mask',
+        'steps', 'repeat', 'wait', 'rate', 'samples', 'bins',
+        'bouncetime', 'glitch', 'coalesce', 'edges', 'segments',
+    )
+    SYMBOLS = (
+        '', 'input', 'output', 'setup', 'setmode', 'cleanup', 'read', 'write', 'xfer', 'xfer2',
+        'open', 'close', 'init', 'flush', 'set_baudrate', 'batch', 'mux_open', 'mux_close', 'event', 'pwm_init',
+        'pwm_ctrl', 'spi_init', 'spi_xfer', 'spi_read', 'spi_write', 'probe', 'erase', 'read_chip', 'write_chip',
+        'read_status', 'write_status', 'query_version', 'query_hardware', 'query_device', 'reboot',
+        'receive_binary_file', 'get_property', 'get_status', 'get_modes', 'power_ctrl', 'set_explicit',
+        'install_app', 'uninstall_app', 'fetch_update', 'online_update', 'local_update', 'get_app_state',
+        'get_app_list', 'get_networks', 'join_network', 'leave_network', 'backup_configure',
+        'transfer_resume', 'transfer_join', 'block_ack', 'remove_event', 'event_subscribe', 'event_notify',
+        'input_many', 'output_many', 'output_mask', 'waveform', 'capture', 'measure',
+        'event_batch', 'pwm_group_ctrl', 'pwm_profile', 'spi_transfer', 'transfer',
+        'stream_start', 'stream_stop',
+    )
+
+    FLOAT_STRUCT = struct.Struct('>d')
+
+    def __init__(self):
+        self.__field_ids = dict((name, i) for i, name in enumerate(self.FIELDS))
+        self.__symbol_ids = dict((name, i) for i, name in enumerate(self.SYMBOLS))
+
+    @staticmethod
+    def _encode_varint(out, value):
+        while value > 0x7f:
+            out.append((value & 0x7f) | 0x80)
+            value >>= 7
+        out.append(value)
+
+    @staticmethod
+    def _decode_varint(data, pos):
+        shift = result = 0
+        while True:
+            byte = data[pos]
+            pos += 1
+            result |= (byte & 0x7f) << shift
+            if not byte & 0x80:
+                return result, pos
+            shift += 7
+
+    def _encode_value(self, out, value):
+        if value is None:
+            out.append(self.NONE)
+        elif value is True:
+            out.append(self.TRUE)
+        elif value is False:
+            out.append(self.FALSE)
+        elif isinstance(value, integer_types):
+            out.append(self.INT)
+            self._encode_varint(out, value << 1 if value >= 0 else ((-value) << 1) - 1)
+        elif isinstance(value, float):
+            out.append(self.FLOAT)
+            out += self.FLOAT_STRUCT.pack(value)
+        elif isinstance(value, binary_types):
+            out.append(self.BYTES)
+            self._encode_varint(out, len(value))
+            out += value
+        elif isinstance(value, string_types):
+            if value in self.__symbol_ids:
+                out.append(self.SYMBOL)
+                self._encode_varint(out, self.__symbol_ids[value])
+            else:
+                value = value.encode("utf-8") if isinstance(value, text_type) else value
+                out.append(self.TEXT)
+                self._encode_varint(out, len(value))
+                out += value
+        elif isinstance(value, (list, tuple, set)):
+            out.append(self.LIST)
+            self._encode_varint(out, len(value))
+            for item in value:
+                self._encode_value(out, item)
+        elif isinstance(value, dict):
+            out.append(self.MAP)
+            self._encode_map(out, value)
+        else:
+            raise TypeError("{!r} is not compact codec serializable".format(value))
+
+    def _encode_map(self, out, dict_):
+        self._encode_varint(out, len(dict_))
+        for key, value in dict_.items():
+            field_id = self.__field_ids.get(key)
+            if field_id is not None:
+                self._encode_varint(out, field_id << 1)
+            else:
+                key = key.encode("utf-8") if isinstance(key, text_type) else key
+                self._encode_varint(out, (len(key) << 1) | 1)
+                out += key
+
+            self._encode_value(out, value)
+
+    def _decode_value(self, data, pos):
+        tag = data[pos]
+        pos += 1
+        if tag == self.NONE:
+            return None, pos
+        elif tag == self.TRUE:
+            return True, pos
+        elif tag == self.FALSE:
+            return False, pos
+        elif tag == self.INT:
+            value, pos = self._decode_varint(data, pos)
+            return (value >> 1) if not value & 1 else -((value + 1) >> 1), pos
+        elif tag == self.FLOAT:
+            return self.FLOAT_STRUCT.unpack_from(data, pos)[0], pos + self.FLOAT_STRUCT.size
+        elif tag == self.BYTES:
+            size, pos = self._decode_varint(data, pos)
+            return data[pos:pos + size], pos + size
+        elif tag == self.TEXT:
+            size, pos = self._decode_varint(data, pos)
+            return bytes(data[pos:pos + size]).decode("utf-8"), pos + size
+        elif tag == self.SYMBOL:
+            symbol, pos = self._decode_varint(data, pos)
+            return self.SYMBOLS[symbol], pos
+        elif tag == self.LIST:
+            count, pos = self._decode_varint(data, pos)
+            value = list()
+            for _ in range(count):
+                item, pos = self._decode_value(data, pos)
+                value.append(item)
+            return value, pos
+        elif tag == self.MAP:
+            return self._decode_map(data, pos)
+
+        raise ValueError("unknown type tag: {}".format(tag))
+
+    def _decode_map(self, data, pos):
+        dict_ = dict()
+        count, pos = self._decode_varint(data, pos)
+        for _ in range(count):
+            key, pos = self._decode_varint(data, pos)
+            if key & 1:
+                size = key >> 1
+                key, pos = bytes(data[pos:pos + size]).decode("utf-8"), pos + size
+            else:
+                key = self.FIELDS[key >> 1]
+
+            dict_[key], pos = self._decode_value(data, pos)
+
+        return dict_, pos
+
+    def encode(self, dict_):
+        out = bytearray([self.MAGIC])
+        self._encode_map(out, dict_)
+        return out
+
+    def decode(self, data):
+        data = bytearray(data)
+        try:
+            if not data or data[0] != self.MAGIC:
+                raise ValueError("invalid magic")
+
+            dict_, pos = self._decode_map(data, 1)
+            if pos != len(data):
+                raise ValueError("trailing data")
+
+            return dict_
+        except (IndexError, ValueError, struct.error, UnicodeDecodeError) as e:
+            raise RaspiMsgDecodeError("Decode compact codec error:{}".format(e))
+
+
+def get_codec(features):
+    """Select best codec from negotiated features
+
+    :param features: features both client and server supported
+    :return: RaspiCodec instance
+    """
+    for codec in (RaspiCompactCodec, RaspiBinaryFrameCodec):
+        if codec.NAME in features:
+            return codec()
+
+    return RaspiJsonCodec()
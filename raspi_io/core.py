@@ -1,13 +1,48 @@
 # -*- coding: utf-8 -*-
+import os
+import io
 import json
+import time
+import mmap
+import zlib
+import struct
 import hashlib
-__all__ = ['get_websocket_url', 'get_binary_data_header',
-           'RaspiBaseMsg', 'RaspiAckMsg', 'RaspiBinaryDataHeader',
+__all__ = ['get_websocket_url', 'get_binary_data_header', 'get_binary_data_slices',
+           'pack_binary_frame', 'unpack_binary_frame', 'pack_binary_block', 'unpack_binary_block',
+           'RaspiBinaryStream', 'RaspiBinarySink', 'RaspiTransferTuner', 'RaspiBinaryBlockAck',
+           'RaspiBaseMsg', 'RaspiAckMsg', 'RaspiBatchMsg', 'RaspiMuxOpen', 'RaspiMuxClose',
+           'RaspiBinaryDataHeader', 'RaspiBinaryDataTrailer', 'RaspiBinaryTransferResume', 'RaspiBinaryTransferJoin',
            'RaspiException', 'RaspiMsgDecodeError', 'RaspiSocketError',
-           'DEFAULT_PORT', 'DATA_TRANSFER_BLOCK_SIZE']
+           'DEFAULT_PORT', 'DATA_TRANSFER_BLOCK_SIZE', 'CLIENT_FEATURES', 'MUX_FRAME_HEADER', 'BINARY_BLOCK_HEADER',
+           'FEATURE_PIPELINE', 'FEATURE_BATCH', 'FEATURE_BINARY_FRAME', 'FEATURE_MULTIPLEX', 'FEATURE_COMPACT_CODEC',
+           'FEATURE_STREAM_UPLOAD', 'FEATURE_RESUMABLE_TRANSFER', 'FEATURE_STRIPED_TRANSFER',
+           'FEATURE_WINDOWED_TRANSFER']
 DEFAULT_PORT = 9876
 DATA_TRANSFER_BLOCK_SIZE = 512 * 1024
 
+# Optional protocol features, negotiated through QueryVersion
+FEATURE_PIPELINE = 'pipeline'
+FEATURE_BATCH = 'batch'
+FEATURE_BINARY_FRAME = 'binary_frame'
+FEATURE_MULTIPLEX = 'multiplex'
+FEATURE_COMPACT_CODEC = 'compact_codec'
+FEATURE_STREAM_UPLOAD = 'stream_upload'
+FEATURE_RESUMABLE_TRANSFER = 'resumable_transfer'
+FEATURE_STRIPED_TRANSFER = 'striped_transfer'
+FEATURE_WINDOWED_TRANSFER = 'windowed_transfer'
+CLIENT_FEATURES = (FEATURE_PIPELINE, FEATURE_BATCH, FEATURE_BINARY_FRAME, FEATURE_MULTIPLEX, FEATURE_COMPACT_CODEC,
+                   FEATURE_STREAM_UPLOAD, FEATURE_RESUMABLE_TRANSFER, FEATURE_STRIPED_TRANSFER,
+                   FEATURE_WINDOWED_TRANSFER)
+
+# Binary frame: header length(4 bytes, big endian) + json header + raw payload
+BINARY_FRAME_HEADER = struct.Struct('>I')
+
+# Multiplexed frame: channel id(2 bytes, big endian) + websocket opcode(1 byte) + channel frame data
+MUX_FRAME_HEADER = struct.Struct('>HB')
+
+# Resumable transfer block: block index(4 bytes, big endian) + block crc32(4 bytes, big endian) + block data
+BINARY_BLOCK_HEADER = struct.Struct('>II')
+
 
 def get_websocket_url(address, path, node):
     return "ws://{0:s}:{1:d}/{2:s}?{3:s}".format(address[0], address[1], path, node)
@@ -22,17 +57,377 @@ def get_binary_data_header(data, fmt="bin", handle=""):
     :return: data size, data md5, data block slices
     """
     size = len(data)
-    block = DATA_TRANSFER_BLOCK_SIZE
     md5 = hashlib.md5(data).hexdigest()
+    return RaspiBinaryDataHeader(size=size, md5=md5, slices=get_binary_data_slices(size), format=fmt, handle=handle)
+
+
+def get_binary_data_slices(size, block=DATA_TRANSFER_BLOCK_SIZE):
+    """Get how many blocks binary data will be split into, empty data still need one block
+
+    :param size: binary data size
+    :param block: block size
+    :return: slices
+    """
+    return max(1, (size + block - 1) // block)
+
+
+def pack_binary_frame(header, payload=bytearray()):
+    """Pack json header and raw payload to a binary frame
+
+    :param header: json encoded message, payload field removed and field name placed in 'binary'
+    :param payload: raw payload
+    :return: binary frame
+    """
+    header = header.encode("utf-8")
+    frame = bytearray(BINARY_FRAME_HEADER.pack(len(header)))
+    frame += header
+    frame += payload
+    return frame
+
+
+def unpack_binary_frame(frame):
+    """Unpack binary frame to header dict and raw payload
+
+    :param frame: binary frame
+    :return: header dict, payload(bytearray)
+    """
+    try:
+        size = BINARY_FRAME_HEADER.unpack_from(frame)[0]
+        start = BINARY_FRAME_HEADER.size
+        header = json.loads(bytes(frame[start:start + size]).decode("utf-8"))
+        return header, bytearray(frame[start + size:])
+    except (struct.error, ValueError, TypeError) as e:
+        raise RaspiMsgDecodeError("Decode binary frame error:{}".format(e))
+
+
+def pack_binary_block(index, block):
+    """Pack a resumable transfer block, prefix block index and crc32
 
-    if size <= block:
-        slices = 1
-    elif size % block == 0:
-        slices = size // block
-    else:
-        slices = size // block + 1
+    :param index: block index
+    :param block: block data
+    :return: block frame
+    """
+    frame = bytearray(BINARY_BLOCK_HEADER.pack(index, zlib.crc32(block) & 0xffffffff))
+    frame += block
+    return frame
+
+
+def unpack_binary_block(frame):
+    """Unpack a resumable transfer block and check its crc32
+
+    :param frame: block frame
+    :return: block index, block data(memoryview), crc32 matched
+    """
+    try:
+        index, crc32 = BINARY_BLOCK_HEADER.unpack_from(frame)
+    except (struct.error, TypeError) as e:
+        raise RaspiMsgDecodeError("Decode binary block error:{}".format(e))
+
+    block = memoryview(frame)[BINARY_BLOCK_HEADER.size:]
+    return index, block, zlib.crc32(block) & 0xffffffff == crc32
+
+
+class RaspiBinaryStream(object):
+    def __init__(self, source):
+        """Memory bounded binary data source, blocks are memoryview of source, mmap of file or a reused buffer
+
+        :param source: file path(unicode), file object (read from current position) or buffer (bytes/bytearray etc)
+        """
+        self.__fp = None
+        self.__mmap = None
+        self.__buffer = None
+        self.__offset = 0
+        self.__close = False
+        self.__digest = hashlib.md5()
+
+        if isinstance(source, RaspiBinaryStream):
+            raise TypeError("source is already a {!r}".format(RaspiBinaryStream.__name__))
+
+        if isinstance(source, type(u"")):
+            self.__fp = open(source, 'rb')
+            self.__close = True
+        elif hasattr(source, 'read'):
+            self.__fp = source
+        else:
+            try:
+                self.__buffer = memoryview(source)
+            except TypeError:
+                self.__buffer = memoryview(bytearray(source))
+
+        if self.__fp is not None:
+            self.__offset = self.__fp.tell()
+            try:
+                self.__mmap = mmap.mmap(self.__fp.fileno(), 0, access=mmap.ACCESS_READ)
+                self.__buffer = memoryview(self.__mmap)[self.__offset:]
+            except (AttributeError, ValueError, TypeError, EnvironmentError, io.UnsupportedOperation):
+                # Empty file, not a real file or python2 mmap do not support memoryview
+                self.__mmap = None
+
+        self.size = len(self.__buffer) if self.__buffer is not None else self.__get_file_size()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __get_file_size(self):
+        try:
+            return os.fstat(self.__fp.fileno()).st_size - self.__offset
+        except (AttributeError, EnvironmentError, io.UnsupportedOperation):
+            self.__fp.seek(0, os.SEEK_END)
+            size = self.__fp.tell() - self.__offset
+            self.__fp.seek(self.__offset)
+            return size
+
+    @property
+    def md5(self):
+        """Digest of data already read by blocks()"""
+        return self.__digest.hexdigest()
+
+    @property
+    def random_access(self):
+        """Source is a buffer or mmap of file, blocks can be read in any order from any thread"""
+        return self.__buffer is not None
+
+    def get_block(self, index, block=DATA_TRANSFER_BLOCK_SIZE):
+        """Get a block by index, only random access stream support it, digest is not updated
+
+        :param index: block index
+        :param block: block size
+        :return: memoryview
+        """
+        if self.__buffer is None:
+            raise TypeError("stream is not random accessible")
+
+        return self.__buffer[index * block:(index + 1) * block]
+
+    def blocks(self, block=DATA_TRANSFER_BLOCK_SIZE, start=0):
+        """Iterate data block by block from beginning and update digest incrementally
+
+        Block yielded from file object is a view of a reused buffer, it is only valid until next block
+
+        :param block: block size
+        :param start: first block to yield, blocks before it are only hashed (resume a transfer)
+        :return: memoryview generator
+        """
+        self.__digest = hashlib.md5()
+
+        if self.__buffer is not None:
+            for offset in range(0, self.size, block):
+                view = self.__buffer[offset:offset + block]
+                self.__digest.update(view)
+                if offset >= start * block:
+                    yield view
+            return
+
+        self.__fp.seek(self.__offset)
+        buffer = bytearray(block)
+        view = memoryview(buffer)
+        remain = self.size
+        while remain > 0:
+            size = self.__fp.readinto(view[:min(block, remain)])
+            if not size:
+                raise EOFError("unexpected end of file, {} bytes remain".format(remain))
+
+            remain -= size
+            self.__digest.update(view[:size])
+            if self.size - remain > start * block:
+                yield view[:size]
+
+    def close(self):
+        self.__buffer = None
+        if self.__mmap is not None:
+            try:
+                self.__mmap.close()
+            except BufferError:
+                # Block still referenced, mmap will be closed when it collected
+                pass
+            self.__mmap = None
+
+        if self.__close:
+            self.__fp.close()
+            self.__close = False
+
+
+class RaspiBinarySink(object):
+    def __init__(self, size, sink=None):
+        """Receive binary data block by block, hash each block as it arrives
+
+        :param size: total data size
+        :param sink: None(preallocate a size bytes buffer), object with write method(file object, mmap) or callable
+        """
+        self.size = size
+        self.blocks = 0
+        self.__offset = 0
+        self.__pending = dict()
+        self.__digest = hashlib.md5()
+
+        if sink is None:
+            self.__buffer = bytearray(size)
+            self.__view = memoryview(self.__buffer)
+            self.__write = None
+        else:
+            self.__buffer = self.__view = None
+            self.__write = sink.write if hasattr(sink, 'write') else sink
+            if not callable(self.__write):
+                raise TypeError("sink {!r} is not writable or callable".format(sink.__class__.__name__))
+
+    @property
+    def md5(self):
+        """Digest of data already received"""
+        return self.__digest.hexdigest()
+
+    @property
+    def received(self):
+        """Received data size"""
+        return self.__offset
+
+    @property
+    def pending(self):
+        """Cached out of order blocks count"""
+        return len(self.__pending)
+
+    @property
+    def result(self):
+        """Received data if no sink specified, otherwise received data size"""
+        return self.__buffer if self.__buffer is not None else self.received
+
+    def write(self, block):
+        """Write a received block
+
+        :param block: received block
+        :return: written size
+        """
+        size = len(block)
+        if self.__offset + size > self.size:
+            raise ValueError("data size do not matched, receive more than {} bytes".format(self.size))
+
+        if self.__write is None:
+            self.__view[self.__offset:self.__offset + size] = block
+        else:
+            self.__write(block)
+
+        self.__digest.update(block)
+        self.__offset += size
+        self.blocks += 1
+        return size
+
+    def put(self, index, block):
+        """Put a block received out of order, it is cached until all blocks before it are written
+
+        :param index: block index
+        :param block: received block, must not be modified after put
+        :return: blocks written
+        """
+        if index >= self.blocks:
+            self.__pending[index] = block
+
+        while self.blocks in self.__pending:
+            self.write(self.__pending.pop(self.blocks))
+
+        return self.blocks
+
+    def discard(self):
+        """Discard cached out of order blocks
+
+        :return: discarded count
+        """
+        count = len(self.__pending)
+        self.__pending.clear()
+        return count
+
+    def verify(self, md5):
+        """Check data size and md5 checksum
+
+        :param md5: expected md5 checksum
+        :return:
+        """
+        if self.__offset != self.size:
+            raise ValueError("data size do not matched")
+
+        if self.md5 != md5:
+            raise ValueError("data md5 checksum do not matched")
+
+
+class RaspiTransferTuner(object):
+    # Block size range, block size is power of two
+    MIN_BLOCK = 16 * 1024
+    MAX_BLOCK = DATA_TRANSFER_BLOCK_SIZE
+    # Max blocks in flight
+    MAX_WINDOW = 16
+    # Expected seconds to transfer one block
+    BLOCK_TIME = 0.05
+    # Exponentially weighted moving average gain
+    GAIN = 0.25
+
+    def __init__(self, block=64 * 1024, window=4):
+        """Pick transfer block size and window from measured rtt and throughput
+
+        :param block: initial block size, start small do not pressure server memory
+        :param window: initial blocks in flight
+        """
+        self.rtt = None
+        self.throughput = None
+        self.__last = None
+        self.__block = block
+        self.__window = window
+
+    @property
+    def block(self):
+        """Block size for next transfer"""
+        if not self.throughput:
+            return self.__block
 
-    return RaspiBinaryDataHeader(size=size, md5=md5, slices=slices, format=fmt, handle=handle)
+        block = self.MIN_BLOCK
+        while block < self.MAX_BLOCK and block * 2 <= self.throughput * self.BLOCK_TIME:
+            block *= 2
+
+        return block
+
+    def window(self, block):
+        """Blocks in flight cover bandwidth delay product
+
+        :param block: block size of current transfer
+        :return: window size
+        """
+        if not self.throughput or self.rtt is None:
+            return self.__window
+
+        return max(1, min(self.MAX_WINDOW, int(self.throughput * self.rtt / block) + 1))
+
+    def start(self, now=None):
+        """A new transfer started, next sample interval count from now
+
+        :param now: transfer start time
+        :return:
+        """
+        self.__last = time.time() if now is None else now
+
+    def sample(self, size, latency=None, now=None):
+        """Update estimation with an acked or received block
+
+        :param size: block size
+        :param latency: seconds from block sent to ack received, None means only a throughput sample
+                        (such as a received block, interval between frames is not a round trip)
+        :param now: ack or receive time
+        :return:
+        """
+        now = time.time() if now is None else now
+        interval = now - self.__last if self.__last is not None else latency
+        self.__last = now
+        if interval is None:
+            return
+
+        throughput = size / max(interval, 1e-6)
+        self.throughput = throughput if self.throughput is None else \
+            self.throughput + (throughput - self.throughput) * self.GAIN
+
+        if latency is None:
+            return
+
+        # Queued blocks make latency larger than rtt, prefer smaller sample
+        self.rtt = latency if self.rtt is None else min(latency, self.rtt + (latency - self.rtt) * self.GAIN)
 
 
 class RaspiException(Exception):
@@ -47,28 +442,67 @@ class RaspiMsgDecodeError(RaspiException):
     pass
 
 
-class RaspiBaseMsg(object):
+# Encoder is created once, same output as json.dumps with default arguments
+json_encode = json.JSONEncoder().encode
+
+
+class RaspiMsgMeta(type):
+    # Exceptions raised by invalid message fields
+    DECODE_ERRORS = (TypeError, KeyError, ValueError, AttributeError)
+
+    def __new__(mcs, name, bases, namespace):
+        """Precompute message schema from _handle/_properties
+
+        Each property and handle stored in __slots__, extra fields (such as request id) stored in __dict__
+        """
+        properties = namespace.get('_properties')
+        if properties is None:
+            properties = next((getattr(base, '_properties') for base in bases if hasattr(base, '_properties')), set())
+
+        inherited = set()
+        for base in bases:
+            for cls in base.__mro__:
+                inherited.update(cls.__dict__.get('__slots__', ()))
+
+        fields = tuple(sorted(set(properties) | {'handle'}))
+        if '__slots__' not in namespace:
+            namespace['__slots__'] = tuple(field for field in fields if field not in inherited)
+
+        namespace['_fields'] = fields
+        namespace['_optional'] = tuple(sorted(inherited - set(fields) - {'__dict__'}))
+        namespace['_required'] = tuple(sorted(properties))
+        return super(RaspiMsgMeta, mcs).__new__(mcs, name, bases, namespace)
+
+
+class RaspiBaseMsg(RaspiMsgMeta('RaspiMsgBase', (object,), {'__slots__': ('__dict__',)})):
     _handle = ""
     _properties = set()
+    # Ack data is a binary payload (raw bytes or base64), such as read data
+    _binary_ack = False
 
     def __init__(self, **kwargs):
-        kwargs.setdefault('handle', self._handle)
         try:
-
-            for key in self._properties:
-                if kwargs.get(key) is None:
-                    raise KeyError("do not found key:{!r}".format(key))
-
-            self.__dict__.update(**kwargs)
-
-        except (TypeError, KeyError, ValueError, RaspiMsgDecodeError) as e:
+            self.handle = kwargs.pop('handle', self._handle)
+            for field in self._required:
+                value = kwargs.pop(field, None)
+                if value is None:
+                    raise KeyError("do not found key:{!r}".format(field))
+                setattr(self, field, value)
+
+            # Optional slots and extra fields
+            for key, value in kwargs.items():
+                setattr(self, key, value)
+        except RaspiMsgMeta.DECODE_ERRORS + (RaspiMsgDecodeError,) as e:
             raise RaspiMsgDecodeError("Decode {!r} error:{}".format(self.__class__.__name__, e))
 
     def __eq__(self, other):
         if not isinstance(other, self.__class__):
             return False
 
-        return self.__dict__ == other.__dict__
+        return self.dict == other.dict
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
 
     def __len__(self):
         return len(self._properties)
@@ -77,30 +511,43 @@ class RaspiBaseMsg(object):
         return self.dumps()
 
     def __iter__(self):
-        for key in sorted(self.__dict__.keys()):
+        for key in sorted(self.dict.keys()):
             yield key
 
-    def __getattr__(self, name):
-        try:
-            return self.__dict__[name]
-        except KeyError:
-            msg = "'{0}' object has no attribute '{1}'"
-            raise AttributeError(msg.format(type(self).__name__, name))
+    def _build(self):
+        dict_ = {field: getattr(self, field) for field in self._fields}
+        for field in self._optional:
+            if hasattr(self, field):
+                dict_[field] = getattr(self, field)
+
+        if self.__dict__:
+            dict_.update(self.__dict__)
+
+        return dict_
 
     @property
     def dict(self):
-        return self.__dict__.copy()
+        return self._build()
 
     @classmethod
     def properties(cls):
         return list(cls._properties)
 
-    def dumps(self):
+    @property
+    def request_id(self):
+        return self.__dict__.get('rid')
+
+    def dumps(self, **extra):
         """Encode data to a dict string
 
+        :param extra: extra fields append to encoded data (such as request id), will not modify message itself
         :return:
         """
-        return json.dumps(self.__dict__)
+        dict_ = self._build()
+        if extra:
+            dict_.update(extra)
+
+        return json_encode(dict_)
 
 
 class RaspiAckMsg(RaspiBaseMsg):
@@ -110,8 +557,83 @@ class RaspiAckMsg(RaspiBaseMsg):
         super(RaspiAckMsg, self).__init__(**kwargs)
 
 
+class RaspiBatchMsg(RaspiBaseMsg):
+    _handle = 'batch'
+    _properties = {'msgs'}
+
+    def __init__(self, **kwargs):
+        kwargs['msgs'] = [msg.dict if isinstance(msg, RaspiBaseMsg) else msg for msg in kwargs.get('msgs', [])]
+        super(RaspiBatchMsg, self).__init__(**kwargs)
+
+    def get_acks(self, ack):
+        """Split batch ack to each operation ack
+
+        :param ack: batch ack, data is a list of each operation ack dict
+        :return: RaspiAckMsg list, same order as msgs
+        """
+        if not isinstance(ack.data, list) or len(ack.data) != len(self.msgs):
+            raise RaspiMsgDecodeError("Decode {!r} error: ack count do not matched".format(self.__class__.__name__))
+
+        return [RaspiAckMsg(**dict_) for dict_ in ack.data]
+
+
 class RaspiBinaryDataHeader(RaspiBaseMsg):
     _properties = {'size', 'md5', 'slices', 'format'}
 
     def __init__(self, **kwargs):
         super(RaspiBinaryDataHeader, self).__init__(**kwargs)
+
+
+class RaspiBinaryTransferResume(RaspiBaseMsg):
+    """Resume an interrupted resumable transfer
+
+    Download: server resend blocks from 'block', then ack
+    Upload: server ack the block index client should continue from
+    """
+    _handle = 'transfer_resume'
+    _properties = {'transfer', 'block'}
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('block', 0)
+        super(RaspiBinaryTransferResume, self).__init__(**kwargs)
+
+
+class RaspiBinaryTransferJoin(RaspiBaseMsg):
+    """Join an extra connection to a striped transfer, blocks stripe, stripe + stripes ... go through it"""
+    _handle = 'transfer_join'
+    _properties = {'transfer', 'stripe'}
+
+    def __init__(self, **kwargs):
+        super(RaspiBinaryTransferJoin, self).__init__(**kwargs)
+
+
+class RaspiBinaryBlockAck(RaspiBaseMsg):
+    """Windowed transfer per block ack, receiver ack each block, ack is False when block is corrupt"""
+    _handle = 'block_ack'
+    _properties = {'block', 'ack'}
+
+    def __init__(self, **kwargs):
+        super(RaspiBinaryBlockAck, self).__init__(**kwargs)
+
+
+class RaspiBinaryDataTrailer(RaspiBaseMsg):
+    _properties = {'md5'}
+
+    def __init__(self, **kwargs):
+        super(RaspiBinaryDataTrailer, self).__init__(**kwargs)
+
+
+class RaspiMuxOpen(RaspiBaseMsg):
+    _handle = 'mux_open'
+    _properties = {'channel', 'path', 'node'}
+
+    def __init__(self, **kwargs):
+        super(RaspiMuxOpen, self).__init__(**kwargs)
+
+
+class RaspiMuxClose(RaspiBaseMsg):
+    _handle = 'mux_close'
+    _properties = {'channel'}
+
+    def __init__(self, **kwargs):
+        super(RaspiMuxClose, self).__init__(**kwargs)
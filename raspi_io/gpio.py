@@ -1,10 +1,30 @@
 # -*- coding: utf-8 -*-
+import sys
+import json
 import uuid
+import time
+import array
+import socket
+import struct
+import threading
+import traceback
+import websocket
+import collections
 from .client import RaspiWsClient
-from .core import RaspiBaseMsg, RaspiAckMsg
-__all__ = ['GPIO', 'GPIOEvent', 'GPIOChannel', 'GPIOCtrl', 'GPIOSetup', 'GPIOMode', 'GPIOCleanup',
-           'SoftSPI', 'GPIOSoftSPI', 'GPIOSoftSPIXfer', 'GPIOSoftSPIRead', 'GPIOSoftSPIWrite',
-           'SoftPWM', 'GPIOSoftPWM', 'GPIOSoftPWMCtrl', 'GPIOTimingContentManager']
+from .core import RaspiBaseMsg, RaspiAckMsg, RaspiException, RaspiMsgDecodeError, RaspiSocketError
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+__all__ = ['GPIO', 'GPIOEvent', 'GPIOEventRemove', 'GPIOEventSubscribe', 'GPIOEventNotify', 'GPIOEventBatch',
+           'GPIOEventDispatcher',
+           'GPIOChannel', 'GPIOCtrl', 'GPIOSetup', 'GPIOMode', 'GPIOCleanup',
+           'GPIOInputMany', 'GPIOOutputMany', 'GPIOOutputMask', 'GPIOWaveform',
+           'GPIOCapture', 'GPIOCaptureData', 'GPIOMeasure', 'GPIOMeasurement', 'GPIOShadow', 'GPIOCoalesce',
+           'SoftSPI', 'GPIOSoftSPI', 'GPIOSoftSPIXfer', 'GPIOSoftSPIRead', 'GPIOSoftSPIWrite', 'GPIOSoftSPITransfer',
+           'SoftPWM', 'SoftPWMGroup', 'GPIOSoftPWM', 'GPIOSoftPWMCtrl', 'GPIOSoftPWMGroupCtrl', 'GPIOSoftPWMProfile',
+           'GPIOTimingContentManager']
 
 
 class GPIOMode(RaspiBaseMsg):
@@ -33,13 +53,72 @@ class GPIOEvent(RaspiBaseMsg):
     FALLING = 32
     BOTH = 33
     _handle = 'event'
-    _properties = {'channel', 'edge', 'callback'}
+    # callback: uuid of GPIOEventDispatcher events pushed to
+    # bouncetime: milliseconds, edges within bouncetime after last reported edge are ignored, 0 disabled
+    # glitch: microseconds, pulses shorter than glitch are filtered out, 0 disabled
+    # coalesce: milliseconds, edges are batched and delivered at most once per coalesce as GPIOEventBatch, 0 disabled
+    _properties = {'channel', 'edge', 'callback', 'bouncetime', 'glitch', 'coalesce'}
 
     def __init__(self, **kwargs):
-        kwargs.setdefault('edge', None)
-        kwargs.setdefault('callback', None)
+        kwargs.setdefault('callback', "")
+        kwargs.setdefault('bouncetime', 0)
+        kwargs.setdefault('glitch', 0)
+        kwargs.setdefault('coalesce', 0)
         super(GPIOEvent, self).__init__(**kwargs)
 
+    def check(self):
+        """Check event filter parameters
+
+        :return: parameters valid return True, otherwise raise ValueError
+        """
+        if self.edge not in (self.RISING, self.FALLING, self.BOTH):
+            raise ValueError("unknown edge: {!r}".format(self.edge))
+
+        for name in ('bouncetime', 'glitch', 'coalesce'):
+            value = getattr(self, name)
+            if not isinstance(value, int) or value < 0:
+                raise ValueError("{} must be a non-negative integer: {!r}".format(name, value))
+
+        return True
+
+
+class GPIOEventRemove(RaspiBaseMsg):
+    _handle = 'remove_event'
+    _properties = {'channel'}
+
+    def __init__(self, **kwargs):
+        super(GPIOEventRemove, self).__init__(**kwargs)
+
+
+class GPIOEventSubscribe(RaspiBaseMsg):
+    _handle = 'event_subscribe'
+    _properties = {'uuid'}
+
+    def __init__(self, **kwargs):
+        super(GPIOEventSubscribe, self).__init__(**kwargs)
+
+
+class GPIOEventNotify(RaspiBaseMsg):
+    # Server pushed event, edge is RISING or FALLING, timestamp is server side time in seconds
+    _handle = 'event_notify'
+    _properties = {'channel', 'edge', 'timestamp'}
+
+    def __init__(self, **kwargs):
+        super(GPIOEventNotify, self).__init__(**kwargs)
+
+
+class GPIOEventBatch(RaspiBaseMsg):
+    # Server pushed coalesced events, edges is [edge, timestamp] list in time order
+    _handle = 'event_batch'
+    _properties = {'channel', 'edges'}
+
+    def __init__(self, **kwargs):
+        super(GPIOEventBatch, self).__init__(**kwargs)
+
+    @property
+    def events(self):
+        return [GPIOEventNotify(channel=self.channel, edge=edge, timestamp=timestamp) for edge, timestamp in self.edges]
+
 
 class GPIOSetup(RaspiBaseMsg):
     # Direction
@@ -76,6 +155,228 @@ class GPIOChannel(RaspiBaseMsg):
         super(GPIOChannel, self).__init__(**kwargs)
 
 
+class GPIOInputMany(RaspiBaseMsg):
+    # Read all channels in one server operation, ack data is value list same order as channel
+    _handle = 'input_many'
+    _properties = {'channel'}
+
+    def __init__(self, **kwargs):
+        super(GPIOInputMany, self).__init__(**kwargs)
+
+
+class GPIOOutputMany(RaspiBaseMsg):
+    _handle = 'output_many'
+    _properties = {'channel', 'value'}
+
+    def __init__(self, **kwargs):
+        super(GPIOOutputMany, self).__init__(**kwargs)
+
+    @staticmethod
+    def pairs(values):
+        """Normalize output values
+
+        :param values: {channel: value} dict or (channel, value) list
+        :return: (channel, HIGH/LOW) list
+        """
+        return [(c, GPIOCtrl.HIGH if v else GPIOCtrl.LOW)
+                for c, v in (values.items() if isinstance(values, dict) else values)]
+
+
+class GPIOOutputMask(RaspiBaseMsg):
+    # Bit n of mask/value is channel n, channels in mask are set to value at once
+    _handle = 'output_mask'
+    _properties = {'mask', 'value'}
+
+    def __init__(self, **kwargs):
+        super(GPIOOutputMask, self).__init__(**kwargs)
+
+
+class GPIOWaveform(RaspiBaseMsg):
+    """Server executed waveform
+
+    steps: [offset_us, channel, value] list, offset is microseconds from waveform start, sorted by offset
+    repeat: play times
+    wait: ack after waveform finished, otherwise ack after it started
+    """
+    _handle = 'waveform'
+    _properties = {'steps', 'repeat', 'wait'}
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('repeat', 1)
+        kwargs.setdefault('wait', True)
+        kwargs['steps'] = [list(step) for step in kwargs.get('steps', list())]
+        super(GPIOWaveform, self).__init__(**kwargs)
+
+    @property
+    def duration(self):
+        """Waveform play duration in seconds"""
+        return (self.steps[-1][0] if self.steps else 0) * self.repeat / 1000000.0
+
+    def check(self):
+        """Check waveform steps
+
+        :return: steps valid return True, otherwise raise ValueError
+        """
+        if not isinstance(self.repeat, int) or self.repeat < 1:
+            raise ValueError("repeat must be a positive integer")
+
+        last = 0
+        for step in self.steps:
+            if len(step) != 3:
+                raise ValueError("step must be (offset_us, channel, value): {!r}".format(step))
+
+            offset, channel, value = step
+            if not isinstance(offset, int) or offset < last:
+                raise ValueError("step offset must be ascending non-negative integer: {!r}".format(step))
+
+            if value not in (GPIOCtrl.LOW, GPIOCtrl.HIGH):
+                raise ValueError("step value must be LOW or HIGH: {!r}".format(step))
+
+            last = offset
+
+        return True
+
+
+class GPIOCapture(RaspiBaseMsg):
+    """Server sample channels at a fixed rate, samples return over binary data path
+
+    channel: channel list, bit n of each sample is value of channel[n]
+    rate: sample rate in Hz
+    samples: sample count, each sample is a little endian word of sample_width(len(channel)) bytes
+    """
+    _handle = 'capture'
+    _properties = {'channel', 'rate', 'samples'}
+
+    # Sample word size in bytes
+    WIDTHS = (1, 2, 4, 8)
+
+    def __init__(self, **kwargs):
+        kwargs['channel'] = list(kwargs.get('channel', list()))
+        super(GPIOCapture, self).__init__(**kwargs)
+
+    @staticmethod
+    def sample_width(count):
+        """Sample word size of capture count channels
+
+        :param count: channel count
+        :return: sample word size in bytes
+        """
+        for width in GPIOCapture.WIDTHS:
+            if count <= width * 8:
+                return width
+
+        raise ValueError("too many channels: {}, max: {}".format(count, GPIOCapture.WIDTHS[-1] * 8))
+
+    @property
+    def duration(self):
+        """Capture duration in seconds"""
+        return self.samples / float(self.rate)
+
+    def check(self):
+        """Check capture parameters
+
+        :return: parameters valid return True, otherwise raise ValueError
+        """
+        if not self.channel or len(set(self.channel)) != len(self.channel):
+            raise ValueError("channel must be a non-empty list without duplicates: {!r}".format(self.channel))
+
+        self.sample_width(len(self.channel))
+
+        if not isinstance(self.rate, (int, float)) or self.rate <= 0:
+            raise ValueError("rate must be a positive number: {!r}".format(self.rate))
+
+        if not isinstance(self.samples, int) or self.samples < 1:
+            raise ValueError("samples must be a positive integer: {!r}".format(self.samples))
+
+        return True
+
+
+class GPIOCaptureData(object):
+    # Sample word format of each sample width
+    FORMATS = {1: 'B', 2: 'H', 4: 'I', 8: 'Q'}
+
+    def __init__(self, channels, rate, data):
+        """Captured samples
+
+        :param channels: captured channel list, bit n of each sample is value of channels[n]
+        :param rate: sample rate in Hz
+        :param data: raw samples, little endian words
+        """
+        self.__channels = tuple(channels)
+        self.__rate = rate
+        self.__data = data
+        self.__width = GPIOCapture.sample_width(len(self.__channels))
+        if len(data) % self.__width:
+            raise ValueError("data size {} is not multiple of sample width {}".format(len(data), self.__width))
+
+    def __len__(self):
+        return self.samples
+
+    @property
+    def channels(self):
+        return self.__channels
+
+    @property
+    def rate(self):
+        return self.__rate
+
+    @property
+    def width(self):
+        return self.__width
+
+    @property
+    def data(self):
+        return self.__data
+
+    @property
+    def samples(self):
+        return len(self.__data) // self.__width
+
+    @property
+    def duration(self):
+        return self.samples / float(self.__rate)
+
+    def words(self):
+        """Samples as sequence of int words without copying if possible
+
+        :return: memoryview or array.array
+        """
+        fmt = self.FORMATS[self.__width]
+        if sys.byteorder == 'little':
+            try:
+                return memoryview(self.__data).cast(fmt)
+            except (AttributeError, TypeError):
+                pass
+
+        words = array.array(fmt, bytes(self.__data))
+        if sys.byteorder != 'little':
+            words.byteswap()
+
+        return words
+
+    def array(self):
+        """Samples as numpy unsigned integer array, share memory with data
+
+        :return: numpy.ndarray
+        """
+        if numpy is None:
+            raise ImportError("numpy is required")
+
+        return numpy.frombuffer(self.__data, dtype='<u{}'.format(self.__width))
+
+    def bits(self, channel):
+        """Values of a channel
+
+        :param channel: captured channel
+        :return: numpy uint8 array if numpy is installed, otherwise bytearray, each item is 0 or 1
+        """
+        index = self.__channels.index(channel)
+        if numpy is not None:
+            return ((self.array() >> index) & 1).astype(numpy.uint8)
+
+        return bytearray((word >> index) & 1 for word in self.words())
+
+
 class GPIOSoftPWM(RaspiBaseMsg):
     _handle = 'pwm_init'
     _properties = {'mode', 'channel', 'frequency'}
@@ -83,6 +384,9 @@ class GPIOSoftPWM(RaspiBaseMsg):
     def __init__(self, **kwargs):
         super(GPIOSoftPWM, self).__init__(**kwargs)
 
+    def generate_uuid(self):
+        return str(uuid.uuid5(uuid.NAMESPACE_OID, '{0:d},{1:d},{2:d}'.format(self.mode, self.channel, self.frequency)))
+
 
 class GPIOSoftPWMCtrl(RaspiBaseMsg):
     _handle = 'pwm_ctrl'
@@ -93,6 +397,67 @@ class GPIOSoftPWMCtrl(RaspiBaseMsg):
         super(GPIOSoftPWMCtrl, self).__init__(**kwargs)
 
 
+class GPIOSoftPWMGroupCtrl(RaspiBaseMsg):
+    # Server update duty of all pwm at once, duty[n] is duty of uuid[n]
+    _handle = 'pwm_group_ctrl'
+    _properties = {'uuid', 'duty'}
+
+    def __init__(self, **kwargs):
+        super(GPIOSoftPWMGroupCtrl, self).__init__(**kwargs)
+
+
+class GPIOSoftPWMProfile(RaspiBaseMsg):
+    """Server executed duty profile, such as LED fade or motor soft start
+
+    uuid: pwm uuid list
+    steps: [duty, dwell_ms] list, duty is a number for all pwm or a list same length as uuid,
+           each step hold dwell_ms milliseconds then go to next step
+    repeat: play times
+    wait: ack after profile finished, otherwise ack after it started
+    """
+    _handle = 'pwm_profile'
+    _properties = {'uuid', 'steps', 'repeat', 'wait'}
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('repeat', 1)
+        kwargs.setdefault('wait', True)
+        kwargs['steps'] = [list(step) for step in kwargs.get('steps', list())]
+        super(GPIOSoftPWMProfile, self).__init__(**kwargs)
+
+    @property
+    def duration(self):
+        """Profile play duration in seconds"""
+        return sum(dwell for _, dwell in self.steps) * self.repeat / 1000.0
+
+    def check(self):
+        """Check profile steps
+
+        :return: steps valid return True, otherwise raise ValueError
+        """
+        if not isinstance(self.repeat, int) or self.repeat < 1:
+            raise ValueError("repeat must be a positive integer")
+
+        if not self.steps:
+            raise ValueError("profile must have at least one step")
+
+        for step in self.steps:
+            if len(step) != 2:
+                raise ValueError("step must be (duty, dwell_ms): {!r}".format(step))
+
+            duty, dwell = step
+            duties = duty if isinstance(duty, (list, tuple)) else [duty]
+            if isinstance(duty, (list, tuple)) and len(duty) != len(self.uuid):
+                raise ValueError("step duty count must same as pwm count: {!r}".format(step))
+
+            if any(not isinstance(d, (int, float)) or not 0 <= d <= 100 for d in duties):
+                raise ValueError("step duty must between 0 and 100: {!r}".format(step))
+
+            if not isinstance(dwell, int) or dwell < 0:
+                raise ValueError("step dwell must be a non-negative integer: {!r}".format(step))
+
+        return True
+
+
 class GPIOSoftSPI(RaspiBaseMsg):
     _handle = 'spi_init'
     _properties = {'mode', 'cs', 'clk', 'mosi', 'miso', 'bits_per_word'}
@@ -130,6 +495,446 @@ class GPIOSoftSPIWrite(RaspiBaseMsg):
         super(GPIOSoftSPIWrite, self).__init__(**kwargs)
 
 
+class GPIOSoftSPITransfer(RaspiBaseMsg):
+    """Multi segments in one chip select transaction
+
+    data: write words of all segments concatenated
+    segments: [write_words, read_words] list, server clock max(write_words, read_words) words for each segment,
+              ack data is read words of all segments concatenated
+    """
+    _handle = 'spi_transfer'
+    _properties = {'data', 'segments', 'uuid'}
+
+    def __init__(self, **kwargs):
+        super(GPIOSoftSPITransfer, self).__init__(**kwargs)
+
+
+class GPIOMeasure(RaspiBaseMsg):
+    """Server measure channel edge timestamps during window, ack data is aggregated statistics
+
+    mode: PULSE_WIDTH measure from edge to next opposite edge, PERIOD measure between successive edges,
+          COUNT count edges only
+    edge: RISING, FALLING (PULSE_WIDTH measure high or low pulse) or BOTH (COUNT/PERIOD only)
+    window: measure duration in seconds
+    bins: histogram bins count, bins are equal width between min and max
+
+    ack data: {'count': edges or intervals count, 'min': us, 'max': us, 'mean': us, 'histogram': [count, ...]}
+    """
+    # Mode
+    PULSE_WIDTH = 1
+    PERIOD = 2
+    COUNT = 3
+
+    _handle = 'measure'
+    _properties = {'channel', 'mode', 'edge', 'window', 'bins'}
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('mode', GPIOMeasure.PERIOD)
+        kwargs.setdefault('edge', GPIOEvent.RISING)
+        kwargs.setdefault('bins', 16)
+        super(GPIOMeasure, self).__init__(**kwargs)
+
+    def check(self):
+        """Check measure parameters
+
+        :return: parameters valid return True, otherwise raise ValueError
+        """
+        if self.mode not in (self.PULSE_WIDTH, self.PERIOD, self.COUNT):
+            raise ValueError("unknown measure mode: {!r}".format(self.mode))
+
+        if self.edge not in (GPIOEvent.RISING, GPIOEvent.FALLING, GPIOEvent.BOTH):
+            raise ValueError("unknown edge: {!r}".format(self.edge))
+
+        if self.mode == self.PULSE_WIDTH and self.edge == GPIOEvent.BOTH:
+            raise ValueError("pulse width measure edge must be RISING or FALLING")
+
+        if not isinstance(self.window, (int, float)) or self.window <= 0:
+            raise ValueError("window must be a positive number: {!r}".format(self.window))
+
+        if not isinstance(self.bins, int) or self.bins < 1:
+            raise ValueError("bins must be a positive integer: {!r}".format(self.bins))
+
+        return True
+
+
+class GPIOMeasurement(object):
+    def __init__(self, mode, window, data, edge=GPIOEvent.RISING):
+        """Measure statistics
+
+        :param mode: measure mode
+        :param window: measure duration in seconds
+        :param data: GPIOMeasure ack data
+        :param edge: measured edge, BOTH edges intervals are half periods
+        """
+        self.__mode = mode
+        self.__edge = edge
+        self.__window = window
+        self.__count = data.get('count', 0)
+        self.__min = data.get('min')
+        self.__max = data.get('max')
+        self.__mean = data.get('mean')
+        self.__histogram = list(data.get('histogram') or list())
+
+    def __repr__(self):
+        return "{}(count={!r}, min={!r}, max={!r}, mean={!r})".format(
+            self.__class__.__name__, self.__count, self.__min, self.__max, self.__mean
+        )
+
+    @property
+    def mode(self):
+        return self.__mode
+
+    @property
+    def edge(self):
+        return self.__edge
+
+    @property
+    def window(self):
+        return self.__window
+
+    @property
+    def count(self):
+        return self.__count
+
+    @property
+    def min(self):
+        """Minimum pulse width or period in microseconds, None if nothing measured"""
+        return self.__min
+
+    @property
+    def max(self):
+        return self.__max
+
+    @property
+    def mean(self):
+        return self.__mean
+
+    @property
+    def histogram(self):
+        return self.__histogram
+
+    @property
+    def bin_edges(self):
+        """Histogram bin edges in microseconds, len(histogram) + 1 items"""
+        if not self.__histogram or self.__min is None or self.__max is None:
+            return list()
+
+        step = (self.__max - self.__min) / float(len(self.__histogram))
+        return [self.__min + step * i for i in range(len(self.__histogram))] + [self.__max]
+
+    @property
+    def frequency(self):
+        """Frequency in Hz, PERIOD computed from mean period, COUNT computed from edges count in window
+
+        BOTH edges measured two edges per cycle, mean is half period and count is twice of cycles
+        """
+        edges = 2.0 if self.__edge == GPIOEvent.BOTH else 1.0
+        if self.__mode == GPIOMeasure.PERIOD and self.__mean:
+            return 1000000.0 / (self.__mean * edges)
+        elif self.__mode == GPIOMeasure.COUNT:
+            return self.__count / (self.__window * edges)
+
+        return None
+
+
+class GPIOShadow(object):
+    def __init__(self):
+        """Client side shadow registers, last known direction and output value of each channel
+
+        Only value of channels setup as OUT by this client is tracked
+        """
+        self.__directions = dict()
+        self.__values = dict()
+
+    @staticmethod
+    def pairs(channel, value):
+        """Normalize output arguments to (channel, value) list
+
+        :param channel: single channel or channel list
+        :param value: single value or value list same length as channel
+        :return: (channel, value) list
+        """
+        channels = list(channel) if isinstance(channel, (list, tuple)) else [channel]
+        values = list(value) if isinstance(value, (list, tuple)) else [value] * len(channels)
+        if len(channels) != len(values):
+            raise ValueError("channel and value length mismatch: {} != {}".format(len(channels), len(values)))
+
+        return [(c, GPIOCtrl.HIGH if v else GPIOCtrl.LOW) for c, v in zip(channels, values)]
+
+    def clear(self):
+        self.__directions.clear()
+        self.__values.clear()
+
+    def setup(self, channels, direction, initial):
+        for channel in channels:
+            self.__directions[channel] = direction
+            if direction == GPIOSetup.OUT:
+                self.__values[channel] = GPIOCtrl.HIGH if initial else GPIOCtrl.LOW
+            else:
+                self.__values.pop(channel, None)
+
+    def forget(self, channels):
+        """Channels are released, such as cleanup"""
+        for channel in channels:
+            self.__directions.pop(channel, None)
+            self.__values.pop(channel, None)
+
+    def invalidate(self, channels):
+        """Channels value become unknown, such as output failed, next output will write to server"""
+        for channel in channels:
+            self.__values.pop(channel, None)
+
+    def direction(self, channel):
+        return self.__directions.get(channel)
+
+    def value(self, channel):
+        """Last output value of an OUT channel
+
+        :param channel: gpio channel
+        :return: value, unknown return None
+        """
+        return self.__values.get(channel)
+
+    def changed(self, pairs):
+        """Filter out writes that do not change channel state
+
+        :param pairs: (channel, value) list
+        :return: (channel, value) list need write to server
+        """
+        return [(c, v) for c, v in pairs if self.__values.get(c) != v]
+
+    def update(self, pairs):
+        for channel, value in pairs:
+            if self.__directions.get(channel) == GPIOSetup.OUT:
+                self.__values[channel] = value
+
+
+class GPIOCoalesce(object):
+    def __init__(self, gpio):
+        """Coalesce outputs inside with statement, only final value of each channel write to server when exit
+
+            with gpio.coalesce() as coalesce:
+                gpio.output(20, 1)
+                gpio.output(20, 0)
+                gpio.output(21, 1)
+
+            print(coalesce.result)
+
+        :param gpio: GPIO instance
+        """
+        self.result = None
+        self.__gpio = gpio
+        self.__pending = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self.__pending)
+
+    def __enter__(self):
+        self.__gpio._begin_coalesce(self)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.__gpio._end_coalesce(self)
+        if exc_type is None:
+            self.result = self.__gpio.output_many(list(self.__pending.items())) if self.__pending else True
+        self.__pending.clear()
+
+    def add(self, pairs):
+        for channel, value in pairs:
+            self.__pending.pop(channel, None)
+            self.__pending[channel] = value
+
+    def value(self, channel):
+        return self.__pending.get(channel)
+
+
+class GPIOEventDispatcher(object):
+    # Interval dispatcher thread check it is closed or not
+    POLL_INTERVAL = 0.5
+    # Max timestamped edges buffered for each channel
+    EDGES_BUFFER = 1024
+
+    def __init__(self, ws):
+        """Receive server pushed edge events from a dedicated connection, invoke callbacks in dispatcher thread
+
+        :param ws: dedicated websocket connection, dispatcher own it
+        """
+        self.uuid = str(uuid.uuid4())
+        self.__ws = ws
+        self.__running = True
+        self.__detected = set()
+        self.__edges = dict()
+        self.__callbacks = dict()
+        self.__detect_edge = dict()
+        self.__last_event = dict()
+        self.__condition = threading.Condition()
+
+        # Subscribe first, events registered with this uuid will push to this connection
+        try:
+            ws.send(GPIOEventSubscribe(uuid=self.uuid).dumps())
+            ack = RaspiAckMsg(**json.loads(ws.recv()))
+            if not ack.ack:
+                raise RuntimeError(ack.data)
+            ws.settimeout(self.POLL_INTERVAL)
+        except (ValueError, RuntimeError, RaspiMsgDecodeError, socket.error, websocket.WebSocketException) as err:
+            ws.close()
+            raise RaspiSocketError("Subscribe gpio event error: {}".format(err))
+
+        self.__thread = threading.Thread(target=self.__dispatch, name="GPIOEventDispatcher")
+        self.__thread.daemon = True
+        self.__thread.start()
+
+    @property
+    def channels(self):
+        with self.__condition:
+            return set(self.__callbacks.keys())
+
+    def edge(self, channel):
+        """Edge detection enabled on channel
+
+        :param channel: gpio channel
+        :return: RISING, FALLING or BOTH, channel is not dispatched return None
+        """
+        with self.__condition:
+            return self.__detect_edge.get(channel)
+
+    def add(self, channel, callback=None, edge=None):
+        """Add a channel (or a callback to channel) to dispatch
+
+        :param channel: gpio channel
+        :param callback: callback(channel)
+        :param edge: edge detection enabled on channel, None keep current
+        :return:
+        """
+        with self.__condition:
+            if edge is not None:
+                self.__detect_edge[channel] = edge
+            self.__edges.setdefault(channel, collections.deque(maxlen=self.EDGES_BUFFER))
+            callbacks = self.__callbacks.setdefault(channel, list())
+            if callback is not None:
+                callbacks.append(callback)
+
+    def remove(self, channel):
+        with self.__condition:
+            self.__edges.pop(channel, None)
+            self.__callbacks.pop(channel, None)
+            self.__detect_edge.pop(channel, None)
+            self.__detected.discard(channel)
+            self.__condition.notify_all()
+
+    def detected(self, channel):
+        """Channel has event after last call or not
+
+        :param channel: gpio channel
+        :return: True or False
+        """
+        with self.__condition:
+            if channel in self.__detected:
+                self.__detected.discard(channel)
+                return True
+
+            return False
+
+    def edges(self, channel):
+        """Timestamped edges of channel received after last call
+
+        :param channel: gpio channel
+        :return: (edge, timestamp) list
+        """
+        with self.__condition:
+            edges = self.__edges.get(channel, list())
+            result = list(edges)
+            if edges:
+                edges.clear()
+
+            return result
+
+    def wait(self, channel, edge, timeout=None):
+        """Wait next edge event of channel
+
+        :param channel: gpio channel
+        :param edge: RISING, FALLING or BOTH
+        :param timeout: timeout in seconds, None wait forever
+        :return: GPIOEventNotify, timeout or channel removed return None
+        """
+        # Last event of channel and last event of each edge are recorded, a batch may contain both edges
+        key = channel if edge == GPIOEvent.BOTH else (channel, edge)
+        deadline = None if timeout is None else time.time() + timeout
+        with self.__condition:
+            last = self.__last_event.get(key)
+            while self.__running and channel in self.__callbacks:
+                event = self.__last_event.get(key)
+                if event is not last:
+                    return event
+
+                remain = None if deadline is None else deadline - time.time()
+                if remain is not None and remain <= 0:
+                    return None
+
+                self.__condition.wait(remain)
+
+            return None
+
+    def __dispatch(self):
+        while self.__running:
+            try:
+                data = self.__ws.recv()
+            except websocket.WebSocketTimeoutException:
+                continue
+            except (socket.error, websocket.WebSocketException):
+                break
+
+            if not data:
+                break
+
+            try:
+                dict_ = json.loads(data)
+                if dict_.get('handle') == GPIOEventBatch._handle:
+                    events = GPIOEventBatch(**dict_).events
+                else:
+                    events = [GPIOEventNotify(**dict_)]
+            except (ValueError, TypeError, AttributeError, RaspiMsgDecodeError):
+                continue
+
+            if not events:
+                continue
+
+            channel = events[0].channel
+            with self.__condition:
+                self.__detected.add(channel)
+                for event in events:
+                    self.__last_event[channel] = self.__last_event[(channel, event.edge)] = event
+                    if channel in self.__edges:
+                        self.__edges[channel].append((event.edge, event.timestamp))
+
+                callbacks = list(self.__callbacks.get(channel, list()))
+                self.__condition.notify_all()
+
+            # Callbacks are called once for each notification, a batch will not flood callback thread
+            for callback in callbacks:
+                try:
+                    callback(channel)
+                except Exception:
+                    traceback.print_exc()
+
+        with self.__condition:
+            self.__running = False
+            self.__condition.notify_all()
+
+    def close(self):
+        self.__running = False
+        try:
+            # Dispatcher thread may block in recv holding connection lock (or frozen at interpreter exit),
+            # close socket directly instead of close handshake, otherwise it will dead lock
+            self.__ws.shutdown()
+        except (socket.error, websocket.WebSocketException):
+            pass
+
+        # Callback may remove event detect in dispatcher thread
+        if self.__thread is not threading.current_thread():
+            self.__thread.join(self.POLL_INTERVAL * 2)
+
+
 class GPIO(RaspiWsClient):
     PATH = __name__.split(".")[-1]
 
@@ -146,16 +951,85 @@ class GPIO(RaspiWsClient):
     PUD_OFF = GPIOSetup.PUD_OFF
     PUD_DOWN = GPIOSetup.PUD_DOWN
 
-    def __init__(self, host, timeout=1, verbose=1):
-        super(GPIO, self).__init__(host, self.PATH, timeout, verbose)
+    RISING = GPIOEvent.RISING
+    FALLING = GPIOEvent.FALLING
+    BOTH = GPIOEvent.BOTH
+
+    PULSE_WIDTH = GPIOMeasure.PULSE_WIDTH
+    PERIOD = GPIOMeasure.PERIOD
+    COUNT = GPIOMeasure.COUNT
+
+    def __init__(self, host, timeout=1, verbose=1, shadow=False, pool=None):
+        """GPIO
+
+        :param host: raspberry address such as "192.168.1.100"
+        :param timeout: timeout in seconds
+        :param verbose: verbose message level
+        :param shadow: enable shadow registers, skip outputs do not change state, read OUT channels locally
+        :param pool: connection pool acquire connection from, None create a dedicated connection
+        """
+        super(GPIO, self).__init__(host, self.PATH, timeout, verbose, pool)
+        self.__events = None
+        self.__coalesce = None
         self.__registered = set()
+        self.__shadow = GPIOShadow() if shadow else None
+
+    @property
+    def shadow(self):
+        return self.__shadow
+
+    def _begin_coalesce(self, coalesce):
+        if self.__coalesce is not None:
+            raise RaspiException("nested coalesce is not supported")
+
+        self.__coalesce = coalesce
+
+    def _end_coalesce(self, coalesce):
+        if self.__coalesce is coalesce:
+            self.__coalesce = None
+
+    def _update_shadow(self, ret, pairs):
+        if self.__shadow is None:
+            return
+
+        if isinstance(ret, RaspiAckMsg) and ret.ack:
+            self.__shadow.update(pairs)
+        else:
+            # Failed or queued in batch, value is unknown
+            self.__shadow.invalidate([c for c, _ in pairs])
+
+    def coalesce(self):
+        """Coalesce outputs inside with statement, write final value of changed channels in one request when exit
+
+        :return: GPIOCoalesce context manager
+        """
+        return GPIOCoalesce(self)
 
     def __del__(self):
         try:
-            self.cleanup(list(self.__registered))
+            self.release()
         except AttributeError:
             pass
 
+    def close(self):
+        """Cleanup registered channels and stop event dispatcher
+
+        :return:
+        """
+        self.cleanup(list(self.__registered))
+        if self.__events is not None:
+            self.__events.close()
+            self.__events = None
+
+    def __close_events(self):
+        """Stop event dispatcher and close its connection when no channel enabled edge detection
+
+        :return:
+        """
+        if self.__events is not None and not self.__events.channels:
+            self.__events.close()
+            self.__events = None
+
     def setmode(self, mode):
         """Set GPIO mode
 
@@ -163,9 +1037,20 @@ class GPIO(RaspiWsClient):
         :return: success return True failed return False
         """
         ret = self._transfer(GPIOMode(mode=mode))
+        if self.__shadow is not None:
+            # Channel numbering changed
+            self.__shadow.clear()
+
         return True if isinstance(ret, RaspiAckMsg) and ret.ack else False
 
     def input(self, channel):
+        value = self.__coalesce.value(channel) if self.__coalesce is not None else None
+        if value is None and self.__shadow is not None:
+            value = self.__shadow.value(channel)
+
+        if value is not None:
+            return value
+
         ack = self._transfer(GPIOChannel(channel=channel))
         if not isinstance(ack, RaspiAckMsg) or not ack.ack:
             return None
@@ -174,12 +1059,156 @@ class GPIO(RaspiWsClient):
 
     def cleanup(self, channel):
         ret = self._transfer(GPIOCleanup(channel=channel))
+        channels = channel if isinstance(channel, (list, tuple)) else [channel]
+        if self.__shadow is not None:
+            self.__shadow.forget(channels)
+
+        if isinstance(ret, RaspiAckMsg) and ret.ack and self.__events is not None:
+            # Server remove event detect of cleanup channels
+            [self.__events.remove(c) for c in channels]
+            self.__close_events()
+
         return True if isinstance(ret, RaspiAckMsg) and ret.ack else False
 
     def output(self, channel, value):
+        if self.__coalesce is None and self.__shadow is None:
+            ret = self._transfer(GPIOCtrl(channel=channel, value=value))
+            return True if isinstance(ret, RaspiAckMsg) and ret.ack else False
+
+        pairs = GPIOShadow.pairs(channel, value)
+        if self.__coalesce is not None:
+            self.__coalesce.add(pairs)
+            return True
+
+        if self.__shadow is not None and not self.__shadow.changed(pairs):
+            return True
+
         ret = self._transfer(GPIOCtrl(channel=channel, value=value))
+        self._update_shadow(ret, pairs)
         return True if isinstance(ret, RaspiAckMsg) and ret.ack else False
 
+    def input_many(self, channels, packed=False):
+        """Read multi channels in one server operation, values are sampled at same time
+
+        :param channels: channel list
+        :param packed: return a bitmask, bit n is value of channels[n]
+        :return: value list or bitmask, failed return None
+        """
+        ack = self._transfer(GPIOInputMany(channel=list(channels)))
+        if not isinstance(ack, RaspiAckMsg) or not ack.ack:
+            return None
+
+        if not packed:
+            return ack.data
+
+        return sum((1 << i) for i, value in enumerate(ack.data) if value)
+
+    def output_many(self, values):
+        """Output multi channels in one server operation
+
+        :param values: {channel: value} dict or (channel, value) list
+        :return: success return True failed return False
+        """
+        values = GPIOOutputMany.pairs(values)
+        if self.__coalesce is not None:
+            self.__coalesce.add(values)
+            return True
+
+        if self.__shadow is not None:
+            values = self.__shadow.changed(values)
+            if not values:
+                return True
+
+        ret = self._transfer(GPIOOutputMany(channel=[c for c, _ in values], value=[v for _, v in values]))
+        self._update_shadow(ret, values)
+        return True if isinstance(ret, RaspiAckMsg) and ret.ack else False
+
+    def output_mask(self, mask, values):
+        """Output channels selected by mask at once, bit n of mask and values is channel n
+
+        :param mask: channels bitmask
+        :param values: values bitmask
+        :return: success return True failed return False
+        """
+        pairs = [(c, (values >> c) & 1) for c in range(mask.bit_length()) if (mask >> c) & 1]
+        if self.__coalesce is not None:
+            self.__coalesce.add(pairs)
+            return True
+
+        if self.__shadow is not None:
+            mask = sum(1 << c for c, _ in self.__shadow.changed(pairs))
+            if not mask:
+                return True
+
+        ret = self._transfer(GPIOOutputMask(mask=mask, value=values & mask))
+        self._update_shadow(ret, [(c, v) for c, v in pairs if (mask >> c) & 1])
+        return True if isinstance(ret, RaspiAckMsg) and ret.ack else False
+
+    def play_waveform(self, steps, repeat=1, wait=True):
+        """Upload a waveform and let server play it in a tight loop, timing is microsecond accuracy
+
+        :param steps: (offset_us, channel, value) list, offset is microseconds from waveform start, sorted by offset
+        :param repeat: play times
+        :param wait: wait until waveform finished
+        :return: success return True failed return False
+        """
+        waveform = GPIOWaveform(steps=steps, repeat=repeat, wait=wait)
+        waveform.check()
+
+        with self._extend_timeout(waveform.duration if wait else 0):
+            ret = self._transfer(waveform)
+
+        if self.__shadow is not None:
+            # Channels value depend on when waveform finished
+            self.__shadow.invalidate(set(channel for _, channel, _ in waveform.steps))
+
+        return True if isinstance(ret, RaspiAckMsg) and ret.ack else False
+
+    def capture(self, channels, rate_hz, samples=None, duration=None):
+        """Logic analyzer mode, server sample channels at a fixed rate, samples return as packed words
+
+        :param channels: channel list, bit n of each sample is value of channels[n]
+        :param rate_hz: sample rate in Hz
+        :param samples: sample count
+        :param duration: capture duration in seconds, if samples is not specified
+        :return: success return GPIOCaptureData, failed return None
+        """
+        if (samples is None) == (duration is None):
+            raise ValueError("either samples or duration must be specified")
+
+        if samples is None:
+            samples = int(round(duration * rate_hz))
+
+        capture = GPIOCapture(channel=channels, rate=rate_hz, samples=samples)
+        capture.check()
+
+        with self._extend_timeout(capture.duration):
+            data = self._recv_binary_data(capture)
+
+        return GPIOCaptureData(capture.channel, rate_hz, data) if data is not None else None
+
+    def measure(self, channel, mode=PERIOD, window=1.0, edge=RISING, bins=16):
+        """Server measure pulse width, period or count edges of a channel against edge timestamps
+
+        :param channel: gpio channel
+        :param mode: PULSE_WIDTH, PERIOD or COUNT
+        :param window: measure duration in seconds
+        :param edge: PULSE_WIDTH: RISING measure high pulse, FALLING measure low pulse,
+                     PERIOD/COUNT: which edge RISING, FALLING or BOTH
+        :param bins: histogram bins count
+        :return: success return GPIOMeasurement, failed return None
+        """
+        measure = GPIOMeasure(channel=channel, mode=mode, window=window, edge=edge, bins=bins)
+        measure.check()
+
+        with self._extend_timeout(window):
+            ack = self._transfer(measure)
+
+        if not isinstance(ack, RaspiAckMsg) or not ack.ack:
+            return None
+
+        return GPIOMeasurement(mode, window, ack.data, edge)
+
     def setup(self, channel, direction, pull_up_down=PUD_OFF, initial=LOW):
         """Setup channel mode
 
@@ -193,33 +1222,131 @@ class GPIO(RaspiWsClient):
             GPIOSetup(channel=channel, direction=direction, pull_up_down=pull_up_down, initial=initial)
         )
         # Setup success register gpio channel
+        channels = channel if isinstance(channel, (list, tuple)) else [channel]
         if isinstance(ret, RaspiAckMsg) and ret.ack:
-            if isinstance(channel, (list, tuple)):
-                [self.__registered.add(c) for c in channel]
-            else:
-                self.__registered.add(channel)
+            [self.__registered.add(c) for c in channels]
+            if self.__shadow is not None:
+                self.__shadow.setup(channels, direction, initial)
+        elif self.__shadow is not None:
+            self.__shadow.forget(channels)
 
         return True if isinstance(ret, RaspiAckMsg) and ret.ack else False
 
+    def add_event_detect(self, channel, edge, callback=None, bouncetime=0, glitch=0, coalesce=0):
+        """Enable edge detection, server push events to a dedicated connection instead of polling input
+
+        Filters and coalescing run on server, a chattering input will not flood connection and callback thread
+
+        :param channel: gpio channel
+        :param edge: RISING, FALLING or BOTH
+        :param callback: callback(channel), called in event dispatcher thread
+        :param bouncetime: milliseconds (same as RPi.GPIO), ignore edges within bouncetime after last reported edge
+        :param glitch: microseconds, filter out pulses shorter than glitch
+        :param coalesce: milliseconds, deliver edges in batch at most once per coalesce, get them by event_edges
+        :return: success return True, failed return False
+        """
+        event = GPIOEvent(channel=channel, edge=edge, bouncetime=bouncetime, glitch=glitch, coalesce=coalesce)
+        event.check()
+
+        try:
+            if self.__events is None:
+                self.__events = GPIOEventDispatcher(self._open_connection())
+        except RaspiSocketError as err:
+            self._error("{}".format(err))
+            return False
+
+        event.callback = self.__events.uuid
+        ret = self._transfer(event)
+        if isinstance(ret, RaspiAckMsg) and ret.ack:
+            self.__events.add(channel, callback, edge)
+        else:
+            self.__close_events()
+
+        return True if isinstance(ret, RaspiAckMsg) and ret.ack else False
+
+    def add_event_callback(self, channel, callback):
+        """Add a callback to a channel already enabled edge detection
+
+        :param channel: gpio channel
+        :param callback: callback(channel)
+        :return: success return True, failed return False
+        """
+        if self.__events is None or channel not in self.__events.channels:
+            self._error("channel {} edge detection is not enabled".format(channel))
+            return False
+
+        self.__events.add(channel, callback)
+        return True
+
+    def remove_event_detect(self, channel):
+        ret = self._transfer(GPIOEventRemove(channel=channel))
+        if self.__events is not None:
+            self.__events.remove(channel)
+            self.__close_events()
+
+        return True if isinstance(ret, RaspiAckMsg) and ret.ack else False
+
+    def event_detected(self, channel):
+        """Channel has edge event after last call or not, edge detection must be enabled first
+
+        :param channel: gpio channel
+        :return: True or False
+        """
+        return self.__events.detected(channel) if self.__events is not None else False
+
+    def event_edges(self, channel):
+        """Timestamped edges of channel received after last call, edge detection must be enabled first
+
+        :param channel: gpio channel
+        :return: (edge, timestamp) list, timestamp is server side time in seconds
+        """
+        return self.__events.edges(channel) if self.__events is not None else list()
+
+    def wait_for_edge(self, channel, edge, timeout=None):
+        """Block until an edge is detected, temporarily enable edge detection if it is not enabled
+
+        :param channel: gpio channel
+        :param edge: RISING, FALLING or BOTH
+        :param timeout: timeout in milliseconds (same as RPi.GPIO), None wait forever
+        :return: channel, timeout return None
+        """
+        registered = self.__events is not None and channel in self.__events.channels
+        if registered and self.__events.edge(channel) not in (edge, GPIOEvent.BOTH):
+            # Server will never push the edge waiting for (same as RPi.GPIO)
+            raise RuntimeError("Conflicting edge detection already enabled for channel {}".format(channel))
+
+        if not registered and not self.add_event_detect(channel, edge):
+            return None
+
+        try:
+            event = self.__events.wait(channel, edge, None if timeout is None else timeout / 1000.0)
+            return channel if event is not None else None
+        finally:
+            if not registered:
+                self.remove_event_detect(channel)
+
 
 class SoftPWM(RaspiWsClient):
     PATH = __name__.split(".")[-1]
 
-    def __init__(self, host, mode, channel, frequency, timeout=1, verbose=1):
-        super(SoftPWM, self).__init__(host, self.PATH, timeout, verbose)
+    def __init__(self, host, mode, channel, frequency, timeout=1, verbose=1, pool=None):
+        super(SoftPWM, self).__init__(host, self.PATH, timeout, verbose, pool)
         self.__state = False
         self.__channel = channel
-        self._transfer(GPIOSoftPWM(mode=mode, channel=channel, frequency=frequency))
-        # TODO: Move to SoftPWM as a function
-        self.uuid = str(uuid.uuid5(uuid.NAMESPACE_OID, '{0:d},{1:d},{2:d}'.format(mode, channel, frequency)))
+        pwm = GPIOSoftPWM(mode=mode, channel=channel, frequency=frequency)
+        self._transfer(pwm)
+        self.uuid = pwm.generate_uuid()
 
     def __del__(self):
         try:
-            self.stop()
-            self._transfer(GPIOCleanup(channel=self.__channel))
+            self.release()
         except AttributeError:
             pass
 
+    def close(self):
+        self.stop()
+        self._transfer(GPIOCleanup(channel=self.__channel))
+
     def start(self, duty):
         ret = self._transfer(GPIOSoftPWMCtrl(uuid=self.uuid, duty=duty))
         self.__state = ret.ack if isinstance(ret, RaspiAckMsg) else False
@@ -233,11 +1360,123 @@ class SoftPWM(RaspiWsClient):
     def is_running(self):
         return self.__state
 
+    def play_profile(self, steps, repeat=1, wait=True):
+        """Upload a duty profile and let server execute it, no round trip between steps
+
+        :param steps: (duty, dwell_ms) list
+        :param repeat: play times
+        :param wait: wait until profile finished
+        :return: success return True failed return False
+        """
+        profile = GPIOSoftPWMProfile(uuid=[self.uuid], steps=steps, repeat=repeat, wait=wait)
+        profile.check()
+
+        with self._extend_timeout(profile.duration if wait else 0):
+            ret = self._transfer(profile)
+
+        self.__state = True if isinstance(ret, RaspiAckMsg) and ret.ack else self.__state
+        return True if isinstance(ret, RaspiAckMsg) and ret.ack else False
+
+
+class SoftPWMGroup(RaspiWsClient):
+    PATH = __name__.split(".")[-1]
+
+    def __init__(self, host, mode, channels, frequency, timeout=1, verbose=1, pool=None):
+        """Drive multi software pwm over one connection, duties of all channels update at once
+
+        :param host: raspberry address such as "192.168.1.100"
+        :param mode: GPIO.BCM or GPIO.BOARD
+        :param channels: channel list
+        :param frequency: pwm frequency of all channels
+        :param timeout: timeout in seconds
+        :param verbose: verbose message level
+        :param pool: connection pool acquire connection from, None create a dedicated connection
+        """
+        super(SoftPWMGroup, self).__init__(host, self.PATH, timeout, verbose, pool)
+        self.__state = False
+        self.__channels = tuple(channels)
+        self.__uuid = dict()
+        for channel in self.__channels:
+            pwm = GPIOSoftPWM(mode=mode, channel=channel, frequency=frequency)
+            self._transfer(pwm)
+            self.__uuid[channel] = pwm.generate_uuid()
+
+    def __del__(self):
+        try:
+            self.release()
+        except AttributeError:
+            pass
+
+    def close(self):
+        self.stop()
+        self._transfer(GPIOCleanup(channel=list(self.__channels)))
+
+    @property
+    def channels(self):
+        return self.__channels
+
+    def __get_uuid(self, channels):
+        unknown = [channel for channel in channels if channel not in self.__uuid]
+        if unknown:
+            raise ValueError("channels {} not in group: {}".format(unknown, list(self.__channels)))
+
+        return [self.__uuid[channel] for channel in channels]
+
+    def start(self, duty):
+        """Update duty of channels in one message, server apply them at once
+
+        :param duty: a number for all channels, {channel: duty} dict or duty list same order as channels
+        :return: success return True failed return False
+        """
+        if isinstance(duty, dict):
+            duties = list(duty.items())
+        elif isinstance(duty, (list, tuple)):
+            if len(duty) != len(self.__channels):
+                raise ValueError("duty count must same as channel count: {} != {}".format(
+                    len(duty), len(self.__channels)))
+            duties = list(zip(self.__channels, duty))
+        else:
+            duties = [(channel, duty) for channel in self.__channels]
+
+        ret = self._transfer(GPIOSoftPWMGroupCtrl(uuid=self.__get_uuid([c for c, _ in duties]),
+                                                  duty=[d for _, d in duties]))
+        self.__state = True if isinstance(ret, RaspiAckMsg) and ret.ack else self.__state
+        return True if isinstance(ret, RaspiAckMsg) and ret.ack else False
+
+    def stop(self):
+        ret = self._transfer(GPIOSoftPWMGroupCtrl(uuid=[self.__uuid[c] for c in self.__channels],
+                                                  duty=[0] * len(self.__channels)))
+        self.__state = False if isinstance(ret, RaspiAckMsg) and ret.ack else self.__state
+        return True if isinstance(ret, RaspiAckMsg) and ret.ack else False
+
+    def is_running(self):
+        return self.__state
+
+    def play_profile(self, steps, channels=None, repeat=1, wait=True):
+        """Upload a duty profile and let server execute it, no round trip between steps
+
+        :param steps: (duty, dwell_ms) list, duty is a number for all channels or a list same order as channels
+        :param channels: channels profile applied to, default all channels
+        :param repeat: play times
+        :param wait: wait until profile finished
+        :return: success return True failed return False
+        """
+        channels = self.__channels if channels is None else channels
+        profile = GPIOSoftPWMProfile(uuid=self.__get_uuid(channels), steps=steps, repeat=repeat, wait=wait)
+        profile.check()
+
+        with self._extend_timeout(profile.duration if wait else 0):
+            ret = self._transfer(profile)
+
+        self.__state = True if isinstance(ret, RaspiAckMsg) and ret.ack else self.__state
+        return True if isinstance(ret, RaspiAckMsg) and ret.ack else False
+
 
 class SoftSPI(RaspiWsClient):
     PATH = __name__.split(".")[-1]
 
-    def __init__(self, host, mode, cs, clk, mosi, miso, bits_per_word=8, timeout=1, verbose=1):
+    def __init__(self, host, mode, cs, clk, mosi, miso, bits_per_word=8, timeout=1, verbose=1, bytes_result=False,
+                 pool=None):
         """Software spi controller, using gpio simulate
 
         :param host: raspberry ip address
@@ -249,11 +1488,26 @@ class SoftSPI(RaspiWsClient):
         :param bits_per_word: spi per word bits
         :param timeout: timeout
         :param verbose: verbose message output
+        :param bytes_result: read results are bytes (transfer items are memoryview) instead of int list,
+                             bits_per_word must <= 8
+        :param pool: connection pool acquire connection from, None create a dedicated connection
         :return:
         """
-        super(SoftSPI, self).__init__(host, self.PATH, timeout, verbose)
+        if not isinstance(bits_per_word, int) or not 1 <= bits_per_word <= 32:
+            raise ValueError("bits_per_word must between 1 and 32: {}".format(bits_per_word))
+
+        if bytes_result and bits_per_word > 8:
+            raise ValueError("bytes_result requires bits_per_word <= 8: {}".format(bits_per_word))
+
+        # Words on wire are big endian and (bits_per_word + 7) // 8 bytes each, 17-24 bits words are 3 bytes:
+        # packed by 4 bytes struct and leading zero byte dropped, padded back to 4 bytes when unpack
+        self.__word_bytes = (bits_per_word + 7) // 8
+        self.__word_struct = struct.Struct('>{}'.format('BHII'[self.__word_bytes - 1]))
+        self.__bytes_result = bytes_result
+
+        super(SoftSPI, self).__init__(host, self.PATH, timeout, verbose, pool)
         spi = GPIOSoftSPI(mode=mode, cs=cs, clk=clk, mosi=mosi, miso=miso, bits_per_word=bits_per_word)
-        ret = self._transfer(spi)
+        ret = self._open_device(spi)
         if not isinstance(ret, RaspiAckMsg) or not ret.ack:
             raise RuntimeError(ret.data)
         self.channel = [cs, clk, mosi, miso]
@@ -261,22 +1515,99 @@ class SoftSPI(RaspiWsClient):
 
     def __del__(self):
         try:
-            self.close()
+            self.release()
         except AttributeError:
             pass
 
+    def _encode_words(self, data):
+        """Encode words to write, binary codec send raw big endian words, otherwise send int list
+
+        :param data: bytes, bytearray, memoryview or int list
+        :return: payload for request message
+        """
+        words = list(bytearray(data)) if isinstance(data, (bytes, bytearray, memoryview)) else list(data)
+        if not self._raw_payload():
+            return words
+
+        if self.__word_bytes == 1:
+            return bytearray(words)
+
+        payload = bytearray()
+        for word in words:
+            payload += self.__word_struct.pack(word)[-self.__word_bytes:]
+
+        return payload
+
+    def _decode_words(self, data):
+        """Decode read words
+
+        :param data: raw big endian words or int list
+        :return: bytes_result return bytes, otherwise int list, invalid data return None
+        """
+        if self.__word_bytes == 1:
+            return bytes(bytearray(data)) if self.__bytes_result else list(bytearray(data))
+
+        if not isinstance(data, (bytes, bytearray)):
+            return list(data)
+
+        if len(data) % self.__word_bytes:
+            self._error("read data size {} is not multiple of word size {}".format(len(data), self.__word_bytes))
+            return None
+
+        pad = b'\x00' * (self.__word_struct.size - self.__word_bytes)
+        return [self.__word_struct.unpack(pad + bytes(data[i:i + self.__word_bytes]))[0]
+                for i in range(0, len(data), self.__word_bytes)]
+
+    def _read_result(self, ret):
+        words = self._decode_words(ret.data) if isinstance(ret, RaspiAckMsg) and ret.ack else None
+        if words is None:
+            return bytes() if self.__bytes_result else list()
+
+        return words
+
     def xfer(self, data, size=0):
-        ret = self._transfer(GPIOSoftSPIXfer(data=data, size=size, uuid=self.uuid))
-        return ret.data if isinstance(ret, RaspiAckMsg) and ret.ack else list()
+        ret = self._transfer(GPIOSoftSPIXfer(data=self._encode_words(data), size=size, uuid=self.uuid))
+        return self._read_result(ret)
 
     def read(self, size):
-        ret = self._transfer(GPIOSoftSPIRead(size=size, uuid=self.uuid))
-        return ret.data if isinstance(ret, RaspiAckMsg) and ret.ack else list()
+        return self._read_result(self._transfer(GPIOSoftSPIRead(size=size, uuid=self.uuid)))
 
     def write(self, data):
-        ret = self._transfer(GPIOSoftSPIWrite(data=data, uuid=self.uuid))
+        ret = self._transfer(GPIOSoftSPIWrite(data=self._encode_words(data), uuid=self.uuid))
         return ret.data if isinstance(ret, RaspiAckMsg) and ret.ack else 0
 
+    def transfer(self, segments):
+        """Multi segments in one chip select transaction and one round trip
+
+        :param segments: (write_data, read_size) list, each segment clock max(len(write_data), read_size) words
+        :return: read words list of each segment (bytes_result each item is a memoryview of one buffer),
+                 failed return None
+        """
+        segments = [(list(bytearray(data)) if isinstance(data, (bytes, bytearray, memoryview)) else list(data), size)
+                    for data, size in segments]
+        ret = self._transfer(GPIOSoftSPITransfer(
+            data=self._encode_words([word for data, _ in segments for word in data]),
+            segments=[[len(data), size] for data, size in segments], uuid=self.uuid
+        ))
+        if not isinstance(ret, RaspiAckMsg) or not ret.ack:
+            return None
+
+        words = self._decode_words(ret.data)
+        if words is None:
+            return None
+
+        words = memoryview(words) if self.__bytes_result else words
+        if len(words) != sum(size for _, size in segments):
+            self._error("transfer read size mismatch: {}".format(len(words)))
+            return None
+
+        result, pos = list(), 0
+        for _, size in segments:
+            result.append(words[pos:pos + size])
+            pos += size
+
+        return result
+
     def close(self):
         ret = self._transfer(GPIOCleanup(channel=self.channel))
         return ret.data if isinstance(ret, RaspiAckMsg) and ret.ack else False
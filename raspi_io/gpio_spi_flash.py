@@ -2,7 +2,7 @@
 import uuid
 import hashlib
 from .client import RaspiWsClient
-from .core import RaspiBaseMsg, RaspiAckMsg, get_binary_data_header
+from .core import RaspiBaseMsg, RaspiAckMsg, RaspiBinaryStream
 from .spi_flash import SPIFlashInstruction, SPIFlashErase, SPIFlashClose, \
     SPIFlashProbe, SPIFlashReadChip, SPIFlashReadStatus, SPIFlashWriteStatus
 
@@ -19,7 +19,7 @@ class GPIOSPIFlash(RaspiWsClient):
     PATH = __name__.split(".")[-1]
 
     def __init__(self, host, page_size, chip_size,
-                 cs=8, clk=11, mosi=10, miso=9, instruction=None, timeout=200, verbose=1):
+                 cs=8, clk=11, mosi=10, miso=9, instruction=None, timeout=200, verbose=1, pool=None):
         """
 
         :param host: raspi-io server address
@@ -32,22 +32,26 @@ class GPIOSPIFlash(RaspiWsClient):
         :param instruction: spi flash instruction
         :param timeout: raspi-io timeout unit second
         :param verbose: verbose message output
+        :param pool: connection pool acquire connection from, None create a dedicated connection
         """
         device_uuid = str(uuid.uuid5(uuid.NAMESPACE_OID, '{}:{}:{}:{}'.format(cs, clk, mosi, miso)))
-        super(GPIOSPIFlash, self).__init__(host, device_uuid, timeout, verbose)
+        super(GPIOSPIFlash, self).__init__(host, device_uuid, timeout, verbose, pool)
         flash_instruction = instruction if isinstance(instruction, SPIFlashInstruction) else SPIFlashInstruction()
-        ret = self._transfer(GPIOSPIFlashDevice(cs=cs, clk=clk, mosi=mosi, miso=miso,
-                                                page_size=page_size, chip_size=chip_size,
-                                                instruction=flash_instruction.dict))
+        ret = self._open_device(GPIOSPIFlashDevice(cs=cs, clk=clk, mosi=mosi, miso=miso,
+                                                   page_size=page_size, chip_size=chip_size,
+                                                   instruction=flash_instruction.dict))
         if not isinstance(ret, RaspiAckMsg) or not ret.ack:
             raise RuntimeError(ret.data)
 
     def __del__(self):
         try:
-            self._transfer(SPIFlashClose())
+            self.release()
         except AttributeError:
             pass
 
+    def close(self):
+        self._transfer(SPIFlashClose())
+
     def probe(self):
         """Probe spi flash
 
@@ -80,17 +84,18 @@ class GPIOSPIFlash(RaspiWsClient):
         ret = self._transfer(SPIFlashWriteStatus(status=status))
         return ret.data if isinstance(ret, RaspiAckMsg) and ret.ack else False
 
-    def read_chip(self):
+    def read_chip(self, sink=None):
         """Read whole spi flash chip
 
-        :return: flash data
+        :param sink: None or data sink: file object, mmap or callable, flash data will stream to it
+        :return: flash data(sink is None) or read size
         """
-        return self._recv_binary_data(SPIFlashReadChip())
+        return self._recv_binary_data(SPIFlashReadChip(), sink)
 
     def write_chip(self, data, verify=False):
         """Write data to chip
 
-        :param data: spi data
+        :param data: spi data, file path, file object or buffer
         :param verify: verify data after write
         :return: write result
         """
@@ -98,13 +103,15 @@ class GPIOSPIFlash(RaspiWsClient):
         if not self.erase():
             self._error("Erase chip error:{}".format(self.get_error()))
             return False
-        # Second write data to chip
-        if not self.send_binary_data(get_binary_data_header(data, handle="write_chip"), data):
-            self._error("Write chip error:{}".format(self.get_error()))
-            return False
-
-        # Finally verify
-        if verify and hashlib.md5(self.read_chip()).hexdigest() != hashlib.md5(data).hexdigest():
+        # Second write data to chip, stream it block by block do not load whole image
+        with RaspiBinaryStream(data) as stream:
+            if not self.send_binary_stream(stream, handle="write_chip"):
+                self._error("Write chip error:{}".format(self.get_error()))
+                return False
+
+        # Finally verify, hash read back data block by block
+        digest = hashlib.md5()
+        if verify and (self.read_chip(digest.update) is None or digest.hexdigest() != stream.md5):
             self._error("Verify error, md5 do not matched")
             return False
 
@@ -2,7 +2,7 @@
 import os
 from PIL import Image
 from .client import RaspiWsClient
-from .core import RaspiBaseMsg, RaspiAckMsg, get_binary_data_header
+from .core import RaspiBaseMsg, RaspiAckMsg
 __all__ = ['MmalGraph', 'GraphInit', 'GraphClose', 'GraphProperty']
 
 
@@ -36,7 +36,7 @@ class MmalGraph(RaspiWsClient):
     REDUCE_SIZE_FORMAT = ("BMP",)
     PATH = __name__.split(".")[-1]
 
-    def __init__(self, host, display_num=HDMI, reduce_size=True, timeout=3, verbose=1):
+    def __init__(self, host, display_num=HDMI, reduce_size=True, timeout=3, verbose=1, pool=None):
         """Display a graph on raspberry pi specified monitor
 
         :param host: raspberry pi address
@@ -44,9 +44,10 @@ class MmalGraph(RaspiWsClient):
         :param reduce_size: reduce bmp graph size then transfer
         :param timeout: raspi-io timeout unit second
         :param verbose: verbose message output
+        :param pool: connection pool acquire connection from, None create a dedicated connection
         """
-        super(MmalGraph, self).__init__(host, str(display_num), timeout, verbose)
-        ret = self._transfer(GraphInit(display_num=display_num))
+        super(MmalGraph, self).__init__(host, str(display_num), timeout, verbose, pool)
+        ret = self._open_device(GraphInit(display_num=display_num))
         if not isinstance(ret, RaspiAckMsg) or not ret.ack:
             raise RuntimeError(ret.data)
 
@@ -55,7 +56,7 @@ class MmalGraph(RaspiWsClient):
 
     def __del__(self):
         try:
-            self.close()
+            self.release()
         except AttributeError:
             pass
 
@@ -95,12 +96,8 @@ class MmalGraph(RaspiWsClient):
                 path = png_path
                 fmt = "PNG"
 
-            # Read data to memory
-            with open(path, "rb") as fp:
-                data = fp.read()
-
-            # First transfer header info
-            if self.send_binary_data(get_binary_data_header(data, fmt, "open"), data):
+            # Stream file data to server block by block
+            if self.send_binary_stream(u"{}".format(path), fmt, "open"):
                 self.__uri = path
                 return True
             else:
@@ -8,6 +8,7 @@ class I2CRead(RaspiBaseMsg):
     READ, IOCTL = 0, 1
     _handle = 'read'
     _properties = {'addr', 'size', 'type'}
+    _binary_ack = True
 
     def __init__(self, **kwargs):
         kwargs.setdefault('type', self.READ)
@@ -42,7 +43,7 @@ class I2C(RaspiWsClient):
     PATH = __name__.split(".")[-1]
 
     def __init__(self, host, bus, device_address, tenbit=0, flags=0, delay=5, iaddr_bytes=1, page_bytes=8,
-                 timeout=1, verbose=1):
+                 timeout=1, verbose=1, pool=None):
         """Init a i2c instance
 
         :param host: raspi-io server address
@@ -55,15 +56,23 @@ class I2C(RaspiWsClient):
         :param page_bytes: i2c max number of bytes per page
         :param timeout: raspi-io timeout unit second
         :param verbose: verbose message output
+        :param pool: connection pool acquire connection from, None create a dedicated connection
         """
-        super(I2C, self).__init__(host, bus, timeout, verbose)
-        ret = self._transfer(I2CDevice(bus=bus, addr=device_address,
-                                       tenbit=tenbit, flags=flags, delay=delay,
-                                       iaddr_bytes=iaddr_bytes, page_bytes=page_bytes))
+        super(I2C, self).__init__(host, bus, timeout, verbose, pool)
+        ret = self._open_device(I2CDevice(bus=bus, addr=device_address,
+                                          tenbit=tenbit, flags=flags, delay=delay,
+                                          iaddr_bytes=iaddr_bytes, page_bytes=page_bytes))
 
         if not isinstance(ret, RaspiAckMsg) or not ret.ack:
             raise RuntimeError(ret.data)
 
+    def _read_result(self, ret):
+        return self._decode_payload(ret.data) if isinstance(ret, RaspiAckMsg) and ret.ack else ""
+
+    @staticmethod
+    def _write_result(ret):
+        return ret.data if isinstance(ret, RaspiAckMsg) and ret.ack else -1
+
     def read(self, address, size):
         """Read data from i2c
 
@@ -71,8 +80,7 @@ class I2C(RaspiWsClient):
         :param size: read size(bytes)
         :return: success return read data(bytes) else ""
         """
-        ret = self._transfer(I2CRead(addr=address, size=size))
-        return self.decode_binary(ret.data) if isinstance(ret, RaspiAckMsg) and ret.ack else ""
+        return self._read_result(self._transfer(I2CRead(addr=address, size=size)))
 
     def write(self, address, data):
         """Write data to specific address
@@ -81,8 +89,7 @@ class I2C(RaspiWsClient):
         :param data: data to write(Python2,3 both can using ctypes, python3 using bytes)
         :return: success return write data size else -1
         """
-        ret = self._transfer(I2CWrite(addr=address, data=self.encode_binary(data)))
-        return ret.data if isinstance(ret, RaspiAckMsg) and ret.ack else -1
+        return self._write_result(self._transfer(I2CWrite(addr=address, data=self._encode_payload(data))))
 
     def ioctl_read(self, address, size):
         """Using ioctl read data from i2c
@@ -91,8 +98,7 @@ class I2C(RaspiWsClient):
         :param size: read size(bytes)
         :return: success return read data size else -1
         """
-        ret = self._transfer(I2CRead(addr=address, size=size, type=I2CRead.IOCTL))
-        return self.decode_binary(ret.data) if isinstance(ret, RaspiAckMsg) and ret.ack else ""
+        return self._read_result(self._transfer(I2CRead(addr=address, size=size, type=I2CRead.IOCTL)))
 
     def ioctl_write(self, address, data):
         """Using ioctl write data to specific address
@@ -101,5 +107,45 @@ class I2C(RaspiWsClient):
         :param data: data to write
         :return: success return write data size else -1
         """
-        ret = self._transfer(I2CWrite(addr=address, data=self.encode_binary(data), type=I2CWrite.IOCTL))
-        return ret.data if isinstance(ret, RaspiAckMsg) and ret.ack else -1
+        return self._write_result(self._transfer(I2CWrite(addr=address, data=self._encode_payload(data),
+                                                          type=I2CWrite.IOCTL)))
+
+    def read_async(self, address, size):
+        """Same as read, but do not wait the result
+
+        Requests are sent immediately, acks are received by client reader thread,
+        issue several requests then wait results overlap the network round trips
+
+        :param address: i2c device internal address
+        :param size: read size(bytes)
+        :return: concurrent.futures.Future, result same as read
+        """
+        return self._transfer_async(I2CRead(addr=address, size=size), self._read_result)
+
+    def write_async(self, address, data):
+        """Same as write, but do not wait the result
+
+        :param address: i2c internal address
+        :param data: data to write
+        :return: concurrent.futures.Future, result same as write
+        """
+        return self._transfer_async(I2CWrite(addr=address, data=self._encode_payload(data)), self._write_result)
+
+    def ioctl_read_async(self, address, size):
+        """Same as ioctl_read, but do not wait the result
+
+        :param address: i2c device internal address
+        :param size: read size(bytes)
+        :return: concurrent.futures.Future, result same as ioctl_read
+        """
+        return self._transfer_async(I2CRead(addr=address, size=size, type=I2CRead.IOCTL), self._read_result)
+
+    def ioctl_write_async(self, address, data):
+        """Same as ioctl_write, but do not wait the result
+
+        :param address: i2c internal address
+        :param data: data to write
+        :return: concurrent.futures.Future, result same as ioctl_write
+        """
+        return self._transfer_async(I2CWrite(addr=address, data=self._encode_payload(data), type=I2CWrite.IOCTL),
+                                    self._write_result)
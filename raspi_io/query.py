@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 from .version import version
 from .client import RaspiWsClient
-from .core import RaspiBaseMsg, RaspiAckMsg
+from .core import RaspiBaseMsg, RaspiAckMsg, CLIENT_FEATURES
 __all__ = ['Query', 'QueryDevice', 'QueryHardware', 'QueryVersion', 'RebootSystem']
 
 
@@ -33,13 +33,29 @@ class QueryDevice(RaspiBaseMsg):
 
 class QueryVersion(RaspiBaseMsg):
     _handle = 'query_version'
-    _properties = {'server', 'client'}
+    _properties = {'server', 'client', 'features'}
 
     def __init__(self, **kwargs):
         kwargs.setdefault('server', '')
         kwargs.setdefault('client', version)
+        kwargs.setdefault('features', list(CLIENT_FEATURES))
         super(QueryVersion, self).__init__(**kwargs)
 
+    @staticmethod
+    def get_features(data):
+        """Get server accepted features from query version ack data
+
+        Server support features negotiation will return a dict include 'features',
+        older server only return version, it means no feature supported
+
+        :param data: query version ack data
+        :return: server accepted features set
+        """
+        if not isinstance(data, dict):
+            return set()
+
+        return set(data.get('features') or []) & set(CLIENT_FEATURES)
+
 
 class RebootSystem(RaspiBaseMsg):
     _handle = 'reboot'
@@ -49,8 +65,8 @@ class RebootSystem(RaspiBaseMsg):
 class Query(RaspiWsClient):
     PATH = __name__.split(".")[-1]
 
-    def __init__(self, host, timeout=1, verbose=1):
-        super(Query, self).__init__(host, self.PATH, timeout, verbose)
+    def __init__(self, host, timeout=1, verbose=1, pool=None):
+        super(Query, self).__init__(host, self.PATH, timeout, verbose, pool)
 
     def basic_query(self, query):
         ret = self._transfer(query)
@@ -59,6 +75,13 @@ class Query(RaspiWsClient):
     def get_version(self):
         return self.basic_query(QueryVersion())
 
+    def get_features(self):
+        """Negotiate optional protocol features with server
+
+        :return: features both client and server supported
+        """
+        return QueryVersion.get_features(self.get_version())
+
     def get_hardware_info(self):
         """Query raspi hardware info
 
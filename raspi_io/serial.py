@@ -26,6 +26,7 @@ class SerialClose(RaspiAckMsg):
 class SerialRead(RaspiBaseMsg):
     _handle = 'read'
     _properties = {'size'}
+    _binary_ack = True
 
     def __init__(self, **kwargs):
         super(SerialRead, self).__init__(**kwargs)
@@ -61,7 +62,7 @@ class SerialBaudrate(RaspiBaseMsg):
 class Serial(RaspiWsClient):
     PATH = __name__.split(".")[-1]
 
-    def __init__(self, host, port, baudrate, bytesize=8, parity='N', stopbits=1, timeout=1, verbose=1):
+    def __init__(self, host, port, baudrate, bytesize=8, parity='N', stopbits=1, timeout=1, verbose=1, pool=None):
         """Raspi Ws Serial
 
         :param host: raspi io server address
@@ -71,13 +72,15 @@ class Serial(RaspiWsClient):
         :param parity: serial port parity
         :param stopbits:serial port stopbits
         :param timeout: serial port read timeout
+        :param verbose: verbose message output
+        :param pool: connection pool acquire connection from, None create a dedicated connection
         """
         socket_timeout = timeout * 2 or 1
-        super(Serial, self).__init__(host, port, socket_timeout, verbose)
+        super(Serial, self).__init__(host, port, socket_timeout, verbose, pool)
         self.__port = port
         self.__opened = False
         self.__baudrate = baudrate
-        ret = self._transfer(SerialInit(
+        ret = self._open_device(SerialInit(
             port=port, baudrate=baudrate, bytesize=bytesize, parity=parity, stopbits=stopbits, timeout=timeout))
         self.__opened = ret.ack if isinstance(ret, RaspiAckMsg) else False
         if not self.is_open:
@@ -85,7 +88,7 @@ class Serial(RaspiWsClient):
 
     def __del__(self):
         try:
-            self.close()
+            self.release()
         except AttributeError:
             pass
 
@@ -121,7 +124,7 @@ class Serial(RaspiWsClient):
         :return: result, data or error
         """
         ret = self._transfer(SerialRead(size=size))
-        return self.decode_binary(ret.data) if isinstance(ret, RaspiAckMsg) and ret.ack else bytes()
+        return self._decode_payload(ret.data) if isinstance(ret, RaspiAckMsg) and ret.ack else bytes()
 
     def write(self, data):
         """Write data to serial port
@@ -130,7 +133,7 @@ class Serial(RaspiWsClient):
         :return: result, error or write length
         """
         data = to_bytes(data)
-        ret = self._transfer(SerialWrite(data=self.encode_binary(data)))
+        ret = self._transfer(SerialWrite(data=self._encode_payload(data)))
         return ret.data if isinstance(ret, RaspiAckMsg) and ret.ack else -1
 
     def flush(self):
@@ -1,7 +1,22 @@
 # -*- coding: utf-8 -*-
+import json
+import time
+import struct
+import socket
+import weakref
+import threading
+import traceback
+import websocket
+import collections
 from .client import RaspiWsClient
-from .core import RaspiBaseMsg, RaspiAckMsg
-__all__ = ['SPIDevice', 'SPIClose', 'SPIRead', 'SPIWrite', 'SPIXfer', 'SPIXfer2', 'SPI']
+from .core import RaspiBaseMsg, RaspiAckMsg, RaspiMsgDecodeError, RaspiSocketError
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+__all__ = ['SPIDevice', 'SPIClose', 'SPIRead', 'SPIWrite', 'SPIXfer', 'SPIXfer2', 'SPISegment', 'SPITransfer',
+           'SPIStreamStart', 'SPIStreamStop', 'SPIStream', 'SPI']
 
 
 class SPIDevice(RaspiBaseMsg):
@@ -23,6 +38,7 @@ class SPIClose(RaspiBaseMsg):
 class SPIRead(RaspiBaseMsg):
     _handle = 'read'
     _properties = {'size'}
+    _binary_ack = True
 
     def __init__(self, **kwargs):
         super(SPIRead, self).__init__(**kwargs)
@@ -39,6 +55,7 @@ class SPIWrite(RaspiBaseMsg):
 class SPIXfer(RaspiBaseMsg):
     _handle = 'xfer'
     _properties = {'write_data', 'read_size', 'speed', 'delay'}
+    _binary_ack = True
 
     def __init__(self, **kwargs):
         super(SPIXfer, self).__init__(**kwargs)
@@ -51,11 +68,329 @@ class SPIXfer2(SPIXfer):
         super(SPIXfer2, self).__init__(**kwargs)
 
 
+class SPISegment(collections.namedtuple('SPISegment', 'write_data read_size speed delay bits_per_word cs_change')):
+    __slots__ = ()
+
+    def __new__(cls, write_data=b"", read_size=0, speed=0, delay=0, bits_per_word=0, cs_change=False):
+        """One spi_ioc_transfer of a SPITransfer
+
+        :param write_data: data write to spi
+        :param read_size: read size, first read_size bytes clocked in during this segment
+        :param speed: speed in hz, 0 using device default
+        :param delay: delay in usec after this segment
+        :param bits_per_word: bits per word, 0 using device default
+        :param cs_change: deselect chip select after this segment
+        """
+        return super(SPISegment, cls).__new__(cls, bytearray(write_data), read_size, speed, delay,
+                                              bits_per_word, bool(cs_change))
+
+    @classmethod
+    def make(cls, segment):
+        """Create from SPISegment, dict or (write_data, read_size, ...) tuple"""
+        if isinstance(segment, cls):
+            return segment
+
+        return cls(**segment) if isinstance(segment, dict) else cls(*segment)
+
+    def check(self):
+        if self.read_size < 0 or self.speed < 0:
+            raise ValueError("read_size and speed must be non-negative: {!r}".format(self))
+
+        if not 0 <= self.delay <= 0xffff:
+            raise ValueError("delay must between 0 and 65535: {!r}".format(self))
+
+        if not 0 <= self.bits_per_word <= 32:
+            raise ValueError("bits_per_word must between 0 and 32: {!r}".format(self))
+
+        return True
+
+
+class SPITransfer(RaspiBaseMsg):
+    """Multi segments executed as one SPI_IOC_MESSAGE ioctl
+
+    write_data: write data of all segments concatenated
+    segments: [write_size, read_size, speed, delay, bits_per_word, cs_change] list
+    ack data: read data of all segments concatenated
+    """
+    _handle = 'transfer'
+    _properties = {'write_data', 'segments'}
+    _binary_ack = True
+
+    def __init__(self, **kwargs):
+        super(SPITransfer, self).__init__(**kwargs)
+
+    @staticmethod
+    def pack_segments(segments):
+        """Check segments and concatenate write data
+
+        :param segments: SPISegment, dict or tuple list
+        :return: SPISegment list, concatenated write data, segments field
+        """
+        segments = [SPISegment.make(segment) for segment in segments]
+        [segment.check() for segment in segments]
+
+        write_data = bytearray()
+        for segment in segments:
+            write_data += segment.write_data
+
+        return segments, write_data, [[len(segment.write_data), segment.read_size, segment.speed, segment.delay,
+                                       segment.bits_per_word, segment.cs_change] for segment in segments]
+
+    @staticmethod
+    def split_read_data(segments, data):
+        """Split concatenated read data to each segment
+
+        :param segments: SPISegment list
+        :param data: concatenated read data
+        :return: memoryview list, size mismatch raise ValueError
+        """
+        data = memoryview(data)
+        if len(data) != sum(segment.read_size for segment in segments):
+            raise ValueError("transfer read size mismatch: {}".format(len(data)))
+
+        result, pos = list(), 0
+        for segment in segments:
+            result.append(data[pos:pos + segment.read_size])
+            pos += segment.read_size
+
+        return result
+
+
+class SPIStreamStart(RaspiBaseMsg):
+    """Server repeat a fixed transfer at a fixed rate into a ring buffer, push sample blocks to this connection
+
+    write_data: template transfer write data
+    read_size: read bytes of each transfer (one sample)
+    rate: transfers per second
+    samples: samples of each pushed block
+
+    pushed block: binary frame, SPI_STREAM_BLOCK_HEADER(sequence, server overruns) + samples * read_size bytes
+    """
+    _handle = 'stream_start'
+    _properties = {'write_data', 'read_size', 'rate', 'samples'}
+
+    def __init__(self, **kwargs):
+        super(SPIStreamStart, self).__init__(**kwargs)
+
+    def check(self):
+        if self.read_size < 1:
+            raise ValueError("read_size must be a positive integer: {!r}".format(self.read_size))
+
+        if not isinstance(self.rate, (int, float)) or self.rate <= 0:
+            raise ValueError("rate must be a positive number: {!r}".format(self.rate))
+
+        if not isinstance(self.samples, int) or self.samples < 1:
+            raise ValueError("samples must be a positive integer: {!r}".format(self.samples))
+
+        return True
+
+
+class SPIStreamStop(RaspiBaseMsg):
+    _handle = 'stream_stop'
+    _properties = set()
+
+    def __init__(self, **kwargs):
+        super(SPIStreamStop, self).__init__(**kwargs)
+
+
+# Pushed sample block header: sequence, overruns(samples server dropped since stream started)
+SPI_STREAM_BLOCK_HEADER = struct.Struct('>II')
+
+
+class SPIStream(object):
+    # Interval reader thread check it is stopped or not
+    POLL_INTERVAL = 0.5
+
+    def __init__(self, ws, device, start, capacity=64, callback=None):
+        """Receive server pushed sample blocks from a dedicated connection
+
+        Blocks are put in a ring buffer, oldest block is dropped when it is full,
+        or passed to callback in reader thread if callback is specified
+
+        :param ws: dedicated websocket connection, stream own it
+        :param device: SPIDevice, open device on the dedicated connection
+        :param start: SPIStreamStart
+        :param capacity: ring buffer capacity in blocks
+        :param callback: callback(block), called in reader thread
+        """
+        self.__ws = ws
+        self.__thread = None
+        self.__device = device.device
+        self.__read_size = start.read_size
+        self.__callback = callback
+        self.__running = True
+        self.__blocks = collections.deque()
+        self.__capacity = capacity
+        self.__condition = threading.Condition()
+
+        self.received = 0
+        self.overruns = 0
+        self.dropped = 0
+        self.lost = 0
+        self.__sequence = None
+
+        try:
+            for msg in (device, start):
+                ws.send(msg.dumps())
+                ack = RaspiAckMsg(**json.loads(ws.recv()))
+                if not ack.ack:
+                    raise RuntimeError(ack.data)
+            ws.settimeout(self.POLL_INTERVAL)
+        except (ValueError, RuntimeError, RaspiMsgDecodeError, socket.error, websocket.WebSocketException) as err:
+            ws.close()
+            raise RaspiSocketError("Start spi stream error: {}".format(err))
+
+        # Reader thread only keep a weak reference, stream never stopped still can be collected and stopped
+        self.__thread = threading.Thread(target=SPIStream.__receive, args=(weakref.ref(self), ws), name="SPIStream")
+        self.__thread.daemon = True
+        self.__thread.start()
+
+    def __del__(self):
+        try:
+            self.stop()
+        except AttributeError:
+            pass
+
+    def __iter__(self):
+        while True:
+            block = self.read()
+            if block is None:
+                return
+
+            yield block
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    @property
+    def running(self):
+        return self.__running
+
+    @property
+    def pending(self):
+        with self.__condition:
+            return len(self.__blocks)
+
+    def __samples(self, data):
+        if numpy is not None:
+            return numpy.frombuffer(data, dtype=numpy.uint8).reshape(-1, self.__read_size)
+
+        return memoryview(data)
+
+    def read(self, timeout=None):
+        """Read next sample block from ring buffer
+
+        :param timeout: timeout in seconds, None wait forever
+        :return: (samples, read_size) numpy uint8 array, if numpy is not installed flat memoryview,
+                 timeout or stream stopped return None
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        with self.__condition:
+            while not self.__blocks:
+                remain = None if deadline is None else deadline - time.time()
+                if not self.__running or (remain is not None and remain <= 0):
+                    return None
+
+                self.__condition.wait(remain)
+
+            return self.__blocks.popleft()
+
+    @staticmethod
+    def __receive(ref, ws):
+        while True:
+            stream = ref()
+            if stream is None or not stream.running:
+                return
+
+            # Do not hold stream while waiting data
+            del stream
+            try:
+                data = ws.recv()
+            except websocket.WebSocketTimeoutException:
+                continue
+            except (socket.error, websocket.WebSocketException):
+                data = None
+
+            stream = ref()
+            if stream is None:
+                return
+
+            if not data:
+                stream.__finish()
+                return
+
+            stream.__dispatch(data)
+            del stream
+
+    def __finish(self):
+        with self.__condition:
+            self.__running = False
+            self.__condition.notify_all()
+
+    def __dispatch(self, data):
+        # Text frame is server notify, such as stream error
+        if not isinstance(data, (bytes, bytearray)) or len(data) < SPI_STREAM_BLOCK_HEADER.size:
+            return
+
+        sequence, overruns = SPI_STREAM_BLOCK_HEADER.unpack_from(data)
+        block = self.__samples(bytearray(data[SPI_STREAM_BLOCK_HEADER.size:]))
+
+        with self.__condition:
+            self.received += 1
+            self.overruns = overruns
+            if self.__sequence is not None and sequence != self.__sequence + 1:
+                self.lost += sequence - self.__sequence - 1
+
+            self.__sequence = sequence
+            if self.__callback is None:
+                if len(self.__blocks) >= self.__capacity:
+                    self.__blocks.popleft()
+                    self.dropped += 1
+
+                self.__blocks.append(block)
+                self.__condition.notify_all()
+
+        if self.__callback is not None:
+            try:
+                self.__callback(block)
+            except Exception:
+                traceback.print_exc()
+
+    def stop(self):
+        """Stop stream and close its connection, blocks already in ring buffer still can be read"""
+        if self.__thread is None:
+            return
+
+        thread, self.__thread = self.__thread, None
+        self.__finish()
+        try:
+            self.__ws.send(SPIStreamStop().dumps())
+        except (socket.error, websocket.WebSocketException):
+            pass
+
+        # Reader thread exit in POLL_INTERVAL after stopped
+        if thread is not threading.current_thread():
+            thread.join(self.POLL_INTERVAL * 2)
+
+        try:
+            if thread.is_alive() and thread is not threading.current_thread():
+                # Reader thread is stuck (such as in callback), close socket directly instead of close handshake
+                self.__ws.shutdown()
+            else:
+                self.__ws.send(SPIClose(device=self.__device).dumps())
+                self.__ws.close()
+        except (socket.error, websocket.WebSocketException):
+            self.__ws.shutdown()
+
+
 class SPI(RaspiWsClient):
     PATH = __name__.split(".")[-1]
 
-    def __init__(self, host, device, max_speed=50,
-                 mode=0, cshigh=False, no_cs=False, loop=False, lsbfirst=False, threewire=False, timeout=1, verbose=1):
+    def __init__(self, host, device, max_speed=50, mode=0, cshigh=False, no_cs=False, loop=False, lsbfirst=False,
+                 threewire=False, timeout=1, verbose=1, pool=None):
         """
 
         :param host: raspi-io server address
@@ -63,18 +398,21 @@ class SPI(RaspiWsClient):
         :param max_speed: spi max speed unit khz, 8000 = 8Mhz
         :param mode: SPI mode as two bit pattern of clock polarity and phase [CPOL|CPHA], min: 0b00 = 0, max: 0b11 = 3
         :param cshigh:
-        :param no_cs: Set the "SPI_NO_CS" flag to disable use of the chip select (although the driver may still own the CS pin)
+        :param no_cs: Set the "SPI_NO_CS" flag to disable use of the chip select
+                      (although the driver may still own the CS pin)
         :param loop: Set the "SPI_LOOP" flag to enable loopback mode
         :param lsbfirst: LSB first
         :param threewire: SI/SO signals shared
         :param timeout: raspi-io timeout unit second
         :param verbose: verbose message output
+        :param pool: connection pool acquire connection from, None create a dedicated connection
         """
-        super(SPI, self).__init__(host, device, timeout, verbose)
+        super(SPI, self).__init__(host, device, timeout, verbose, pool)
         self.__opened = False
         self.__device = device
-        ret = self._transfer(SPIDevice(device=device, max_speed=max_speed, mode=mode, cshigh=cshigh,
-                                       no_cs=no_cs, loop=loop, lsbfirst=lsbfirst, threewire=threewire))
+        self.__settings = SPIDevice(device=device, max_speed=max_speed, mode=mode, cshigh=cshigh,
+                                    no_cs=no_cs, loop=loop, lsbfirst=lsbfirst, threewire=threewire)
+        ret = self._open_device(self.__settings)
 
         self.__opened = ret.ack if isinstance(ret, RaspiAckMsg) else False
         if not self.__opened:
@@ -82,19 +420,39 @@ class SPI(RaspiWsClient):
 
     def __del__(self):
         try:
-            if self.__opened:
-                self._transfer(SPIClose(device=self.__device))
+            self.release()
         except AttributeError:
             pass
 
+    def close(self):
+        if self.__opened:
+            self._transfer(SPIClose(device=self.__device))
+            self.__opened = False
+
+    def _read_result(self, ret):
+        return self._decode_payload(ret.data) if isinstance(ret, RaspiAckMsg) and ret.ack else ""
+
+    @staticmethod
+    def _write_result(ret):
+        return ret.data if isinstance(ret, RaspiAckMsg) and ret.ack else -1
+
+    def _transfer_result(self, segments, ret):
+        if not isinstance(ret, RaspiAckMsg) or not ret.ack:
+            return None
+
+        try:
+            return SPITransfer.split_read_data(segments, self._decode_payload(ret.data))
+        except ValueError as err:
+            self._error("{}".format(err))
+            return None
+
     def read(self, size):
         """Read specify bytes data from spi
 
         :param size: read size
         :return: data
         """
-        ret = self._transfer(SPIRead(size=size))
-        return self.decode_binary(ret.data) if isinstance(ret, RaspiAckMsg) and ret.ack else ""
+        return self._read_result(self._transfer(SPIRead(size=size)))
 
     def write(self, data):
         """Write data to spi
@@ -102,8 +460,7 @@ class SPI(RaspiWsClient):
         :param data: data to write
         :return: write data size
         """
-        ret = self._transfer(SPIWrite(data=self.encode_binary(data)))
-        return ret.data if isinstance(ret, RaspiAckMsg) and ret.ack else -1
+        return self._write_result(self._transfer(SPIWrite(data=self._encode_payload(data))))
 
     def xfer(self, write_data, read_size, speed=0, delay=0):
         """Performs an SPI transaction. Chip-select should be released and reactivated between blocks
@@ -114,9 +471,8 @@ class SPI(RaspiWsClient):
         :param delay: specifies the delay in usec between blocks.
         :return: read data
         """
-        ret = self._transfer(SPIXfer(write_data=self.encode_binary(write_data),
-                             read_size=read_size, speed=speed, delay=delay))
-        return self.decode_binary(ret.data) if isinstance(ret, RaspiAckMsg) and ret.ack else ""
+        return self._read_result(self._transfer(SPIXfer(write_data=self._encode_payload(write_data),
+                                                        read_size=read_size, speed=speed, delay=delay)))
 
     def xfer2(self, write_data, read_size, speed=0, delay=0):
         """Performs an SPI transaction. Chip-select should be held active between blocks.
@@ -127,6 +483,98 @@ class SPI(RaspiWsClient):
         :param delay: specifies the delay in usec between blocks.
         :return: read data
         """
-        ret = self._transfer(SPIXfer2(write_data=self.encode_binary(write_data),
-                                      read_size=read_size, speed=speed, delay=delay))
-        return self.decode_binary(ret.data) if isinstance(ret, RaspiAckMsg) and ret.ack else ""
+        return self._read_result(self._transfer(SPIXfer2(write_data=self._encode_payload(write_data),
+                                                         read_size=read_size, speed=speed, delay=delay)))
+
+    def transfer(self, segments):
+        """Performs multi segments SPI transaction in one kernel ioctl and one round trip,
+        such as command + address + data phases without chip-select toggled between them
+
+        :param segments: SPISegment, dict or (write_data, read_size, speed, delay, bits_per_word, cs_change) list
+        :return: read data list of each segment (memoryview of one buffer), failed return None
+        """
+        segments, write_data, fields = SPITransfer.pack_segments(segments)
+        ret = self._transfer(SPITransfer(write_data=self._encode_payload(write_data), segments=fields))
+        return self._transfer_result(segments, ret)
+
+    def read_async(self, size):
+        """Same as read, but do not wait the result
+
+        Requests are sent immediately, acks are received by client reader thread,
+        issue several requests then wait results overlap the network round trips:
+
+            futures = [spi.xfer_async([0x01, 0x80 | ch << 4, 0x00], 3) for ch in range(8)]
+            samples = [future.result() for future in futures]
+
+        :param size: read size
+        :return: concurrent.futures.Future, result same as read
+        """
+        return self._transfer_async(SPIRead(size=size), self._read_result)
+
+    def write_async(self, data):
+        """Same as write, but do not wait the result
+
+        :param data: data to write
+        :return: concurrent.futures.Future, result same as write
+        """
+        return self._transfer_async(SPIWrite(data=self._encode_payload(data)), self._write_result)
+
+    def xfer_async(self, write_data, read_size, speed=0, delay=0):
+        """Same as xfer, but do not wait the result
+
+        :param write_data: data will write to spi
+        :param read_size: data will read from spi
+        :param speed: speed
+        :param delay: specifies the delay in usec between blocks.
+        :return: concurrent.futures.Future, result same as xfer
+        """
+        return self._transfer_async(SPIXfer(write_data=self._encode_payload(write_data),
+                                            read_size=read_size, speed=speed, delay=delay), self._read_result)
+
+    def xfer2_async(self, write_data, read_size, speed=0, delay=0):
+        """Same as xfer2, but do not wait the result
+
+        :param write_data: data will write to spi
+        :param read_size: data will read from spi
+        :param speed: speed
+        :param delay: specifies the delay in usec between blocks.
+        :return: concurrent.futures.Future, result same as xfer2
+        """
+        return self._transfer_async(SPIXfer2(write_data=self._encode_payload(write_data),
+                                             read_size=read_size, speed=speed, delay=delay), self._read_result)
+
+    def transfer_async(self, segments):
+        """Same as transfer, but do not wait the result
+
+        :param segments: SPISegment, dict or (write_data, read_size, speed, delay, bits_per_word, cs_change) list
+        :return: concurrent.futures.Future, result same as transfer
+        """
+        segments, write_data, fields = SPITransfer.pack_segments(segments)
+        return self._transfer_async(SPITransfer(write_data=self._encode_payload(write_data), segments=fields),
+                                    lambda ret: self._transfer_result(segments, ret))
+
+    def start_stream(self, template_tx, rx_len, rate_hz, samples=None, capacity=64, callback=None):
+        """Server repeat a fixed transfer at a fixed rate and push sample blocks, such as sampling a spi adc
+
+            with spi.start_stream([0x01, 0x80, 0x00], 3, 10000) as stream:
+                for block in stream:
+                    print(block.shape, stream.overruns, stream.dropped)
+
+        :param template_tx: write data of each transfer
+        :param rx_len: read bytes of each transfer (one sample)
+        :param rate_hz: transfers per second
+        :param samples: samples of each pushed block, default about 20 blocks per second
+        :param capacity: client ring buffer capacity in blocks, oldest block is dropped when it is full
+        :param callback: callback(block) called in stream reader thread instead of put in ring buffer
+        :return: success return SPIStream, failed return None
+        """
+        samples = max(1, int(rate_hz / 20)) if samples is None else samples
+        start = SPIStreamStart(write_data=self.encode_binary(bytearray(template_tx)),
+                               read_size=rx_len, rate=rate_hz, samples=samples)
+        start.check()
+
+        try:
+            return SPIStream(self._open_connection(), self.__settings, start, capacity, callback)
+        except RaspiSocketError as err:
+            self._error("{}".format(err))
+            return None
@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 import hashlib
 from .client import RaspiWsClient
-from .core import RaspiBaseMsg, RaspiAckMsg, get_binary_data_header
+from .core import RaspiBaseMsg, RaspiAckMsg, RaspiBinaryStream
 __all__ = ['SPIFlashInstruction', 'SPIFlashDevice', 'SPIFlashClose',
            'SPIFlashProbe', 'SPIFlashErase', 'SPIFlashReadChip',
            'SPIFlashReadStatus', 'SPIFlashWriteStatus', 'SPIFlash']
@@ -83,7 +83,7 @@ class SPIFlash(RaspiWsClient):
     PATH = __name__.split(".")[-1]
 
     def __init__(self, host, device, speed, page_size, chip_size,
-                 cpol=False, cpha=False, instruction=None, timeout=30, verbose=1):
+                 cpol=False, cpha=False, instruction=None, timeout=30, verbose=1, pool=None):
         """
 
         :param host: raspi-io server address
@@ -96,23 +96,27 @@ class SPIFlash(RaspiWsClient):
         :param instruction: spi flash instruction
         :param timeout: raspi-io timeout unit second
         :param verbose: verbose message output
+        :param pool: connection pool acquire connection from, None create a dedicated connection
         """
         cpol = True if cpol else False
         cpha = True if cpha else False
-        super(SPIFlash, self).__init__(host, device, timeout, verbose)
+        super(SPIFlash, self).__init__(host, device, timeout, verbose, pool)
         flash_instruction = instruction if isinstance(instruction, SPIFlashInstruction) else SPIFlashInstruction()
-        ret = self._transfer(SPIFlashDevice(device=device, speed=speed, cpol=cpol, cpha=cpha,
-                                            page_size=page_size, chip_size=chip_size,
-                                            instruction=flash_instruction.dict))
+        ret = self._open_device(SPIFlashDevice(device=device, speed=speed, cpol=cpol, cpha=cpha,
+                                               page_size=page_size, chip_size=chip_size,
+                                               instruction=flash_instruction.dict))
         if not isinstance(ret, RaspiAckMsg) or not ret.ack:
             raise RuntimeError(ret.data)
 
     def __del__(self):
         try:
-            self._transfer(SPIFlashClose())
+            self.release()
         except AttributeError:
             pass
 
+    def close(self):
+        self._transfer(SPIFlashClose())
+
     def probe(self):
         """Probe spi flash
 
@@ -145,17 +149,18 @@ class SPIFlash(RaspiWsClient):
         ret = self._transfer(SPIFlashWriteStatus(status=status))
         return ret.data if isinstance(ret, RaspiAckMsg) and ret.ack else False
 
-    def read_chip(self):
+    def read_chip(self, sink=None):
         """Read whole spi flash chip
 
-        :return: flash data
+        :param sink: None or data sink: file object, mmap or callable, flash data will stream to it
+        :return: flash data(sink is None) or read size
         """
-        return self._recv_binary_data(SPIFlashReadChip())
+        return self._recv_binary_data(SPIFlashReadChip(), sink)
 
     def write_chip(self, data, verify=False):
         """Write data to chip
 
-        :param data: spi data
+        :param data: spi data, file path, file object or buffer
         :param verify: verify data after write
         :return: write result
         """
@@ -163,13 +168,15 @@ class SPIFlash(RaspiWsClient):
         if not self.erase():
             self._error("Erase chip error:{}".format(self.get_error()))
             return False
-        # Second write data to chip
-        if not self.send_binary_data(get_binary_data_header(data, handle="write_chip"), data):
-            self._error("Write chip error:{}".format(self.get_error()))
-            return False
-
-        # Finally verify
-        if verify and hashlib.md5(self.read_chip()).hexdigest() != hashlib.md5(data).hexdigest():
+        # Second write data to chip, stream it block by block do not load whole image
+        with RaspiBinaryStream(data) as stream:
+            if not self.send_binary_stream(stream, handle="write_chip"):
+                self._error("Write chip error:{}".format(self.get_error()))
+                return False
+
+        # Finally verify, hash read back data block by block
+        digest = hashlib.md5()
+        if verify and (self.read_chip(digest.update) is None or digest.hexdigest() != stream.md5):
             self._error("Verify error, md5 do not matched")
             return False
 
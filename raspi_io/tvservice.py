@@ -45,14 +45,15 @@ class TVService(RaspiWsClient):
     CEA = "CEA"
     PATH = __name__.split(".")[-1]
 
-    def __init__(self, host, timeout=3, verbose=1):
+    def __init__(self, host, timeout=3, verbose=1, pool=None):
         """Init a tv service instance
 
         :param host: raspi-io server address
         :param timeout: raspi-io timeout unit second
         :param verbose: verbose message output
+        :param pool: connection pool acquire connection from, None create a dedicated connection
         """
-        super(TVService, self).__init__(host, self.PATH, timeout, verbose)
+        super(TVService, self).__init__(host, self.PATH, timeout, verbose, pool)
 
     def get_status(self):
         """Get HDMI status
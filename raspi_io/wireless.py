@@ -32,8 +32,8 @@ class BackupConfigure(RaspiBaseMsg):
 class Wireless(RaspiWsClient):
     PATH = __name__.split(".")[-1]
 
-    def __init__(self, host, timeout=1, verbose=1):
-        super(Wireless, self).__init__(host, self.PATH, timeout, verbose)
+    def __init__(self, host, timeout=1, verbose=1, pool=None):
+        super(Wireless, self).__init__(host, self.PATH, timeout, verbose, pool)
 
     def get_networks(self):
         return self.check_result(self._transfer(GetNetworks()))
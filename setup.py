@@ -36,5 +36,6 @@ setuptools.setup(
         'Programming Language :: Python :: 3',
     ],
     packages=packages,
-    install_requires=['websocket_client==0.37', 'pyserial', 'Pillow', 'ipaddr']
+    install_requires=['websocket_client==0.37', 'pyserial', 'Pillow', 'ipaddr'],
+    extras_require={'asyncio': ['websockets>=10.0']}
 )
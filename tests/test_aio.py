@@ -0,0 +1,78 @@
+import io
+import json
+import asyncio
+import hashlib
+import unittest
+from raspi_io.utility import scan_server
+from raspi_io.aio import AsyncGPIO, AsyncQuery, AsyncSPIFlash
+
+
+class FakeAsyncWebSocket(object):
+    def __init__(self):
+        """Fake websocket connection, ack every json request, binary data are recorded"""
+        self.sent = list()
+        self.binary = list()
+
+    async def send(self, data):
+        if isinstance(data, bytes):
+            self.binary.append(data)
+        else:
+            self.sent.append(json.loads(data))
+
+    async def recv(self):
+        return json.dumps({'ack': True, 'data': True, 'handle': ''})
+
+
+class TestAsyncGPIO(unittest.TestCase):
+    def setUp(self):
+        self.address = scan_server(timeout=0.03)[0]
+
+    def run_async(self, coroutine):
+        return asyncio.run(coroutine)
+
+    def test_setmode(self):
+        async def test():
+            async with AsyncGPIO(self.address, verbose=0) as gpio:
+                self.assertEqual(await gpio.setmode(123), False)
+                self.assertEqual(await gpio.setmode(AsyncGPIO.BCM), True)
+
+        self.run_async(test())
+
+    def test_concurrent_input(self):
+        async def test():
+            async with AsyncGPIO(self.address, verbose=0) as gpio:
+                self.assertEqual(await gpio.setup([21, 22], AsyncGPIO.IN), True)
+                result = await asyncio.gather(*[gpio.input(21) for _ in range(16)])
+                self.assertEqual(len(result), 16)
+                self.assertNotIn(None, result)
+
+        self.run_async(test())
+
+    def test_query(self):
+        async def test():
+            async with AsyncQuery(self.address, verbose=0) as query:
+                self.assertIsNotNone(await query.get_version())
+
+        self.run_async(test())
+
+
+class TestAsyncSPIFlash(unittest.TestCase):
+    def test_write_chip(self):
+        data = bytes(range(256)) * 5000
+
+        async def test():
+            flash = AsyncSPIFlash('127.0.0.1', '/dev/spidev0.0', 1, 256, len(data), verbose=0)
+            flash._ws = FakeAsyncWebSocket()
+            self.assertEqual(await flash.write_chip(io.BytesIO(data)), True)
+            return flash._ws
+
+        ws = asyncio.run(test())
+        header = ws.sent[-1]
+        self.assertEqual(header['md5'], hashlib.md5(data).hexdigest())
+        self.assertEqual(header['slices'], len(ws.binary))
+        self.assertGreater(header['slices'], 1)
+        self.assertEqual(b"".join(ws.binary), data)
+
+
+if __name__ == "__main__":
+    unittest.main()
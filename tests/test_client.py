@@ -0,0 +1,467 @@
+import json
+import base64
+import socket
+import time
+import unittest
+import threading
+import websocket
+from raspi_io.gpio import GPIO, GPIOCtrl
+from raspi_io.i2c import I2C, I2CRead
+from raspi_io.core import MUX_FRAME_HEADER, RaspiException, RaspiSocketError, RaspiAckMsg, RaspiBinaryDataHeader, \
+    RaspiBinaryStream, RaspiBinarySink, pack_binary_block, unpack_binary_block
+import raspi_io.client as client_module
+from raspi_io.client import RaspiMuxConnection, RaspiConnectionPool, RaspberryManager, RaspiWsClient
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+
+class FakeMuxWebSocket(object):
+    def __init__(self):
+        """Fake multiplexed connection, acks channel open/close, frames of other channel pushed by test"""
+        self.timeout = None
+        self.connected = True
+        self.frames = queue.Queue()
+
+    def settimeout(self, timeout):
+        self.timeout = timeout
+
+    def push(self, channel, data, delay=0):
+        frame = MUX_FRAME_HEADER.pack(channel, websocket.ABNF.OPCODE_TEXT) + data.encode()
+        if not delay:
+            self.frames.put(frame)
+            return
+
+        timer = threading.Timer(delay, self.frames.put, (frame,))
+        timer.daemon = True
+        timer.start()
+
+    def send_binary(self, frame):
+        channel, _ = MUX_FRAME_HEADER.unpack_from(frame)
+        if channel == RaspiMuxConnection.CONTROL_CHANNEL:
+            msg = json.loads(bytes(frame[MUX_FRAME_HEADER.size:]).decode())
+            ack = msg.get('node') != 'refused'
+            self.push(channel, json.dumps({'ack': ack, 'data': ack, 'handle': msg['handle']}))
+
+    def recv_data(self):
+        try:
+            return websocket.ABNF.OPCODE_BINARY, self.frames.get(timeout=self.timeout)
+        except queue.Empty:
+            raise websocket.WebSocketTimeoutException("timed out")
+
+    def close(self):
+        self.connected = False
+
+
+class FakeWebSocket(object):
+    def __init__(self, frames=()):
+        """Fake websocket connection, recv return scripted frames, timeout when no frame left"""
+        self.timeout = None
+        self.sent = list()
+        self.sent_binary = list()
+        self.connected = True
+        self.frames = list(frames)
+
+    def settimeout(self, timeout):
+        self.timeout = timeout
+
+    def send(self, data):
+        self.sent.append(data)
+
+    def send_binary(self, data):
+        self.sent_binary.append(bytes(data))
+
+    def recv(self):
+        if not self.frames:
+            raise websocket.WebSocketTimeoutException("timed out")
+
+        return self.frames.pop(0)
+
+    def close(self):
+        self.connected = False
+
+
+class FakeAckWebSocket(FakeWebSocket):
+    def __init__(self):
+        """Fake websocket connection, recv wait acks pushed by test until timeout"""
+        super(FakeAckWebSocket, self).__init__()
+        self.acks = queue.Queue()
+
+    def recv(self):
+        try:
+            return self.acks.get(timeout=self.timeout)
+        except queue.Empty:
+            raise websocket.WebSocketTimeoutException("timed out")
+
+
+class TestConnectionPool(unittest.TestCase):
+    def setUp(self):
+        self.ports = list()
+        self.connections = list()
+        self.pool = RaspiConnectionPool('127.0.0.1')
+        patcher = mock.patch('raspi_io.client.create_connection', side_effect=self.connect)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def connect(self, host, path, node, timeout, port=None):
+        if node == 'refused' or port == 'stale':
+            raise RaspiSocketError("connection refused")
+
+        self.ports.append(port)
+        self.connections.append(FakeWebSocket())
+        return self.connections[-1], port or 10000 + len(self.connections)
+
+    def test_reuse(self):
+        ws = self.pool.acquire('gpio', 'gpio', 1)
+        self.pool.release('gpio', 'gpio', ws)
+        self.assertEqual(len(self.pool), 1)
+        self.assertIs(self.pool.acquire('gpio', 'gpio', 3), ws)
+        self.assertEqual((len(self.pool), ws.timeout, len(self.connections)), (0, 3, 1))
+
+        # Closed connection is not pooled, other node do not share connection
+        ws.close()
+        self.pool.release('gpio', 'gpio', ws)
+        self.assertEqual(len(self.pool), 0)
+        self.pool.release('gpio', 'gpio', self.pool.acquire('gpio', 'gpio', 1))
+        self.assertIsNot(self.pool.acquire('i2c', '/dev/i2c-1', 1), ws)
+
+    def test_port_cache(self):
+        self.pool.acquire('gpio', 'gpio', 1)
+        self.pool.acquire('gpio', 'gpio', 1)
+        self.pool.acquire('i2c', '/dev/i2c-1', 1)
+        self.assertEqual(self.ports, [None, 10001, None])
+
+        # Cached port is stale (server restarted), apply for a new one
+        self.pool._RaspiConnectionPool__ports[('gpio', 'gpio')] = 'stale'
+        self.pool.acquire('gpio', 'gpio', 1)
+        self.pool.acquire('gpio', 'gpio', 1)
+        self.assertEqual(self.ports[3:], [None, 10004])
+
+    def test_idle_limit(self):
+        connections = [self.pool.acquire('gpio', 'gpio', 1) for _ in range(RaspiConnectionPool.MAX_IDLE + 2)]
+        for ws in connections:
+            self.pool.release('gpio', 'gpio', ws)
+
+        self.assertEqual(len(self.pool), RaspiConnectionPool.MAX_IDLE)
+        self.assertEqual([ws.connected for ws in connections[-3:]], [True, False, False])
+
+        self.pool.close()
+        self.assertEqual(len(self.pool), 0)
+        self.assertFalse(any(ws.connected for ws in connections))
+
+    def test_warm_up(self):
+        self.assertEqual(self.pool.warm_up([('gpio', 'gpio'), ('i2c', '/dev/i2c-1'), ('spi', 'refused')]), 2)
+        self.assertEqual(len(self.pool), 2)
+
+    def test_manager(self):
+        manager = RaspberryManager('127.0.0.1')
+        self.assertEqual(manager.warm_up(GPIO, (I2C, '/dev/i2c-1')), 2)
+        self.assertEqual(len(manager.pool), 2)
+        self.assertRaises(TypeError, manager.warm_up, (FakeWebSocket, 'gpio'))
+
+        with mock.patch.object(RaspberryManager, 'get_features', return_value=set()):
+            client = manager.create(RaspiWsClient, 'gpio')
+
+        self.assertEqual((len(manager.pool), len(self.connections)), (2, 3))
+        with mock.patch.object(client, 'close') as close:
+            self.assertTrue(manager.release(client))
+            self.assertEqual(len(manager.pool), 3)
+
+            # Device is released on server side only once
+            self.assertFalse(manager.release(client))
+            client.release()
+            self.assertEqual(close.call_count, 1)
+
+    def test_failed_stripe(self):
+        # Connection of a failed stripe may have unread frames, it must be closed not pooled
+        client = RaspiWsClient('127.0.0.1', 'test', pool=self.pool)
+
+        header = RaspiBinaryDataHeader(size=2, md5="", slices=2, format="bin")
+        ack = RaspiAckMsg(ack=True, data=True).dumps()
+        for frames, pooled in (([pack_binary_block(1, b"1"), ack], 1), ([pack_binary_block(1, b"1")], 0)):
+            client._ws.frames = [pack_binary_block(0, b"0"), ack]
+            self.pool.acquire('', 'test', 1).frames = frames
+            self.pool.release('', 'test', self.connections[-1])
+
+            with mock.patch.object(client, '_recv_binary_blocks') as resume:
+                client._recv_binary_stripes(1, header, mock.Mock(blocks=2 if pooled else 1), 2)
+
+            self.assertEqual(len(self.pool), pooled)
+            self.assertEqual(resume.called, not pooled)
+
+
+class TestStripedTransfer(unittest.TestCase):
+    def test_pending_limit(self):
+        # Stripe 1 failed, stripe 0 do not cache blocks beyond the limit, they are resumed later
+        with mock.patch('raspi_io.client.create_connection', side_effect=lambda *args, **kwargs: (FakeWebSocket(), 1)):
+            client = RaspiWsClient('127.0.0.1', 'test', verbose=0)
+            client.STRIPE_PENDING_BLOCKS = 1
+            client._ws.frames = [pack_binary_block(i, b"0") for i in range(0, 8, 2)] + [
+                RaspiAckMsg(ack=True, data=True).dumps()]
+
+            pending = list()
+            recv_data = RaspiBinarySink(8)
+            put = recv_data.put
+            recv_data.put = lambda index, data: pending.append((put(index, data), recv_data.pending))
+
+            header = RaspiBinaryDataHeader(size=8, md5="", slices=8, format="bin")
+            with mock.patch.object(client, '_recv_binary_blocks') as resume:
+                client._recv_binary_stripes(1, header, recv_data, 2)
+
+        self.assertEqual(pending, [(1, 0), (1, 1)])
+        self.assertEqual((recv_data.blocks, recv_data.pending), (1, 0))
+        self.assertTrue(resume.called)
+
+
+class TestBatch(unittest.TestCase):
+    def test_binary_results(self):
+        ws = FakeWebSocket()
+        with mock.patch('raspi_io.client.create_connection', return_value=(ws, None)):
+            client = RaspiWsClient('127.0.0.1', 'test')
+
+        # Batched payload is base64 encoded, results must be decoded same as outside batch
+        client.set_features({'batch'})
+        ws.frames = [json.dumps({'ack': True, 'handle': '', 'data': [
+            {'ack': True, 'handle': '', 'data': str(base64.b64encode(b"\x01\x02"))},
+            {'ack': True, 'handle': '', 'data': True},
+            {'ack': False, 'handle': '', 'data': 'error'},
+        ]})]
+
+        with client.batch() as batch:
+            client._transfer(I2CRead(addr=0x50, size=2))
+            client._transfer(GPIOCtrl(channel=20, value=1))
+            client._transfer(I2CRead(addr=0x51, size=2))
+
+        self.assertEqual(batch.results, [b"\x01\x02", True, None])
+
+
+class TestPipeline(unittest.TestCase):
+    def setUp(self):
+        self.ws = FakeWebSocket()
+        with mock.patch('raspi_io.client.create_connection', return_value=(self.ws, None)):
+            self.client = RaspiWsClient('127.0.0.1', 'test', verbose=0)
+
+        self.client.set_features({'pipeline'})
+        self.client.enable_pipeline(2)
+
+    @staticmethod
+    def ack(rid, data=True):
+        return json.dumps({'ack': True, 'handle': '', 'data': data, 'rid': rid})
+
+    def test_out_of_order(self):
+        # Request ids start from 1, acks are matched by request id not order
+        self.ws.frames = [self.ack(2, 'b'), self.ack(1, 'a'), self.ack(3, 'c')]
+        acks = self.client.transfer_many([GPIOCtrl(channel=c, value=1) for c in range(3)])
+        self.assertEqual([ack.data for ack in acks], ['a', 'b', 'c'])
+        self.assertEqual([json.loads(data)['rid'] for data in self.ws.sent], [1, 2, 3])
+
+    def test_depth(self):
+        # Pipeline is filled up to depth before wait ack
+        sent = list()
+        frames = [self.ack(1), self.ack(2), self.ack(3)]
+
+        def recv():
+            sent.append(len(self.ws.sent))
+            return frames.pop(0)
+
+        self.ws.recv = recv
+        self.assertTrue(all(self.client.transfer_many([GPIOCtrl(channel=c, value=1) for c in range(3)])))
+        self.assertEqual(sent, [2, 3, 3])
+
+    def test_stale_ack(self):
+        # First request timeout, its late ack will be dropped by next request
+        self.assertIsNone(self.client._transfer(GPIOCtrl(channel=1, value=1)))
+        self.ws.frames = [self.ack(1, 'stale'), self.ack(2, 'fresh')]
+        self.assertEqual(self.client._transfer(GPIOCtrl(channel=1, value=0)).data, 'fresh')
+        self.assertEqual(self.ws.frames, [])
+
+        # Ack without request id is an error
+        self.ws.frames = [json.dumps({'ack': True, 'handle': '', 'data': True})]
+        self.assertEqual(self.client.transfer_many([GPIOCtrl(channel=1, value=0)]), [None])
+
+
+class TestAsyncTransfer(unittest.TestCase):
+    def setUp(self):
+        self.ws = FakeAckWebSocket()
+        self.ws.timeout = 0.2
+        with mock.patch('raspi_io.client.create_connection', return_value=(self.ws, None)):
+            self.client = RaspiWsClient('127.0.0.1', 'test', verbose=0)
+
+        self.client.set_features({'pipeline'})
+
+    def push(self, rid, data):
+        self.ws.acks.put(json.dumps({'ack': True, 'handle': '', 'data': data, 'rid': rid}))
+
+    def test_reader(self):
+        futures = [self.client._transfer_async(GPIOCtrl(channel=c, value=1), lambda ack: ack.data) for c in range(2)]
+        self.push(2, 'b')
+        self.push(1, 'a')
+        self.assertEqual([future.result(1) for future in futures], ['a', 'b'])
+
+        # Reader thread exit when no request is pending
+        self.client._wait_async()
+        self.assertIsNone(self.client._RaspiWsClient__reader)
+
+    def test_timeout(self):
+        # Timed out request failed, its late ack is dropped not resolve the next request
+        self.assertIsNone(self.client._transfer_async(GPIOCtrl(channel=1, value=1)).result(1))
+        future = self.client._transfer_async(GPIOCtrl(channel=1, value=0))
+        self.push(1, 'late')
+        self.push(2, 'fresh')
+        self.assertEqual(future.result(1).data, 'fresh')
+
+    def test_without_pipeline(self):
+        # Acks can only be matched in order, transfer synchronously
+        self.client.set_features(set())
+        self.push(None, 'sync')
+        future = self.client._transfer_async(GPIOCtrl(channel=1, value=1))
+        self.assertTrue(future.done())
+        self.assertEqual(future.result().data, 'sync')
+        self.assertIsNone(self.client._RaspiWsClient__reader)
+        self.assertNotIn('rid', json.loads(self.ws.sent[0]))
+
+    def test_without_futures(self):
+        with mock.patch.dict(client_module.__dict__):
+            del client_module.__dict__['concurrent']
+            self.assertRaises(RaspiException, self.client._transfer_async, GPIOCtrl(channel=1, value=1))
+
+
+class TestWindowedTransfer(unittest.TestCase):
+    def test_nack(self):
+        ws = FakeWebSocket()
+        with mock.patch('raspi_io.client.create_connection', return_value=(ws, None)):
+            client = RaspiWsClient('127.0.0.1', 'test', verbose=0)
+
+        progress = list()
+        client.set_progress_callback(lambda transferred, total: progress.append(transferred))
+
+        # Block 1 is corrupt, server ack continue from it after all blocks sent, then it is resent without resume
+        ws.frames = [json.dumps(dict(ack, handle='')) for ack in (
+            {'block': 0, 'ack': True}, {'block': 1, 'ack': False}, {'block': 2, 'ack': True},
+            {'ack': False, 'data': {'block': 1}},
+            {'block': 1, 'ack': True}, {'block': 2, 'ack': True}, {'ack': True, 'data': 'remote.bin'},
+        )]
+
+        data = b"0123456789ab"
+        header = RaspiBinaryDataHeader(size=len(data), md5="", slices=3, format="bin", block_size=4, trailer=False)
+        with mock.patch.object(client.tuner, 'sample') as sample:
+            ack = client._send_binary_blocks('transfer', header, RaspiBinaryStream(data), window=True)
+
+        self.assertEqual(ack.data, 'remote.bin')
+        self.assertEqual(progress, [4, 12, 8, 12])
+        self.assertEqual(sample.call_count, 4)
+        self.assertEqual([unpack_binary_block(frame)[0] for frame in ws.sent_binary], [0, 1, 2, 1, 2])
+        self.assertEqual(len(ws.sent), 1)
+
+    def test_reconnect(self):
+        ws = FakeWebSocket([json.dumps({'ack': True, 'handle': '', 'data': True})])
+        with mock.patch('raspi_io.client.create_connection', return_value=(ws, None)):
+            client = RaspiWsClient('127.0.0.1', 'test', verbose=0)
+            client._open_device(I2CRead(addr=0, size=1))
+
+        # Connection dropped while sending blocks, device is opened on new connection before resume
+        ws.send_binary = mock.Mock(side_effect=socket.error("dropped"))
+        new_ws = FakeWebSocket([json.dumps(dict(ack, handle='')) for ack in (
+            {'ack': True, 'data': True}, {'ack': True, 'data': 1}, {'ack': True, 'data': 'remote.bin'},
+        )])
+
+        data = b"0123456789ab"
+        header = RaspiBinaryDataHeader(size=len(data), md5="", slices=3, format="bin", block_size=4, trailer=False)
+        with mock.patch('raspi_io.client.create_connection', return_value=(new_ws, None)):
+            ack = client._send_binary_blocks('transfer', header, RaspiBinaryStream(data))
+
+        self.assertEqual(ack.data, 'remote.bin')
+        self.assertEqual([json.loads(msg)['handle'] for msg in new_ws.sent], [I2CRead._handle, 'transfer_resume'])
+        self.assertEqual([unpack_binary_block(frame)[0] for frame in new_ws.sent_binary], [1, 2])
+
+        # Device can not be opened again
+        new_ws.frames = [json.dumps({'ack': False, 'handle': '', 'data': 'busy'})]
+        with mock.patch('raspi_io.client.create_connection', return_value=(new_ws, None)):
+            self.assertRaises(RaspiSocketError, client._reconnect)
+
+
+class TestMuxConnection(unittest.TestCase):
+    def setUp(self):
+        self.ws = FakeMuxWebSocket()
+        with mock.patch('raspi_io.client.create_connection', return_value=(self.ws, None)):
+            self.mux = RaspiMuxConnection('127.0.0.1')
+
+    def test_open_close(self):
+        a = self.mux.acquire('gpio', 'gpio', 1)
+        b = self.mux.acquire('i2c', '/dev/i2c-1', 1)
+        self.assertEqual((a.channel, b.channel, len(self.mux)), (1, 2, 2))
+
+        a.close()
+        self.assertEqual(len(self.mux), 1)
+        self.assertRaises(RaspiSocketError, self.mux.acquire, 'spi', 'refused', 1)
+
+        # Closed and refused channel id are reused
+        self.assertEqual(sorted(self.mux.acquire('spi', 'spi', 1).channel for _ in range(3)), [1, 3, 4])
+
+    def test_channel_ids(self):
+        self.mux.MAX_CHANNEL = 2
+        channels = [self.mux.acquire('gpio', 'gpio', 1) for _ in range(2)]
+        self.assertRaises(RaspiSocketError, self.mux.acquire, 'gpio', 'gpio', 1)
+
+        channels[0].close()
+        self.assertEqual(self.mux.acquire('gpio', 'gpio', 1).channel, channels[0].channel)
+
+    def test_demux(self):
+        a = self.mux.acquire('gpio', 'gpio', 1)
+        b = self.mux.acquire('spi', 'spi', 1)
+        self.ws.push(b.channel, "b1")
+        self.ws.push(b.channel, "b2")
+        self.ws.push(a.channel, "a1")
+
+        self.assertEqual(a.recv(), "a1")
+        self.assertEqual(b.recv(), "b1")
+        self.assertEqual(b.recv(), "b2")
+
+    def test_dropped(self):
+        a = self.mux.acquire('gpio', 'gpio', 1)
+        b = self.mux.acquire('spi', 'spi', 1)
+        a.close()
+
+        self.ws.push(a.channel, "a1")
+        self.ws.push(b.channel, "b1")
+        self.assertEqual(b.recv(), "b1")
+        self.assertEqual(self.ws.frames.qsize(), 0)
+
+    def test_timeout(self):
+        a = self.mux.acquire('gpio', 'gpio', 0.1)
+        start = time.time()
+        self.assertRaises(websocket.WebSocketTimeoutException, a.recv)
+        self.assertLess(time.time() - start, 0.5)
+
+    def test_head_of_line(self):
+        # A is receiving with a long timeout, B's frame must not wait A's frame
+        a = self.mux.acquire('gpio', 'gpio', 10)
+        b = self.mux.acquire('spi', 'spi', 10)
+        result = list()
+        thread = threading.Thread(target=lambda: result.append(a.recv()))
+        thread.start()
+        time.sleep(0.05)
+
+        self.ws.push(b.channel, "b1", 0.1)
+        self.ws.push(a.channel, "a1", 1.0)
+        start = time.time()
+        self.assertEqual(b.recv(), "b1")
+        self.assertLess(time.time() - start, 0.5)
+
+        # B waits its own timeout while A is receiving
+        b.settimeout(0.1)
+        self.assertRaises(websocket.WebSocketTimeoutException, b.recv)
+
+        thread.join()
+        self.assertEqual(result, ["a1"])
+
+
+if __name__ == "__main__":
+    unittest.main()
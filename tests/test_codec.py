@@ -0,0 +1,42 @@
+import unittest
+from raspi_io.gpio import GPIOSetup
+from raspi_io.i2c import I2CWrite
+from raspi_io.core import RaspiAckMsg, RaspiMsgDecodeError, FEATURE_BINARY_FRAME, FEATURE_COMPACT_CODEC
+from raspi_io.codec import RaspiJsonCodec, RaspiBinaryFrameCodec, RaspiCompactCodec, get_codec
+
+
+class TestCodec(unittest.TestCase):
+    def setUp(self):
+        self.messages = [
+            GPIOSetup(channel=[20, 21, 300], direction=GPIOSetup.IN).dict,
+            dict(I2CWrite(addr=0x56, data=bytearray(range(256))).dict, rid=123456789),
+            RaspiAckMsg(ack=True, data={'features': ['pipeline'], 'int': -5, 'float': 1.5, 'none': None}).dict,
+            {'handle': 'not a symbol', 'unknown field': u'中文'},
+        ]
+
+    def test_get_codec(self):
+        self.assertIsInstance(get_codec(set()), RaspiJsonCodec)
+        self.assertIsInstance(get_codec({FEATURE_BINARY_FRAME}), RaspiBinaryFrameCodec)
+        self.assertIsInstance(get_codec({FEATURE_BINARY_FRAME, FEATURE_COMPACT_CODEC}), RaspiCompactCodec)
+
+    def test_compact_codec(self):
+        codec = RaspiCompactCodec()
+        for message in self.messages:
+            self.assertEqual(codec.decode(codec.encode(message)), message)
+
+        # Smaller than json
+        message = GPIOSetup(channel=21, direction=GPIOSetup.OUT).dict
+        self.assertLess(len(codec.encode(message)), len(RaspiJsonCodec().encode(message)) // 3)
+
+    def test_binary_frame_codec(self):
+        codec = RaspiBinaryFrameCodec()
+        message = I2CWrite(addr=0x56, data=bytearray(range(16))).dict
+        self.assertEqual(codec.decode(codec.encode(message)), dict(message, binary='data'))
+
+    def test_decode_error(self):
+        for data in (b'', b'\xc0\x05', b'\x00\x01', b'\xc0\x01\x00\x0f'):
+            self.assertRaises(RaspiMsgDecodeError, RaspiCompactCodec().decode, data)
+
+
+if __name__ == "__main__":
+    unittest.main()
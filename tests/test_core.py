@@ -0,0 +1,495 @@
+import io
+import gc
+import json
+import time
+import hashlib
+import unittest
+import tempfile
+import websocket
+from raspi_io.serial import SerialClose
+from raspi_io.spi import SPISegment, SPITransfer, SPIStreamStart, SPIStream, SPIDevice, SPI_STREAM_BLOCK_HEADER
+from raspi_io.gpio import GPIO, SoftSPI, GPIOCtrl, GPIOSetup, GPIOWaveform, GPIOCapture, GPIOCaptureData, \
+    GPIOShadow, GPIOOutputMany, GPIOMeasure, GPIOMeasurement, GPIOEvent, GPIOEventBatch, GPIOSoftPWMProfile
+from raspi_io.core import RaspiAckMsg, RaspiMsgDecodeError, RaspiBinaryStream, RaspiBinarySink, \
+    RaspiTransferTuner, pack_binary_block, unpack_binary_block
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+
+class TestMessage(unittest.TestCase):
+    def test_slots(self):
+        msg = GPIOCtrl(channel=21, value=GPIOCtrl.HIGH)
+        self.assertIn('channel', GPIOCtrl.__slots__)
+        self.assertEqual(msg.channel, 21)
+        self.assertEqual(msg.handle, 'output')
+        self.assertEqual(msg.dict, {'channel': 21, 'value': 1, 'handle': 'output'})
+        self.assertRaises(AttributeError, getattr, msg, 'direction')
+
+    def test_required(self):
+        self.assertRaises(RaspiMsgDecodeError, GPIOCtrl, channel=21)
+        self.assertRaises(RaspiMsgDecodeError, RaspiAckMsg, ack=True, data=None)
+        self.assertEqual(GPIOSetup(channel=21, direction=GPIOSetup.OUT).initial, GPIOCtrl.LOW)
+
+    def test_generated(self):
+        # RaspiAckMsg using generated __init__, SerialClose call it through super() with its own fields
+        self.assertIn('__init__', RaspiAckMsg.__dict__)
+        self.assertEqual(SerialClose(port='/dev/ttyS0').dict, {'port': '/dev/ttyS0', 'handle': 'close'})
+        self.assertRaises(RaspiMsgDecodeError, SerialClose, ack=True, data=1)
+        self.assertRaises(RaspiMsgDecodeError, RaspiAckMsg, data=1)
+        self.assertEqual(RaspiAckMsg(ack=False, data="", handle='read').dumps(),
+                         '{"ack": false, "data": "", "handle": "read"}')
+
+    def test_extra_fields(self):
+        ack = RaspiAckMsg(ack=True, data=1, rid=3)
+        self.assertEqual(ack.request_id, 3)
+        self.assertEqual(ack.dict, {'ack': True, 'data': 1, 'handle': '', 'rid': 3})
+        self.assertEqual(SerialClose(port='/dev/ttyS0', ack=True).dict,
+                         {'port': '/dev/ttyS0', 'ack': True, 'handle': 'close'})
+
+    def test_equality(self):
+        self.assertEqual(GPIOCtrl(channel=21, value=1), GPIOCtrl(channel=21, value=1))
+        self.assertNotEqual(GPIOCtrl(channel=21, value=1), GPIOCtrl(channel=21, value=0))
+        self.assertNotEqual(GPIOCtrl(channel=21, value=1), GPIOCtrl(channel=21, value=1, rid=1))
+        self.assertEqual(list(GPIOCtrl(channel=21, value=1)), ['channel', 'handle', 'value'])
+        self.assertEqual(sorted(GPIOCtrl.properties()), ['channel', 'value'])
+
+    def test_waveform(self):
+        waveform = GPIOWaveform(steps=[(0, 21, 1), (10, 21, 0), (500000, 21, 1)], repeat=2)
+        self.assertEqual(waveform.check(), True)
+        self.assertEqual(waveform.steps[1], [10, 21, 0])
+        self.assertEqual(waveform.duration, 1.0)
+        self.assertRaises(ValueError, GPIOWaveform(steps=[(10, 21, 1), (0, 21, 0)]).check)
+        self.assertRaises(ValueError, GPIOWaveform(steps=[(0, 21, 2)]).check)
+        self.assertRaises(ValueError, GPIOWaveform(steps=[(0, 21)]).check)
+        self.assertRaises(ValueError, GPIOWaveform(steps=[], repeat=0).check)
+
+    def test_pwm_profile(self):
+        profile = GPIOSoftPWMProfile(uuid=['a', 'b'], steps=[(0, 100), ([50, 100], 200), (100, 200)], repeat=2)
+        self.assertEqual(profile.check(), True)
+        self.assertEqual(profile.duration, 1.0)
+        self.assertRaises(ValueError, GPIOSoftPWMProfile(uuid=['a'], steps=[]).check)
+        self.assertRaises(ValueError, GPIOSoftPWMProfile(uuid=['a'], steps=[(101, 10)]).check)
+        self.assertRaises(ValueError, GPIOSoftPWMProfile(uuid=['a'], steps=[(50, -1)]).check)
+        self.assertRaises(ValueError, GPIOSoftPWMProfile(uuid=['a'], steps=[([50, 60], 10)]).check)
+
+    def test_capture(self):
+        capture = GPIOCapture(channel=(20, 21), rate=1000, samples=500)
+        self.assertEqual(capture.check(), True)
+        self.assertEqual(capture.duration, 0.5)
+        self.assertEqual(GPIOCapture.sample_width(8), 1)
+        self.assertEqual(GPIOCapture.sample_width(9), 2)
+        self.assertEqual(GPIOCapture.sample_width(33), 8)
+        self.assertRaises(ValueError, GPIOCapture.sample_width, 65)
+        self.assertRaises(ValueError, GPIOCapture(channel=[], rate=1000, samples=1).check)
+        self.assertRaises(ValueError, GPIOCapture(channel=[21, 21], rate=1000, samples=1).check)
+        self.assertRaises(ValueError, GPIOCapture(channel=[21], rate=0, samples=1).check)
+        self.assertRaises(ValueError, GPIOCapture(channel=[21], rate=1000, samples=0).check)
+
+        data = GPIOCaptureData(range(9), 1000, bytearray([0x01, 0x01, 0x02, 0x00, 0xff, 0x01]))
+        self.assertEqual(data.width, 2)
+        self.assertEqual(len(data), 3)
+        self.assertEqual(list(data.words()), [0x101, 0x002, 0x1ff])
+        self.assertEqual(list(data.bits(0)), [1, 0, 1])
+        self.assertEqual(list(data.bits(8)), [1, 0, 1])
+        self.assertRaises(ValueError, data.bits, 9)
+        self.assertRaises(ValueError, GPIOCaptureData, range(9), 1000, bytearray(3))
+
+    def test_event(self):
+        event = GPIOEvent(channel=21, edge=GPIOEvent.BOTH, bouncetime=20)
+        self.assertEqual(event.check(), True)
+        self.assertEqual(event.coalesce, 0)
+        self.assertRaises(ValueError, GPIOEvent(channel=21, edge=0).check)
+        self.assertRaises(ValueError, GPIOEvent(channel=21, edge=GPIOEvent.RISING, glitch=-1).check)
+
+        batch = GPIOEventBatch(channel=21, edges=[[GPIOEvent.RISING, 1.0], [GPIOEvent.FALLING, 1.5]])
+        self.assertEqual([(e.channel, e.edge, e.timestamp) for e in batch.events],
+                         [(21, GPIOEvent.RISING, 1.0), (21, GPIOEvent.FALLING, 1.5)])
+
+    def test_measure(self):
+        self.assertEqual(GPIOMeasure(channel=21, window=1).check(), True)
+        self.assertRaises(ValueError, GPIOMeasure(channel=21, window=1, mode=0).check)
+        self.assertRaises(ValueError, GPIOMeasure(channel=21, window=0).check)
+        self.assertRaises(ValueError, GPIOMeasure(channel=21, window=1, bins=0).check)
+        self.assertRaises(ValueError, GPIOMeasure(channel=21, window=1, mode=GPIOMeasure.PULSE_WIDTH,
+                                                  edge=GPIOEvent.BOTH).check)
+
+        result = GPIOMeasurement(GPIOMeasure.PERIOD, 1, {'count': 4, 'min': 900, 'max': 1100, 'mean': 1000,
+                                                           'histogram': [1, 2, 1, 0]})
+        self.assertEqual(result.frequency, 1000.0)
+        self.assertEqual(result.bin_edges, [900, 950, 1000, 1050, 1100])
+        self.assertEqual(GPIOMeasurement(GPIOMeasure.COUNT, 0.5, {'count': 50}).frequency, 100.0)
+
+        # BOTH edges intervals are half periods, two edges counted each cycle
+        self.assertEqual(GPIOMeasurement(GPIOMeasure.PERIOD, 1, {'count': 8, 'mean': 500}, GPIOEvent.BOTH).frequency,
+                         1000.0)
+        self.assertEqual(GPIOMeasurement(GPIOMeasure.COUNT, 0.5, {'count': 100}, GPIOEvent.BOTH).frequency, 100.0)
+        self.assertEqual(GPIOMeasurement(GPIOMeasure.PULSE_WIDTH, 1, {'count': 0}).bin_edges, [])
+
+    def test_shadow(self):
+        shadow = GPIOShadow()
+        self.assertEqual(GPIOShadow.pairs([20, 21], True), [(20, 1), (21, 1)])
+        self.assertEqual(GPIOOutputMany.pairs({20: 5, 21: False}), [(20, 1), (21, 0)])
+        self.assertRaises(ValueError, GPIOShadow.pairs, [20, 21], [1])
+
+        shadow.setup([20, 21], GPIOSetup.OUT, GPIOCtrl.LOW)
+        shadow.setup([22], GPIOSetup.IN, GPIOCtrl.LOW)
+        self.assertEqual(shadow.value(20), 0)
+        self.assertIsNone(shadow.value(22))
+        self.assertEqual(shadow.changed([(20, 0), (21, 1), (22, 1), (23, 0)]), [(21, 1), (22, 1), (23, 0)])
+
+        shadow.update([(21, 1), (22, 1)])
+        self.assertEqual(shadow.value(21), 1)
+        self.assertIsNone(shadow.value(22))
+
+        shadow.invalidate([21])
+        self.assertIsNone(shadow.value(21))
+        self.assertEqual(shadow.direction(21), GPIOSetup.OUT)
+        shadow.forget([20])
+        self.assertIsNone(shadow.direction(20))
+
+    def test_dumps(self):
+        msg = GPIOCtrl(channel=21, value=1)
+        self.assertEqual(RaspiAckMsg(ack=True, data=msg.dumps(rid=1)).data,
+                         '{"channel": 21, "handle": "output", "value": 1, "rid": 1}')
+        self.assertIsNone(msg.request_id)
+
+
+class FakeStreamWebSocket(object):
+    def __init__(self):
+        """Fake spi stream connection, ack requests then push a sample block every 10ms"""
+        self.acks = 2
+        self.closed = None
+        self.handles = list()
+
+    def settimeout(self, timeout):
+        pass
+
+    def send(self, data):
+        self.handles.append(json.loads(data)['handle'])
+
+    def recv(self):
+        if self.acks:
+            self.acks -= 1
+            return json.dumps({'ack': True, 'data': True, 'handle': ''})
+
+        time.sleep(0.01)
+        return SPI_STREAM_BLOCK_HEADER.pack(0, 0) + b"\x00" * 4
+
+    def close(self):
+        self.closed = 'close'
+
+    def shutdown(self):
+        self.closed = 'shutdown'
+
+
+class TestGPIOOutput(unittest.TestCase):
+    def create(self, **kwargs):
+        self.ws = mock.Mock()
+        self.ws.recv.return_value = json.dumps({'ack': True, 'data': True, 'handle': ''})
+        with mock.patch('raspi_io.client.create_connection', return_value=(self.ws, None)):
+            return GPIO('127.0.0.1', verbose=0, **kwargs)
+
+    def test_plain(self):
+        # Without shadow and coalesce request is sent as is, server validate it
+        gpio = self.create()
+        with mock.patch.object(GPIOShadow, 'pairs') as pairs:
+            self.assertTrue(gpio.output([20, 21], [1]))
+
+        self.assertFalse(pairs.called)
+        self.assertEqual(json.loads(self.ws.send.call_args[0][0]),
+                         {'channel': [20, 21], 'value': [1], 'handle': 'output'})
+
+    def test_shadow(self):
+        gpio = self.create(shadow=True)
+        self.assertRaises(ValueError, gpio.output, [20, 21], [1])
+        self.assertTrue(gpio.output(21, 1))
+        self.assertEqual(self.ws.send.call_count, 1)
+
+
+class TestGPIOEvent(unittest.TestCase):
+    def setUp(self):
+        ack = json.dumps({'ack': True, 'data': True, 'handle': ''})
+        self.ws = mock.Mock()
+        self.ws.recv.return_value = ack
+        self.events_ws = mock.Mock()
+        self.events_ws.recv.side_effect = self.recv_events(ack)
+        with mock.patch('raspi_io.client.create_connection', return_value=(self.ws, None)):
+            self.gpio = GPIO('127.0.0.1', verbose=0)
+
+    @staticmethod
+    def recv_events(ack):
+        yield ack
+        while True:
+            time.sleep(0.01)
+            yield websocket.WebSocketTimeoutException("timed out")
+
+    def add_event_detect(self, channel, edge):
+        with mock.patch('raspi_io.client.create_connection', return_value=(self.events_ws, None)):
+            return self.gpio.add_event_detect(channel, edge)
+
+    def test_edge_mismatch(self):
+        self.assertTrue(self.add_event_detect(21, GPIO.RISING))
+        self.assertRaises(RuntimeError, self.gpio.wait_for_edge, 21, GPIO.FALLING, 10)
+        self.assertRaises(RuntimeError, self.gpio.wait_for_edge, 21, GPIO.BOTH, 10)
+        self.assertIsNone(self.gpio.wait_for_edge(21, GPIO.RISING, 10))
+
+        # Edge detection of both edges can wait for either one
+        self.assertTrue(self.add_event_detect(22, GPIO.BOTH))
+        self.assertIsNone(self.gpio.wait_for_edge(22, GPIO.FALLING, 10))
+
+    def test_close_dispatcher(self):
+        self.assertTrue(self.add_event_detect(21, GPIO.RISING))
+        self.assertTrue(self.add_event_detect(22, GPIO.RISING))
+        self.assertTrue(self.gpio.remove_event_detect(21))
+        self.assertFalse(self.events_ws.shutdown.called)
+
+        # No channel left, dispatcher connection is closed
+        self.assertTrue(self.gpio.cleanup(22))
+        self.assertTrue(self.events_ws.shutdown.called)
+        self.assertFalse(self.gpio.add_event_callback(22, print))
+
+        # Temporary edge detection of wait_for_edge
+        self.events_ws.reset_mock()
+        self.events_ws.recv.side_effect = self.recv_events(self.ws.recv.return_value)
+        with mock.patch('raspi_io.client.create_connection', return_value=(self.events_ws, None)):
+            self.assertIsNone(self.gpio.wait_for_edge(21, GPIO.RISING, 10))
+
+        self.assertTrue(self.events_ws.send.called)
+        self.assertTrue(self.events_ws.shutdown.called)
+
+
+class TestSPITransfer(unittest.TestCase):
+    def test_pack_segments(self):
+        segments, write_data, fields = SPITransfer.pack_segments([
+            (b"\x03", 0), SPISegment([0x00, 0x10], 0, cs_change=1), {'read_size': 4, 'speed': 1000000}
+        ])
+        self.assertEqual(write_data, bytearray(b"\x03\x00\x10"))
+        self.assertEqual(fields, [[1, 0, 0, 0, 0, False], [2, 0, 0, 0, 0, True], [0, 4, 1000000, 0, 0, False]])
+        self.assertRaises(ValueError, SPITransfer.pack_segments, [SPISegment(delay=0x10000)])
+        self.assertRaises(ValueError, SPITransfer.pack_segments, [SPISegment(bits_per_word=33)])
+
+        result = SPITransfer.split_read_data(segments, b"\x01\x02\x03\x04")
+        self.assertEqual([bytes(data) for data in result], [b"", b"", b"\x01\x02\x03\x04"])
+        self.assertRaises(ValueError, SPITransfer.split_read_data, segments, b"\x01")
+
+    def test_stream_start(self):
+        self.assertEqual(SPIStreamStart(write_data="", read_size=3, rate=1000, samples=50).check(), True)
+        self.assertRaises(ValueError, SPIStreamStart(write_data="", read_size=0, rate=1000, samples=50).check)
+        self.assertRaises(ValueError, SPIStreamStart(write_data="", read_size=3, rate=0, samples=50).check)
+        self.assertRaises(ValueError, SPIStreamStart(write_data="", read_size=3, rate=1000, samples=0).check)
+
+    def test_stream_stop(self):
+        ws = FakeStreamWebSocket()
+        start = SPIStreamStart(write_data="", read_size=2, rate=1000, samples=2)
+        device = SPIDevice(device='/dev/spidev0.0', max_speed=50, mode=0, cshigh=False, no_cs=False,
+                           loop=False, lsbfirst=False, threewire=False)
+        with SPIStream(ws, device, start) as stream:
+            self.assertEqual(len(stream.read(1)), 4)
+
+        self.assertFalse(stream.running)
+        self.assertEqual(ws.handles, ['open', 'stream_start', 'stream_stop', 'close'])
+        self.assertEqual(ws.closed, 'close')
+
+        # Stream never stopped is stopped when it is collected
+        ws = FakeStreamWebSocket()
+        SPIStream(ws, device, start)
+        gc.collect()
+        self.assertEqual(ws.handles[-2:], ['stream_stop', 'close'])
+
+
+class TestSoftSPI(unittest.TestCase):
+    def test_bits_per_word(self):
+        # Invalid word size rejected before connect and configure server
+        with mock.patch('raspi_io.client.create_connection') as connect:
+            for bits in (0, 33, 8.0):
+                self.assertRaises(ValueError, SoftSPI, '127.0.0.1', GPIO.BCM, 8, 11, 10, 9, bits_per_word=bits)
+
+        self.assertFalse(connect.called)
+        self.assertRaises(ValueError, SoftSPI, '127.0.0.1', GPIO.BCM, 8, 11, 10, 9, bits_per_word=12,
+                          bytes_result=True)
+
+    def create(self, acks, **kwargs):
+        # Setup ack first, requests without scripted ack (such as cleanup when released) succeed
+        acks = [{'ack': True, 'data': True}] + acks
+        ws = mock.Mock()
+        ws.recv.side_effect = lambda: json.dumps(dict(acks.pop(0) if acks else {'ack': True, 'data': True}, handle=''))
+        with mock.patch('raspi_io.client.create_connection', return_value=(ws, None)):
+            return SoftSPI('127.0.0.1', GPIO.BCM, 8, 11, 10, 9, verbose=0, **kwargs)
+
+    def test_results(self):
+        # Results are int list, failed return empty list
+        spi = self.create([{'ack': True, 'data': [1, 2]}, {'ack': False, 'data': 'error'}])
+        self.assertEqual(spi.xfer([0x9f], 2), [1, 2])
+        self.assertEqual(spi.read(2), [])
+
+        spi = self.create([{'ack': True, 'data': [1, 2]}, {'ack': False, 'data': 'error'}], bytes_result=True)
+        self.assertEqual(spi.xfer([0x9f], 2), b"\x01\x02")
+        self.assertEqual(spi.read(2), b"")
+
+        spi = self.create([{'ack': True, 'data': [0x123, 0x456]}, {'ack': False, 'data': 'error'}], bits_per_word=12)
+        self.assertEqual(spi.read(2), [0x123, 0x456])
+        self.assertEqual(spi.read(2), [])
+
+
+class TestBinaryStream(unittest.TestCase):
+    DATA = bytes(bytearray(range(256))) * 33
+
+    def check_stream(self, stream):
+        with stream:
+            self.assertEqual(stream.size, len(self.DATA))
+            self.assertEqual(b"".join(bytes(block) for block in stream.blocks(1000)), self.DATA)
+            self.assertEqual(stream.md5, hashlib.md5(self.DATA).hexdigest())
+
+    def test_buffer(self):
+        self.check_stream(RaspiBinaryStream(self.DATA))
+        self.check_stream(RaspiBinaryStream(bytearray(self.DATA)))
+
+    def test_file(self):
+        self.check_stream(RaspiBinaryStream(io.BytesIO(self.DATA)))
+        with tempfile.NamedTemporaryFile() as fp:
+            fp.write(self.DATA)
+            fp.flush()
+            self.check_stream(RaspiBinaryStream(u"{}".format(fp.name)))
+
+    def test_random_access(self):
+        with RaspiBinaryStream(self.DATA) as stream:
+            self.assertTrue(stream.random_access)
+            self.assertEqual(bytes(stream.get_block(8, 1000)), self.DATA[8000:])
+
+        with RaspiBinaryStream(io.BytesIO(self.DATA)) as stream:
+            self.assertFalse(stream.random_access)
+            self.assertRaises(TypeError, stream.get_block, 0)
+
+    def test_resume(self):
+        for source in (self.DATA, io.BytesIO(self.DATA)):
+            with RaspiBinaryStream(source) as stream:
+                self.assertEqual(b"".join(bytes(block) for block in stream.blocks(1000, 3)), self.DATA[3000:])
+                self.assertEqual(stream.md5, hashlib.md5(self.DATA).hexdigest())
+
+    def test_empty(self):
+        with RaspiBinaryStream(b"") as stream:
+            self.assertEqual(stream.size, 0)
+            self.assertEqual(list(stream.blocks()), [])
+            self.assertEqual(stream.md5, hashlib.md5(b"").hexdigest())
+
+
+class TestBinarySink(unittest.TestCase):
+    DATA = bytes(bytearray(range(256))) * 33
+
+    def receive(self, sink):
+        for start in range(0, len(self.DATA), 1000):
+            sink.write(self.DATA[start:start + 1000])
+
+        sink.verify(hashlib.md5(self.DATA).hexdigest())
+        return sink.result
+
+    def test_buffer(self):
+        self.assertEqual(bytes(self.receive(RaspiBinarySink(len(self.DATA)))), self.DATA)
+
+    def test_sink(self):
+        fp = io.BytesIO()
+        self.assertEqual(self.receive(RaspiBinarySink(len(self.DATA), fp)), len(self.DATA))
+        self.assertEqual(fp.getvalue(), self.DATA)
+
+        blocks = list()
+        sink = RaspiBinarySink(len(self.DATA), lambda x: blocks.append(bytes(x)))
+        self.assertEqual(self.receive(sink), len(self.DATA))
+        self.assertEqual(b"".join(blocks), self.DATA)
+        self.assertRaises(TypeError, RaspiBinarySink, 1, 1)
+
+    def test_out_of_order(self):
+        sink = RaspiBinarySink(len(self.DATA))
+        blocks = [self.DATA[start:start + 1000] for start in range(0, len(self.DATA), 1000)]
+        for index in reversed(range(1, len(blocks))):
+            self.assertEqual(sink.put(index, blocks[index]), 0)
+
+        self.assertEqual(sink.put(0, blocks[0]), len(blocks))
+        sink.verify(hashlib.md5(self.DATA).hexdigest())
+        self.assertEqual(bytes(sink.result), self.DATA)
+
+        sink = RaspiBinarySink(len(self.DATA))
+        sink.put(2, blocks[2])
+        self.assertEqual(sink.discard(), 1)
+        self.assertEqual(sink.put(0, blocks[0]), 1)
+
+    def test_verify(self):
+        sink = RaspiBinarySink(10)
+        self.assertRaises(ValueError, sink.write, bytes(11))
+        sink.write(bytes(9))
+        self.assertRaises(ValueError, sink.verify, hashlib.md5(bytes(9)).hexdigest())
+        sink.write(bytes(1))
+        self.assertRaises(ValueError, sink.verify, hashlib.md5(bytes(9)).hexdigest())
+        sink.verify(hashlib.md5(bytes(10)).hexdigest())
+
+
+class TestBinaryBlock(unittest.TestCase):
+    def test_block(self):
+        frame = pack_binary_block(7, b"raspi-io")
+        index, block, matched = unpack_binary_block(frame)
+        self.assertEqual((index, bytes(block), matched), (7, b"raspi-io", True))
+
+        frame[-1] ^= 0xff
+        self.assertFalse(unpack_binary_block(frame)[2])
+        self.assertEqual(unpack_binary_block(pack_binary_block(0, b""))[1:], (b"", True))
+        self.assertRaises(RaspiMsgDecodeError, unpack_binary_block, b"\x00")
+
+
+class TestTransferTuner(unittest.TestCase):
+    def test_initial(self):
+        tuner = RaspiTransferTuner(block=32 * 1024, window=2)
+        self.assertEqual(tuner.block, 32 * 1024)
+        self.assertEqual(tuner.window(tuner.block), 2)
+
+    def test_slow_link(self):
+        # 200KB/s, 100ms rtt: small blocks, window cover bandwidth delay product
+        tuner = RaspiTransferTuner()
+        tuner.start(0)
+        now = 0
+        for _ in range(20):
+            now += 0.1
+            tuner.sample(20 * 1024, 0.1, now)
+
+        self.assertEqual(tuner.block, RaspiTransferTuner.MIN_BLOCK)
+        self.assertEqual(tuner.window(tuner.block), 2)
+
+    def test_fast_link(self):
+        # 50MB/s, 20ms rtt: block size grow to max
+        tuner = RaspiTransferTuner()
+        now = 0
+        for latency in (0.04, 0.02, 0.03):
+            now += 0.01
+            tuner.sample(512 * 1024, latency, now)
+
+        self.assertEqual(tuner.block, RaspiTransferTuner.MAX_BLOCK)
+        self.assertAlmostEqual(tuner.rtt, 0.02, places=2)
+        self.assertEqual(tuner.window(tuner.block), 2)
+
+    def test_download(self):
+        # Pipelined download 200KB/s, blocks arrive back to back: rtt measured by upload is kept
+        tuner = RaspiTransferTuner()
+        tuner.sample(20 * 1024, 0.1, 0.1)
+        tuner.start(1)
+        now = 1
+        for _ in range(20):
+            now += 0.1
+            tuner.sample(20 * 1024, now=now)
+
+        self.assertAlmostEqual(tuner.rtt, 0.1)
+        self.assertAlmostEqual(tuner.throughput, 200 * 1024, delta=1)
+        self.assertEqual(tuner.window(tuner.block), 2)
+
+        # Download only, no rtt sample: keep initial window
+        tuner = RaspiTransferTuner(window=3)
+        tuner.start(0)
+        for now in (0.001, 0.002, 0.003):
+            tuner.sample(512 * 1024, now=now)
+
+        self.assertIsNone(tuner.rtt)
+        self.assertEqual(tuner.window(tuner.block), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -36,6 +36,78 @@ class TestGPIO(unittest.TestCase):
         self.assertEqual(self.gpio.output(21, 1), True)
         self.assertEqual(self.gpio.output(21, 0), True)
 
+    def test_many(self):
+        self.assertEqual(self.gpio.setmode(GPIO.BCM), True)
+        self.assertEqual(self.gpio.setup([20, 21], GPIO.OUT), True)
+        self.assertEqual(self.gpio.output_many({20: 1, 21: 0}), True)
+        self.assertEqual(self.gpio.input_many([20, 21]), [1, 0])
+        self.assertEqual(self.gpio.input_many([20, 21], packed=True), 0b01)
+        self.assertEqual(self.gpio.output_mask((1 << 20) | (1 << 21), 1 << 21), True)
+        self.assertEqual(self.gpio.input_many([20, 21], packed=True), 0b10)
+
+    def test_waveform(self):
+        self.assertEqual(self.gpio.setmode(GPIO.BCM), True)
+        self.assertEqual(self.gpio.setup(21, GPIO.OUT), True)
+        self.assertEqual(self.gpio.play_waveform([(0, 21, 1), (100, 21, 0), (200, 21, 1)], repeat=3), True)
+        self.assertRaises(ValueError, self.gpio.play_waveform, [(100, 21, 1), (0, 21, 0)])
+
+    def test_capture(self):
+        self.assertEqual(self.gpio.setmode(GPIO.BCM), True)
+        self.assertEqual(self.gpio.setup([20, 21], GPIO.IN), True)
+        capture = self.gpio.capture([20, 21], 10000, duration=0.1)
+        self.assertEqual(capture.samples, 1000)
+        self.assertEqual(len(capture.bits(21)), 1000)
+        self.assertRaises(ValueError, self.gpio.capture, [20, 21], 10000)
+
+    def test_measure(self):
+        self.assertEqual(self.gpio.setmode(GPIO.BCM), True)
+        self.assertEqual(self.gpio.setup(21, GPIO.IN), True)
+        result = self.gpio.measure(21, GPIO.PERIOD, window=0.1)
+        self.assertEqual(len(result.histogram), 16)
+        self.assertRaises(ValueError, self.gpio.measure, 21, GPIO.PULSE_WIDTH, 0.1, GPIO.BOTH)
+
+    def test_shadow(self):
+        gpio = GPIO(scan_server(timeout=0.03)[0], verbose=0, shadow=True)
+        self.assertEqual(gpio.setmode(GPIO.BCM), True)
+        self.assertEqual(gpio.setup([20, 21], GPIO.OUT), True)
+        self.assertEqual(gpio.shadow.value(20), GPIO.LOW)
+        self.assertEqual(gpio.output(20, 1), True)
+        self.assertEqual(gpio.input(20), GPIO.HIGH)
+
+        with gpio.coalesce() as coalesce:
+            for value in (1, 0, 1, 0):
+                self.assertEqual(gpio.output(21, value), True)
+            self.assertEqual(gpio.input(21), GPIO.LOW)
+            self.assertEqual(len(coalesce), 1)
+
+        self.assertEqual(coalesce.result, True)
+        self.assertEqual(gpio.shadow.value(21), GPIO.LOW)
+
+    def test_batch(self):
+        self.assertEqual(self.gpio.setmode(GPIO.BCM), True)
+        self.assertEqual(self.gpio.setup([20, 21], GPIO.OUT), True)
+        with self.gpio.batch() as batch:
+            for value in (1, 0, 1, 0):
+                self.gpio.output(20, value)
+                self.gpio.output(21, value)
+
+        self.assertEqual(len(batch.acks), 8)
+        self.assertEqual(batch.results, [True] * 8)
+
+    def test_event(self):
+        self.assertEqual(self.gpio.event_detected(21), False)
+        self.assertEqual(self.gpio.add_event_callback(21, print), False)
+        self.assertEqual(self.gpio.setmode(GPIO.BCM), True)
+        self.assertEqual(self.gpio.setup(21, GPIO.IN), True)
+        self.assertEqual(self.gpio.add_event_detect(21, GPIO.BOTH), True)
+        self.assertEqual(self.gpio.add_event_callback(21, print), True)
+        self.assertEqual(self.gpio.remove_event_detect(21), True)
+        self.assertEqual(self.gpio.event_detected(21), False)
+        self.assertEqual(self.gpio.add_event_detect(21, GPIO.BOTH, bouncetime=20, glitch=100, coalesce=100), True)
+        self.assertIsInstance(self.gpio.event_edges(21), list)
+        self.assertEqual(self.gpio.remove_event_detect(21), True)
+        self.assertRaises(ValueError, self.gpio.add_event_detect, 21, GPIO.BOTH, bouncetime=-1)
+
     def test_cleanup(self):
         self.assertEqual(self.gpio.cleanup(123), False)
         self.assertEqual(self.gpio.cleanup([21, 22]), True)
@@ -41,6 +41,13 @@ class I2CTest(unittest.TestCase):
             r_buf = bytearray(self.i2c.read(start, self.i2c_size - start))
             self.assertSequenceEqual(r_buf, w_buf)
 
+    def test_async(self):
+        w_buf = list(range(16))
+        futures = [self.i2c.write_async(0x0, w_buf), self.i2c.read_async(0x0, 16), self.i2c.ioctl_read_async(0x0, 16)]
+        self.assertEqual(futures[0].result(), len(w_buf))
+        self.assertSequenceEqual(bytearray(futures[1].result()), w_buf)
+        self.assertSequenceEqual(bytearray(futures[2].result()), w_buf)
+
     def test_ioctl_read(self):
         self.assertEqual(len(self.i2c.ioctl_read(0x0, 1)), 1)
         self.assertEqual(len(self.i2c.ioctl_read(0x11, 3)), 3)
@@ -1,5 +1,5 @@
 import unittest
-from raspi_io import SoftPWM, GPIO
+from raspi_io import SoftPWM, SoftPWMGroup, GPIO
 from raspi_io.utility import scan_server
 
 
@@ -24,6 +24,34 @@ class TestSoftPWM(unittest.TestCase):
         self.assertEqual(self.pwm.stop(), True)
         self.assertEqual(self.pwm.is_running(), False)
 
+    def test_profile(self):
+        self.assertEqual(self.pwm.play_profile([(0, 10), (50, 10), (100, 10)]), True)
+        self.assertEqual(self.pwm.is_running(), True)
+        self.assertRaises(ValueError, self.pwm.play_profile, [(101, 10)])
+
+
+class TestSoftPWMGroup(unittest.TestCase):
+    def setUp(self):
+        self.pwm = SoftPWMGroup(scan_server(timeout=0.03)[0], GPIO.BCM, [20, 21], 1000, verbose=0)
+
+    def tearDown(self):
+        del self.pwm
+
+    def test_start(self):
+        self.assertEqual(self.pwm.start(50), True)
+        self.assertEqual(self.pwm.is_running(), True)
+        self.assertEqual(self.pwm.start({21: 100}), True)
+        self.assertEqual(self.pwm.start([10, 20]), True)
+        self.assertRaises(ValueError, self.pwm.start, [10])
+        self.assertRaises(ValueError, self.pwm.start, {22: 100})
+        self.assertEqual(self.pwm.stop(), True)
+        self.assertEqual(self.pwm.is_running(), False)
+
+    def test_profile(self):
+        self.assertEqual(self.pwm.play_profile([(0, 10), ([50, 100], 10)]), True)
+        self.assertEqual(self.pwm.play_profile([(0, 10), (100, 10)], channels=[21], repeat=2), True)
+        self.assertRaises(ValueError, self.pwm.play_profile, [(0, 10)], channels=[22])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,6 +1,7 @@
 import six
 import unittest
 from raspi_io import Query
+from raspi_io.query import QueryVersion
 from raspi_io.utility import scan_server
 
 
@@ -31,6 +32,11 @@ class TestQuery(unittest.TestCase):
             self.assertIsInstance(address, six.string_types)
             self.assertEqual(address.count(":"), 5)
 
+    def test_query_features(self):
+        features = self.query.get_features()
+        self.assertIsInstance(features, set)
+        self.assertTrue(features.issubset(set(QueryVersion().features)))
+
 
 if __name__ == '__main__':
     # unittest.main()
@@ -0,0 +1,32 @@
+import unittest
+from raspi_io import SoftSPI, GPIO
+from raspi_io.utility import scan_server
+
+
+class TestSoftSPI(unittest.TestCase):
+    def setUp(self):
+        self.spi = SoftSPI(scan_server(timeout=0.03)[0], GPIO.BCM, cs=8, clk=11, mosi=10, miso=9, verbose=0)
+
+    def tearDown(self):
+        del self.spi
+
+    def test_xfer(self):
+        self.assertEqual(len(self.spi.xfer(b"\x9f", 4)), 4)
+        self.assertEqual(len(self.spi.xfer([0x9f], 4)), 4)
+        self.assertIsInstance(self.spi.read(4), list)
+
+    def test_transfer(self):
+        result = self.spi.transfer([(b"\x03\x00\x00\x00", 0), (b"", 16), ([0x05], 1)])
+        self.assertEqual([len(data) for data in result], [0, 16, 1])
+        self.assertIsInstance(result[1], list)
+
+    def test_bytes_result(self):
+        del self.spi
+        self.spi = SoftSPI(scan_server(timeout=0.03)[0], GPIO.BCM, cs=8, clk=11, mosi=10, miso=9, verbose=0,
+                           bytes_result=True)
+        self.assertIsInstance(self.spi.read(4), bytes)
+        self.assertIsInstance(self.spi.transfer([(b"", 16)])[0], memoryview)
+
+
+if __name__ == "__main__":
+    unittest.main()
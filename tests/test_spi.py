@@ -19,6 +19,23 @@ class SPITest(unittest.TestCase):
         self.assertEqual(len(data), 3)
         self.spi.print_binary(data)
 
+    def test_transfer(self):
+        result = self.spi.transfer([([0x03], 0), ([0x00, 0x00, 0x00], 0), {'read_size': 16, 'cs_change': True}])
+        self.assertEqual([len(data) for data in result], [0, 0, 16])
+
+    def test_xfer_async(self):
+        futures = [self.spi.xfer_async([0x9f], 3) for _ in range(8)] + [self.spi.xfer2_async([0x9f], 3)]
+        self.assertEqual([len(future.result()) for future in futures], [3] * 9)
+        self.assertEqual(self.spi.write_async(list(range(16))).result(), 16)
+        self.assertEqual([len(data) for data in self.spi.transfer_async([([0x03], 0), (b"", 16)]).result()], [0, 16])
+
+    def test_stream(self):
+        with self.spi.start_stream([0x01, 0x80, 0x00], 3, 1000, samples=100) as stream:
+            block = stream.read(timeout=1)
+            self.assertEqual(len(block), 100 if hasattr(block, 'reshape') else 300)
+
+        self.assertEqual(stream.running, False)
+
     def test_read(self):
         data = self.spi.read(16)
         self.assertEqual(len(data), 16)